@@ -10,6 +10,8 @@ from controller.user import create_admin_user
 from controller.role import create_admin_role
 from controller.permission import create_default_permissions
 from middlewares.middlewares import Middlewares
+from controller.erp_sync import erp_sync_command
+from controller.log_retention import log_maintain_command
 
 app = Flask(__name__)
 app.config.from_object('config.Config')
@@ -22,6 +24,9 @@ Logger(app)
 CORS(app)
 Middlewares(app)
 
+app.cli.add_command(erp_sync_command)
+app.cli.add_command(log_maintain_command)
+
 if __name__ == '__main__':
 
     with app.app_context():
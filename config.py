@@ -15,4 +15,82 @@ class Config:
     DST_MSSQL = os.environ.get(
         'DST_MSSQL', 'Driver={FreeTDS};Server=ip;port=4876;UID=sa;PWD=password;Database=db')
     IMG_PATH = os.environ.get(
-        'IMG_PATH', './img')
\ No newline at end of file
+        'IMG_PATH', './img')
+
+    # 產品搜尋總數快取（count=cached/estimated/async）
+    COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', 60))
+    COUNT_CACHE_SIZE = int(os.environ.get('COUNT_CACHE_SIZE', 1024))
+    # 系列寫入世代檔案（mmap 共用），任一 worker 寫入系列時其他 worker 快取的總數隨之失效，不設定則其他 worker 只依 TTL 過期
+    SERIES_GENERATION_PATH = os.environ.get('SERIES_GENERATION_PATH', './run/series_generation')
+
+    # Excel 匯出每批讀取的筆數
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 500))
+
+    # 背景匯出工作的狀態與檔案存放目錄、同時執行數、保留秒數
+    EXPORT_PATH = os.environ.get('EXPORT_PATH', './exports')
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+    EXPORT_JOB_TTL = int(os.environ.get('EXPORT_JOB_TTL', 3600))
+
+    # Excel 匯出圖片縮圖的長邊像素與每個 worker 產生縮圖的行程數
+    # 每個 gunicorn worker 各自建立縮圖 process pool，主機上的縮圖行程總數為 GUNICORN_WORKERS × THUMBNAIL_WORKERS
+    EXPORT_THUMBNAIL_SIZE = int(os.environ.get('EXPORT_THUMBNAIL_SIZE', 100))
+    THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+
+    # ERP（MSSQL）連線池：連線上限、連線最長使用秒數、閒置多久需先檢查、等待連線逾時秒數
+    MSSQL_POOL_SIZE = int(os.environ.get('MSSQL_POOL_SIZE', 5))
+    MSSQL_POOL_MAX_LIFETIME = int(os.environ.get('MSSQL_POOL_MAX_LIFETIME', 1800))
+    MSSQL_POOL_PRE_PING = int(os.environ.get('MSSQL_POOL_PRE_PING', 30))
+    MSSQL_POOL_TIMEOUT = int(os.environ.get('MSSQL_POOL_TIMEOUT', 3))
+
+    # ERP 資料快取：快取秒數、ERP 查無料號的快取秒數、最多快取的料號數
+    ERP_CACHE_TTL = int(os.environ.get('ERP_CACHE_TTL', 300))
+    ERP_CACHE_NEGATIVE_TTL = int(os.environ.get('ERP_CACHE_NEGATIVE_TTL', 60))
+    ERP_CACHE_SIZE = int(os.environ.get('ERP_CACHE_SIZE', 10000))
+
+    # 跨 worker 共用的 ERP 快取（SQLite WAL 檔案），未設定路徑時不啟用
+    ERP_SHARED_CACHE_PATH = os.environ.get('ERP_SHARED_CACHE_PATH')
+    ERP_SHARED_CACHE_TTL = int(os.environ.get('ERP_SHARED_CACHE_TTL', 900))
+    # 剩餘壽命低於 TTL 的此比例時於背景預先更新
+    ERP_SHARED_CACHE_REFRESH_AHEAD = float(os.environ.get('ERP_SHARED_CACHE_REFRESH_AHEAD', 0.2))
+
+    # ERP 查詢每批料號數（SQL Server 單一查詢最多 2100 個參數）與同時查詢的批數
+    ERP_QUERY_CHUNK_SIZE = int(os.environ.get('ERP_QUERY_CHUNK_SIZE', 1000))
+    ERP_QUERY_PARALLELISM = int(os.environ.get('ERP_QUERY_PARALLELISM', 4))
+
+    # ERP 斷路器：連續失敗次數達上限後，冷卻秒數內不再查詢 ERP
+    ERP_BREAKER_FAILURES = int(os.environ.get('ERP_BREAKER_FAILURES', 5))
+    ERP_BREAKER_COOLDOWN = int(os.environ.get('ERP_BREAKER_COOLDOWN', 30))
+    # 每次查詢等待 ERP 的秒數上限（一般請求 / Excel 匯出每批）
+    ERP_LATENCY_BUDGET = float(os.environ.get('ERP_LATENCY_BUDGET', 3))
+    ERP_EXPORT_LATENCY_BUDGET = float(os.environ.get('ERP_EXPORT_LATENCY_BUDGET', 30))
+
+    # ERP 本地鏡像：改由 erp_product 讀取 ERP 資料（需定期執行 flask erp-sync）
+    # 增量同步依據的 ERP 異動時間欄位（每次修改都會更新），不設定時 erp-sync 一律完整同步
+    ERP_READ_FROM_MIRROR = os.environ.get('ERP_READ_FROM_MIRROR', 'False').lower() == 'true'
+    ERP_SYNC_CHANGE_COLUMN = os.environ.get('ERP_SYNC_CHANGE_COLUMN') or None
+
+    # 驗證 token 時使用者狀態（token_version、停用）的行程內快取秒數
+    TOKEN_STATE_TTL = int(os.environ.get('TOKEN_STATE_TTL', 60))
+    # 撤銷世代檔案（mmap 共用），同一主機的 worker 以此得知其他 worker 的撤銷，不設定則只依 TTL
+    REVOCATION_EPOCH_PATH = os.environ.get('REVOCATION_EPOCH_PATH', './run/revocation_epoch')
+
+    # 操作紀錄批次寫入：每批筆數、最長等待毫秒數、佇列上限、佇列已滿時等待的毫秒數（逾時則捨棄）
+    ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 100))
+    ACTIVITY_LOG_FLUSH_INTERVAL = int(os.environ.get('ACTIVITY_LOG_FLUSH_INTERVAL', 500))
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.environ.get('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+    ACTIVITY_LOG_ENQUEUE_TIMEOUT = int(os.environ.get('ACTIVITY_LOG_ENQUEUE_TIMEOUT', 10))
+    # 操作紀錄 payload 的大小上限（位元組），超過時壓縮保存，壓縮後仍超過則截斷
+    ACTIVITY_LOG_PAYLOAD_LIMIT = int(os.environ.get('ACTIVITY_LOG_PAYLOAD_LIMIT', 100 * 1024))
+
+    # 操作紀錄保留月數與預先建立的月份分區數（flask log-maintain）、列表總數估計值的快取秒數
+    ACTIVITY_LOG_RETENTION_MONTHS = int(os.environ.get('ACTIVITY_LOG_RETENTION_MONTHS', 12))
+    ACTIVITY_LOG_PARTITIONS_AHEAD = int(os.environ.get('ACTIVITY_LOG_PARTITIONS_AHEAD', 3))
+    ACTIVITY_LOG_COUNT_TTL = int(os.environ.get('ACTIVITY_LOG_COUNT_TTL', 60))
+
+    # 一次新增產品達此筆數時改用批次新增（也可帶 ?bulk=true）
+    PRODUCT_BULK_THRESHOLD = int(os.environ.get('PRODUCT_BULK_THRESHOLD', 100))
+    # 產品匯入每批驗證與寫入的列數、錯誤報告最多列出的筆數
+    PRODUCT_IMPORT_CHUNK_SIZE = int(os.environ.get('PRODUCT_IMPORT_CHUNK_SIZE', 1000))
+    PRODUCT_IMPORT_MAX_ERRORS = int(os.environ.get('PRODUCT_IMPORT_MAX_ERRORS', 1000))
+    # 複製產品時平行複製圖片檔案的執行緒數
+    PRODUCT_COPY_IMAGE_WORKERS = int(os.environ.get('PRODUCT_COPY_IMAGE_WORKERS', 8))
@@ -1,6 +1,8 @@
 from flask import current_app, jsonify, make_response, request
 from models.archive import Archive
+from models.series import Item
 from models.shared import db
+from controller.search_count import invalidate_series
 from sqlalchemy.exc import SQLAlchemyError
 from flask_jwt_extended import get_jwt_identity
 from modules.exception import handle_exceptions
@@ -28,6 +30,7 @@ def create(data):
         created_count += 1
 
     db.session.commit()
+    __invalidate_search_counts(item_ids)
 
     return make_response(
         jsonify(
@@ -62,6 +65,7 @@ def delete(data):
             not_found_ids.append(item_id)
 
     db.session.commit()
+    __invalidate_search_counts(deleted_ids)
 
     return make_response(
         jsonify(
@@ -76,3 +80,12 @@ def delete(data):
         ),
         200,
     )
+
+
+def __invalidate_search_counts(item_ids):
+    # 封存狀態會影響 isArchived 篩選的總數
+    if not item_ids:
+        return
+
+    series_ids = db.session.query(Item.series_id).filter(Item.id.in_(item_ids)).distinct()
+    invalidate_series(*[row[0] for row in series_ids])
@@ -1,8 +1,30 @@
 from flask import current_app
-from models.mssql import Connect
+from controller import erp_cache, erp_shared_cache
+from models.erp import ErpProduct
+from models.mssql import get_pool
 from models.series import Field
 from models.shared import db
+from modules.circuit_breaker import CircuitBreaker
 from utils.permissions import check_field_permission
+from utils.typed_value import parse_date
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime
+import math
+import os
+import threading
+import time
+
+# read(with_status=True) 回傳的 ERP 資料狀態
+ERP_OK = "ok"
+ERP_PARTIAL = "partial"
+ERP_UNAVAILABLE = "unavailable"
+ERP_STATUSES = [ERP_OK, ERP_PARTIAL, ERP_UNAVAILABLE]
+
+_query_executor = None
+_query_executor_pid = None
+_breaker = None
+_lock = threading.Lock()
+
 
 def get_erp_fields_metadata():
     """
@@ -19,49 +41,46 @@ def get_erp_fields_metadata():
     ]
 
 
-def read(product_numbers, series_id=None):
+def read(
+    product_numbers,
+    series_id=None,
+    can_read_limit_field=None,
+    with_status=False,
+    budget=None,
+):
+    """
+    依 PROD_NO 批次讀取 ERP 資料。
+    快取存放未過濾的 ERP 資料，命中與否都在最後才依權限過濾，不同權限的使用者共用同一份快取。
+    can_read_limit_field 為 None 時由目前登入者的 JWT 判斷限制欄位權限。
+    with_status 為 True 時回傳 (data_map, erp_status)，erp_status 為 ERP_STATUSES 之一。
+    budget 為等待 ERP 的秒數上限，預設為 ERP_LATENCY_BUDGET；ERP 斷路時不等待，直接回傳快取或空值。
+    """
     data_map = {}
 
     if not product_numbers:
-        return data_map
+        return (data_map, ERP_OK) if with_status else data_map
 
-    placeholders = ",".join(["?" for _ in product_numbers])
-    sql_query = f"""
-        SELECT PROD_NO, PROD_C, PROD_CT, DOLR_TI, KEYI_D, LEAD_TIME, FIZO_D, PROD_STAT
-        FROM PROD
-        WHERE PROD_NO IN ({placeholders})
-    """
-    conn = None
-    cursor = None
-    try:
-        conn = Connect(current_app.config["DST_MSSQL"])
-        cursor = conn.cursor()
-        cursor.execute(sql_query, tuple(product_numbers))
-
-        results = cursor.fetchall()
+    product_numbers = list(dict.fromkeys(product_numbers))
+    failed = []
 
-        for row in results:
-            # 完整的 ERP 欄位資料
-            data = [
-                {"key": "標準進價(進貨幣別)", "value": str(row.PROD_C)},
-                {"key": "實際單位總成本(本地幣)", "value": str(row.PROD_CT)},
-                {"key": "進貨幣別欄位", "value": str(row.DOLR_TI)},
-                {"key": "建檔日期", "value": row.KEYI_D},
-                {"key": "LeadTime(天)", "value": str(row.LEAD_TIME)},
-                {"key": "停產日期", "value": str(row.FIZO_D)},
-                {"key": "交易狀態", "value": str(row.PROD_STAT)},
-            ]
+    cached, missing = erp_cache.get_many(product_numbers)
+    for product_no, data in cached.items():
+        if data is not erp_cache.NOT_FOUND:
+            data_map[product_no] = list(data)
 
-            data_map[row.PROD_NO] = data
+    if missing and erp_shared_cache.is_enabled():
+        missing = _read_shared_cache(missing, data_map)
 
-    except Exception as e:
-        current_app.logger.error(e)
-
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    if missing:
+        fetched, failed = _query_products(missing, budget)
+        failed_set = set(failed)
+        queried = [product_no for product_no in missing if product_no not in failed_set]
+        erp_cache.store(fetched, queried)
+        if erp_shared_cache.is_enabled():
+            _store_shared_cache(fetched, queried)
+        data_map.update(
+            {product_no: list(data) for product_no, data in fetched.items()}
+        )
 
     # Ensure all product_numbers have a result in the data_map
     for product_no in product_numbers:
@@ -79,12 +98,275 @@ def read(product_numbers, series_id=None):
 
     # 最後根據權限過濾 ERP 欄位
     if series_id:
-        data_map = _filter_erp_fields_by_permission(data_map, series_id)
+        data_map = _filter_erp_fields_by_permission(
+            data_map, series_id, can_read_limit_field
+        )
+
+    if not with_status:
+        return data_map
+
+    if not failed:
+        erp_status = ERP_OK
+    elif len(failed) < len(product_numbers):
+        erp_status = ERP_PARTIAL
+    else:
+        erp_status = ERP_UNAVAILABLE
+    return data_map, erp_status
+
+
+def merge_status(statuses):
+    """合併多次 read 的 ERP 狀態：全部成功為 ok、全部失敗為 unavailable，其餘為 partial"""
+    statuses = set(statuses)
+    if not statuses or statuses == {ERP_OK}:
+        return ERP_OK
+    if statuses == {ERP_UNAVAILABLE}:
+        return ERP_UNAVAILABLE
+    return ERP_PARTIAL
+
+
+def _read_shared_cache(product_numbers, data_map):
+    """由跨 worker 共用快取補上本機快取未命中的料號，回傳仍需向 ERP 查詢的料號"""
+    try:
+        found, missing, refresh = erp_shared_cache.get_many(product_numbers)
+    except Exception as e:
+        current_app.logger.warning(f"ERP shared cache unavailable: {e}")
+        return product_numbers
+
+    erp_cache.store(
+        {product_no: data for product_no, data in found.items() if data is not None},
+        list(found),
+    )
+    for product_no, data in found.items():
+        if data is not None:
+            data_map[product_no] = list(data)
+
+    if refresh:
+        erp_shared_cache.schedule_refresh(refresh, _query_products)
+
+    return missing
+
+
+def _store_shared_cache(data_map, product_numbers):
+    try:
+        erp_shared_cache.store(data_map, product_numbers)
+    except Exception as e:
+        current_app.logger.warning(f"ERP shared cache unavailable: {e}")
+
+
+def _query_products(product_numbers, budget=None):
+    """
+    向 ERP 查詢料號，回傳 (data_map, failed)。
+    料號依 ERP_QUERY_CHUNK_SIZE 分批（SQL Server 單一查詢最多 2100 個參數），
+    以連線池中的多條連線並行查詢；failed 為查詢失敗、逾時或被斷路器略過的料號。
+    - budget: 本次查詢最多等待的秒數，預設為 ERP_LATENCY_BUDGET，逾時的批次視為失敗
+    """
+    if current_app.config.get("ERP_READ_FROM_MIRROR", False):
+        return _query_mirror(product_numbers), []
+
+    breaker = _get_breaker()
+    if not breaker.allow():
+        return {}, list(product_numbers)
+
+    if budget is None:
+        budget = current_app.config.get("ERP_LATENCY_BUDGET", 3)
+
+    chunk_size = current_app.config.get("ERP_QUERY_CHUNK_SIZE", 1000)
+    chunks = [
+        product_numbers[start:start + chunk_size]
+        for start in range(0, len(product_numbers), chunk_size)
+    ]
+    pool = _get_erp_pool()
+    deadline = time.monotonic() + budget
+    cursors = [[] for _ in chunks]
+
+    futures = [
+        _get_query_executor().submit(_query_chunk, pool, chunk, deadline, chunk_cursors)
+        for chunk, chunk_cursors in zip(chunks, cursors)
+    ]
+    done, _ = wait(futures, timeout=budget)
+
+    data_map = {}
+    failed = []
+    for chunk, future, chunk_cursors in zip(chunks, futures, cursors):
+        if future in done:
+            rows, error = future.result()
+        else:
+            # 放棄等待的批次：尚未開始的直接取消；執行中的中止 ERP 查詢，
+            # 讓工作執行緒與連線立即釋放，不會在 ERP 緩慢時占滿執行緒池與連線池
+            if not future.cancel():
+                for cursor in chunk_cursors:
+                    _cancel_cursor(cursor)
+            rows, error = None, f"exceeded latency budget of {budget}s"
+
+        if error is not None:
+            current_app.logger.error(
+                f"ERP query failed for {len(chunk)} of {len(product_numbers)} products: {error}"
+            )
+            failed += chunk
+            continue
+
+        for row in rows:
+            # 完整的 ERP 欄位資料
+            data_map[row.PROD_NO] = _erp_data(**erp_row_values(row))
+
+    if failed:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    return data_map, failed
+
+
+def _query_mirror(product_numbers):
+    """由 flask erp-sync 同步的本地鏡像表讀取 ERP 資料，不連線 MSSQL"""
+    chunk_size = current_app.config.get("ERP_QUERY_CHUNK_SIZE", 1000)
+    data_map = {}
+    for start in range(0, len(product_numbers), chunk_size):
+        products = db.session.query(ErpProduct).filter(
+            ErpProduct.prod_no.in_(product_numbers[start:start + chunk_size])
+        )
+        for product in products:
+            data_map[product.prod_no] = _erp_data(
+                prod_c=product.prod_c,
+                prod_ct=product.prod_ct,
+                dolr_ti=product.dolr_ti,
+                keyi_d=product.keyi_d,
+                lead_time=product.lead_time,
+                fizo_d=product.fizo_d,
+                prod_stat=product.prod_stat,
+            )
 
     return data_map
 
 
-def _filter_erp_fields_by_permission(data_map, series_id):
+def erp_row_values(row):
+    """
+    將 ERP PROD 查詢結果轉為統一格式，直接查詢與 flask erp-sync 寫入鏡像共用，
+    兩種讀取方式回傳相同的資料：文字欄位為 str，日期欄位解析為 datetime（無法解析時為 None）。
+    """
+    return {
+        "prod_c": str(row.PROD_C),
+        "prod_ct": str(row.PROD_CT),
+        "dolr_ti": str(row.DOLR_TI),
+        "keyi_d": parse_erp_date(row.KEYI_D),
+        "lead_time": str(row.LEAD_TIME),
+        "fizo_d": parse_erp_date(row.FIZO_D),
+        "prod_stat": str(row.PROD_STAT),
+    }
+
+
+def parse_erp_date(value):
+    """ERP 日期欄位可能為 datetime、date 或字串（含 YYYYMMDD），統一轉為 datetime"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        value = value.strip()
+        parsed = parse_date(value)
+        if parsed is None:
+            try:
+                parsed = datetime.strptime(value, "%Y%m%d")
+            except ValueError:
+                return None
+        return datetime(parsed.year, parsed.month, parsed.day)
+    return None
+
+
+def _erp_data(prod_c, prod_ct, dolr_ti, keyi_d, lead_time, fizo_d, prod_stat):
+    return [
+        {"key": "標準進價(進貨幣別)", "value": prod_c},
+        {"key": "實際單位總成本(本地幣)", "value": prod_ct},
+        {"key": "進貨幣別欄位", "value": dolr_ti},
+        {"key": "建檔日期", "value": keyi_d},
+        {"key": "LeadTime(天)", "value": lead_time},
+        {"key": "停產日期", "value": str(fizo_d)},
+        {"key": "交易狀態", "value": prod_stat},
+    ]
+
+
+def _query_chunk(pool, product_numbers, deadline, cursors):
+    """
+    查詢單一批料號，回傳 (rows, error)；於工作執行緒執行，不使用 current_app。
+    等待連線與查詢逾時皆以呼叫端的 deadline 計算：開始時已超過就不取用連線，
+    ERP 端查詢逾時（SQL_ATTR_QUERY_TIMEOUT）設為剩餘秒數，呼叫端放棄後查詢也會在 ERP 端中止。
+    執行中的 cursor 放入 cursors，供呼叫端逾時時主動取消。
+    """
+    placeholders = ",".join(["?" for _ in product_numbers])
+    sql_query = f"""
+        SELECT PROD_NO, PROD_C, PROD_CT, DOLR_TI, KEYI_D, LEAD_TIME, FIZO_D, PROD_STAT
+        FROM PROD
+        WHERE PROD_NO IN ({placeholders})
+    """
+    try:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None, TimeoutError("latency budget exhausted before the query started")
+
+        with pool.connection(timeout=remaining) as conn:
+            # pyodbc 的查詢逾時以整數秒計，0 代表不逾時
+            conn.timeout = max(1, math.ceil(deadline - time.monotonic()))
+            cursor = conn.cursor()
+            cursors.append(cursor)
+            cursor.execute(sql_query, tuple(product_numbers))
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows, None
+    except Exception as e:
+        return None, e
+
+
+def _cancel_cursor(cursor):
+    """
+    由其他執行緒中止 cursor 上執行中的查詢，查詢已結束或 cursor 已關閉時忽略。
+    被中止的查詢在工作執行緒拋出例外，該連線由連線池丟棄而不放回。
+    """
+    try:
+        cursor.cancel()
+    except Exception:
+        pass
+
+
+def _get_query_executor():
+    """ERP 查詢的執行緒池，fork 後的子行程重新建立"""
+    global _query_executor, _query_executor_pid
+    with _lock:
+        if _query_executor is None or _query_executor_pid != os.getpid():
+            _query_executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get("ERP_QUERY_PARALLELISM", 4),
+                thread_name_prefix="erp-query",
+            )
+            _query_executor_pid = os.getpid()
+        return _query_executor
+
+
+def _get_breaker():
+    global _breaker
+    with _lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                failure_threshold=current_app.config.get("ERP_BREAKER_FAILURES", 5),
+                cooldown=current_app.config.get("ERP_BREAKER_COOLDOWN", 30),
+            )
+        return _breaker
+
+
+def breaker_metrics():
+    """目前行程的 ERP 斷路器狀態，尚未使用過 ERP 時為 None"""
+    return _breaker.metrics() if _breaker else None
+
+
+def _get_erp_pool():
+    return get_pool(
+        current_app.config["DST_MSSQL"],
+        size=current_app.config.get("MSSQL_POOL_SIZE", 5),
+        max_lifetime=current_app.config.get("MSSQL_POOL_MAX_LIFETIME", 1800),
+        pre_ping=current_app.config.get("MSSQL_POOL_PRE_PING", 30),
+        timeout=current_app.config.get("MSSQL_POOL_TIMEOUT", 3),
+    )
+
+
+def _filter_erp_fields_by_permission(data_map, series_id, can_read_limit_field=None):
     """根據權限過濾 ERP 欄位"""
     # 取得 ERP 欄位的權限設定
     erp_fields = db.session.query(Field).filter(
@@ -97,7 +379,9 @@ def _filter_erp_fields_by_permission(data_map, series_id):
         # 檢查是否為限制欄位
         has_permission = True
         if field.is_limit_field:
-            has_permission = check_field_permission("limit-field.read")
+            if can_read_limit_field is None:
+                can_read_limit_field = check_field_permission("limit-field.read")
+            has_permission = can_read_limit_field
         erp_fields_permission[field.name] = has_permission
     # 過濾每個產品的 ERP 欄位
     filtered_data_map = {}
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+DEFAULT_ERP_CACHE_TTL = 300
+DEFAULT_ERP_CACHE_NEGATIVE_TTL = 60
+DEFAULT_ERP_CACHE_SIZE = 10000
+
+# ERP 查無此料號時快取的值
+NOT_FOUND = None
+
+_cache = OrderedDict()  # PROD_NO -> (expires_at, data 或 NOT_FOUND)
+_stats = {"hits": 0, "misses": 0, "negativeHits": 0, "evictions": 0}
+_lock = threading.Lock()
+
+
+def get_many(product_numbers):
+    """
+    回傳 (found, missing)。
+    - found: {PROD_NO: data 或 NOT_FOUND}，data 為未經權限過濾的 ERP 欄位
+    - missing: 未命中或已過期、需要向 ERP 查詢的料號
+    """
+    now = time.monotonic()
+    found = {}
+    missing = []
+
+    with _lock:
+        for product_no in product_numbers:
+            entry = _cache.get(product_no)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del _cache[product_no]
+                missing.append(product_no)
+                _stats["misses"] += 1
+                continue
+
+            _cache.move_to_end(product_no)
+            found[product_no] = entry[1]
+            if entry[1] is NOT_FOUND:
+                _stats["negativeHits"] += 1
+            else:
+                _stats["hits"] += 1
+
+    return found, missing
+
+
+def store(data_map, queried_product_numbers):
+    """
+    寫入查詢結果；queried_product_numbers 中 ERP 沒有回傳的料號以較短的 TTL 記錄為 NOT_FOUND。
+    查詢失敗時不應呼叫，避免把暫時性錯誤快取成查無資料。
+    """
+    ttl = current_app.config.get("ERP_CACHE_TTL", DEFAULT_ERP_CACHE_TTL)
+    negative_ttl = current_app.config.get(
+        "ERP_CACHE_NEGATIVE_TTL", DEFAULT_ERP_CACHE_NEGATIVE_TTL
+    )
+    max_size = current_app.config.get("ERP_CACHE_SIZE", DEFAULT_ERP_CACHE_SIZE)
+    now = time.monotonic()
+
+    with _lock:
+        for product_no in queried_product_numbers:
+            data = data_map.get(product_no, NOT_FOUND)
+            expires_at = now + (ttl if data is not NOT_FOUND else negative_ttl)
+            _cache[product_no] = (expires_at, data)
+            _cache.move_to_end(product_no)
+
+        while len(_cache) > max_size:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def stats():
+    """目前行程的快取統計"""
+    with _lock:
+        return {**_stats, "size": len(_cache)}
+
+
+def clear():
+    with _lock:
+        _cache.clear()
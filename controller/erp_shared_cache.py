@@ -0,0 +1,220 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from flask import current_app
+
+DEFAULT_ERP_SHARED_CACHE_TTL = 900
+# 剩餘壽命低於 TTL 的此比例時，讀取仍回傳快取值並於背景重新查詢
+DEFAULT_ERP_SHARED_CACHE_REFRESH_AHEAD = 0.2
+# 每寫入幾次清除一次過期資料
+CLEANUP_INTERVAL = 100
+# 單次查詢的料號數，低於 SQLite 的參數數量上限
+QUERY_CHUNK_SIZE = 500
+
+_local = threading.local()
+_store_count = 0
+_store_lock = threading.Lock()
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="erp-refresh")
+
+
+def is_enabled():
+    """設定 ERP_SHARED_CACHE_PATH 才啟用跨 worker 共用的快取"""
+    return bool(current_app.config.get("ERP_SHARED_CACHE_PATH"))
+
+
+def get_many(product_numbers):
+    """
+    回傳 (found, missing, refresh)。
+    - found: {PROD_NO: data 或 None（ERP 查無此料號）}
+    - missing: 共用快取中沒有或已過期的料號
+    - refresh: found 中即將過期、且由本行程取得重新查詢權的料號
+    """
+    now = time.time()
+    product_numbers = list(product_numbers)
+    found = {}
+    refresh = []
+
+    connection = _connection()
+    rows = []
+    for start in range(0, len(product_numbers), QUERY_CHUNK_SIZE):
+        chunk = product_numbers[start:start + QUERY_CHUNK_SIZE]
+        placeholders = ",".join(["?" for _ in chunk])
+        rows += connection.execute(
+            f"""
+            SELECT prod_no, data, refresh_at FROM erp_cache
+            WHERE prod_no IN ({placeholders}) AND expires_at > ?
+            """,
+            [*chunk, now],
+        ).fetchall()
+
+    due = []
+    for product_no, data, refresh_at in rows:
+        found[product_no] = _decode(data)
+        if refresh_at <= now:
+            due.append(product_no)
+
+    if due:
+        # 延後 refresh_at 作為重新查詢的認領，多個 worker 同時讀到時只有一個會重新查詢
+        claim_until = now + _ttl() * _refresh_ahead()
+        with connection:
+            for product_no in due:
+                claimed = connection.execute(
+                    """
+                    UPDATE erp_cache SET refresh_at = ?
+                    WHERE prod_no = ? AND refresh_at <= ?
+                    """,
+                    [claim_until, product_no, now],
+                ).rowcount
+                if claimed:
+                    refresh.append(product_no)
+
+    missing = [
+        product_no for product_no in product_numbers if product_no not in found
+    ]
+    return found, missing, refresh
+
+
+def store(data_map, queried_product_numbers):
+    """寫入查詢結果，ERP 沒有回傳的料號記錄為查無資料"""
+    global _store_count
+
+    now = time.time()
+    ttl = _ttl()
+    negative_ttl = current_app.config.get("ERP_CACHE_NEGATIVE_TTL", 60)
+    refresh_ahead = _refresh_ahead()
+
+    entries = []
+    for product_no in queried_product_numbers:
+        if product_no is None:
+            continue
+
+        data = data_map.get(product_no)
+        if data is None:
+            # 查無資料的料號不預先更新，過期後由下一次讀取重新查詢
+            expires_at = now + negative_ttl
+            entries.append((product_no, None, expires_at, expires_at))
+        else:
+            entries.append(
+                (
+                    product_no,
+                    _encode(data),
+                    now + ttl,
+                    now + ttl * (1 - refresh_ahead),
+                )
+            )
+
+    connection = _connection()
+    with connection:
+        connection.executemany(
+            """
+            INSERT OR REPLACE INTO erp_cache (prod_no, data, expires_at, refresh_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            entries,
+        )
+
+    with _store_lock:
+        _store_count += 1
+        cleanup = _store_count % CLEANUP_INTERVAL == 0
+    if cleanup:
+        with connection:
+            connection.execute("DELETE FROM erp_cache WHERE expires_at <= ?", [now])
+
+
+def schedule_refresh(product_numbers, query):
+    """
+    於背景重新查詢即將過期的料號並寫回快取。
+    query(product_numbers) 回傳 ({PROD_NO: data}, 查詢失敗的料號)。
+    """
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                data_map, failed = query(product_numbers)
+                failed = set(failed)
+                store(
+                    data_map,
+                    [product_no for product_no in product_numbers if product_no not in failed],
+                )
+        except Exception as e:
+            app.logger.error(f"ERP cache refresh failed: {e}")
+
+    _refresh_executor.submit(run)
+
+
+def _connection():
+    """每個執行緒各自持有連線；fork 後的子行程重新連線"""
+    path = current_app.config["ERP_SHARED_CACHE_PATH"]
+    connection = getattr(_local, "connection", None)
+    if connection is not None and _local.pid == os.getpid() and _local.path == path:
+        return connection
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    connection = sqlite3.connect(path, timeout=1)
+    # WAL 模式下讀取不會被其他 worker 的寫入阻擋
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS erp_cache (
+            prod_no TEXT PRIMARY KEY,
+            data TEXT,
+            expires_at REAL NOT NULL,
+            refresh_at REAL NOT NULL
+        )
+        """
+    )
+    connection.commit()
+
+    _local.connection = connection
+    _local.pid = os.getpid()
+    _local.path = path
+    return connection
+
+
+def _ttl():
+    return current_app.config.get("ERP_SHARED_CACHE_TTL", DEFAULT_ERP_SHARED_CACHE_TTL)
+
+
+def _refresh_ahead():
+    return current_app.config.get(
+        "ERP_SHARED_CACHE_REFRESH_AHEAD", DEFAULT_ERP_SHARED_CACHE_REFRESH_AHEAD
+    )
+
+
+def _encode(data):
+    # 日期欄位（建檔日期）保留型別，讀回後與直接查詢 ERP 的結果一致
+    def encode_value(value):
+        if isinstance(value, datetime):
+            return {"__datetime__": value.isoformat()}
+        if isinstance(value, date):
+            return {"__date__": value.isoformat()}
+        return value
+
+    return json.dumps(
+        [{**field, "value": encode_value(field["value"])} for field in data],
+        ensure_ascii=False,
+    )
+
+
+def _decode(data):
+    if data is None:
+        return None
+
+    fields = json.loads(data)
+    for field in fields:
+        value = field["value"]
+        if isinstance(value, dict) and "__datetime__" in value:
+            field["value"] = datetime.fromisoformat(value["__datetime__"])
+        elif isinstance(value, dict) and "__date__" in value:
+            field["value"] = date.fromisoformat(value["__date__"])
+    return fields
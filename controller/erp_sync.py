@@ -0,0 +1,173 @@
+import re
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from controller.erp import _get_erp_pool, erp_row_values, parse_erp_date
+from models.erp import ErpProduct
+from models.shared import db
+
+# 同步時每批寫入的筆數
+SYNC_BATCH_SIZE = 1000
+
+_COLUMN_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# 只在建檔時寫入的欄位，既有料號的價格、狀態、停產日期異動不會更新，不能作為增量水位
+_CREATION_COLUMNS = {"KEYI_D"}
+
+
+class MssqlErpSource:
+    """
+    從 ERP PROD 資料表讀取同步資料。
+    change_column 為 ERP 端每次修改都會更新的異動時間欄位，增量同步只讀取此欄位不小於水位的資料；
+    未設定時無法判斷異動，只支援完整同步。
+    """
+
+    def __init__(self, pool, change_column=None, batch_size=SYNC_BATCH_SIZE):
+        if change_column is not None:
+            if not _COLUMN_PATTERN.match(change_column):
+                raise ValueError(f"Invalid ERP change column: {change_column}")
+            if change_column.upper() in _CREATION_COLUMNS:
+                raise ValueError(
+                    f"ERP change column {change_column} is a creation date and "
+                    "cannot be used for incremental sync"
+                )
+
+        self.pool = pool
+        self.change_column = change_column
+        self.batch_size = batch_size
+
+    @property
+    def supports_incremental(self):
+        return self.change_column is not None
+
+    def fetch(self, since=None):
+        changed_at = self.change_column or "NULL"
+        sql_query = f"""
+            SELECT PROD_NO, PROD_C, PROD_CT, DOLR_TI, KEYI_D, LEAD_TIME, FIZO_D, PROD_STAT,
+                {changed_at} AS CHANGED_AT
+            FROM PROD
+        """
+        parameters = ()
+        if since is not None:
+            if not self.supports_incremental:
+                raise ValueError("Incremental sync requires an ERP change column")
+            sql_query += f" WHERE {self.change_column} >= ?"
+            parameters = (since,)
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql_query, parameters)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield from rows
+            cursor.close()
+
+
+def sync_erp_products(source, full=False, batch_size=SYNC_BATCH_SIZE):
+    """
+    將 ERP 料號資料同步至 erp_product。
+    - 增量同步：只讀取 ERP 異動欄位不小於本地水位（source_updated_at 最大值）的資料
+    - 完整同步（full=True，或資料來源沒有異動欄位時）：讀取全部資料，並刪除 ERP 已不存在的料號
+    回傳同步統計。
+    """
+    # 沒有異動欄位時增量同步會漏掉既有料號的修改，一律完整同步
+    full = full or not source.supports_incremental
+    since = None
+    if not full:
+        since = db.session.query(func.max(ErpProduct.source_updated_at)).scalar()
+
+    stats = {
+        "mode": "full" if full else "incremental",
+        "since": since.isoformat() if since else None,
+        "fetched": 0,
+        "inserted": 0,
+        "updated": 0,
+        "deleted": 0,
+    }
+    seen = set()
+
+    batch = []
+    for row in source.fetch(since):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            __upsert_batch(batch, stats, seen)
+            batch = []
+    if batch:
+        __upsert_batch(batch, stats, seen)
+
+    if full:
+        stale = [
+            prod_no
+            for (prod_no,) in db.session.query(ErpProduct.prod_no)
+            if prod_no not in seen
+        ]
+        for start in range(0, len(stale), batch_size):
+            db.session.query(ErpProduct).filter(
+                ErpProduct.prod_no.in_(stale[start:start + batch_size])
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        stats["deleted"] = len(stale)
+
+    return stats
+
+
+def __upsert_batch(rows, stats, seen):
+    """以一次 IN 查詢取得既有資料，只寫入有變動的料號，每批一個交易"""
+    now = datetime.now()
+    values_by_prod_no = {row.PROD_NO: __row_values(row) for row in rows}
+    existing = {
+        product.prod_no: product
+        for product in db.session.query(ErpProduct).filter(
+            ErpProduct.prod_no.in_(list(values_by_prod_no))
+        )
+    }
+
+    for prod_no, values in values_by_prod_no.items():
+        product = existing.get(prod_no)
+        if product is None:
+            db.session.add(ErpProduct(prod_no=prod_no, synced_at=now, **values))
+            stats["inserted"] += 1
+        elif any(getattr(product, key) != value for key, value in values.items()):
+            for key, value in values.items():
+                setattr(product, key, value)
+            product.synced_at = now
+            stats["updated"] += 1
+
+    db.session.commit()
+    # 已寫入的物件不再需要，避免 session 隨同步筆數成長
+    db.session.expunge_all()
+
+    stats["fetched"] += len(rows)
+    seen.update(values_by_prod_no)
+
+
+def __row_values(row):
+    # 與 controller/erp.py 直接查詢 ERP 時使用相同的轉換，鏡像與直接查詢回傳相同格式
+    return {
+        **erp_row_values(row),
+        "source_updated_at": parse_erp_date(row.CHANGED_AT),
+    }
+
+
+@click.command("erp-sync")
+@click.option("--full", is_flag=True, help="完整同步並刪除 ERP 已不存在的料號")
+@with_appcontext
+def erp_sync_command(full):
+    """
+    同步 ERP 料號資料至 erp_product，可由 cron 定期執行。
+    未設定 ERP_SYNC_CHANGE_COLUMN 時每次皆為完整同步。
+    """
+    source = MssqlErpSource(
+        _get_erp_pool(),
+        change_column=current_app.config.get("ERP_SYNC_CHANGE_COLUMN") or None,
+    )
+    stats = sync_erp_products(source, full=full)
+    click.echo(
+        "ERP sync ({mode}): fetched {fetched}, inserted {inserted}, "
+        "updated {updated}, deleted {deleted}".format(**stats)
+    )
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+DEFAULT_EXPORT_JOB_WORKERS = 2
+DEFAULT_EXPORT_JOB_TTL = 3600
+# 執行中的工作超過此秒數沒有更新進度，視為 worker 已中斷
+DEFAULT_EXPORT_JOB_STALE = 300
+
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def submit(dedup_payload, filename, runner):
+    """
+    建立背景匯出工作，回傳 (status, deduplicated)。
+    相同 dedup_payload 的工作仍在排隊或執行中時，直接回傳既有工作。
+    runner(path, on_progress) 需將檔案寫入 path 並回傳寫入的資料筆數；
+    on_progress(rows_processed, **changes) 的 changes 會一併寫入工作狀態。
+
+    工作狀態與產出檔都存放在 EXPORT_PATH，同一台主機的所有 gunicorn worker 都能查詢與下載。
+    """
+    job_dir = _job_dir()
+    _cleanup_expired(job_dir)
+
+    key = hashlib.sha256(
+        json.dumps(dedup_payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    inflight_path = os.path.join(job_dir, f"inflight_{key}")
+
+    while True:
+        existing_id = _read_text(inflight_path)
+        if existing_id:
+            existing = read_status(existing_id)
+            if existing and existing["state"] in [JOB_QUEUED, JOB_RUNNING]:
+                return existing, True
+            # 既有工作已結束或中斷
+            _remove(inflight_path)
+
+        job_id = uuid.uuid4().hex
+        status = {
+            "jobId": job_id,
+            "state": JOB_QUEUED,
+            "rowsProcessed": 0,
+            "filename": filename,
+            "error": None,
+            "createdAt": _now(),
+            "updatedAt": _now(),
+        }
+        _write_status(job_dir, status)
+
+        # os.link 為原子操作，多個 worker 同時建立時只有一個會成功
+        marker_path = os.path.join(job_dir, f"{job_id}.inflight")
+        with open(marker_path, "w") as marker:
+            marker.write(job_id)
+        try:
+            os.link(marker_path, inflight_path)
+        except FileExistsError:
+            _remove(_status_path(job_dir, job_id))
+            continue
+        finally:
+            _remove(marker_path)
+        break
+
+    app = current_app._get_current_object()
+    _get_executor(app).submit(_run, app, job_dir, job_id, inflight_path, runner)
+
+    return status, False
+
+
+def read_status(job_id):
+    """讀取工作狀態，不存在時回傳 None"""
+    if not _JOB_ID_PATTERN.match(job_id or ""):
+        return None
+
+    job_dir = _job_dir()
+    status_path = _status_path(job_dir, job_id)
+    content = _read_text(status_path)
+    if not content:
+        return None
+
+    status = json.loads(content)
+    stale_seconds = current_app.config.get("EXPORT_JOB_STALE", DEFAULT_EXPORT_JOB_STALE)
+    if (
+        status["state"] in [JOB_QUEUED, JOB_RUNNING]
+        and time.time() - os.path.getmtime(status_path) > stale_seconds
+    ):
+        status["state"] = JOB_FAILED
+        status["error"] = "Export job was interrupted"
+
+    return status
+
+
+def artifact_path(job_id):
+    return os.path.join(_job_dir(), f"{job_id}.xlsx")
+
+
+def _run(app, job_dir, job_id, inflight_path, runner):
+    with app.app_context():
+        status = json.loads(_read_text(_status_path(job_dir, job_id)))
+        part_path = os.path.join(job_dir, f"{job_id}.xlsx.part")
+
+        def update(**changes):
+            status.update(changes, updatedAt=_now())
+            _write_status(job_dir, status)
+
+        def on_progress(rows_processed, **changes):
+            update(rowsProcessed=rows_processed, **changes)
+
+        try:
+            update(state=JOB_RUNNING)
+            rows_processed = runner(part_path, on_progress)
+
+            if rows_processed:
+                os.replace(part_path, os.path.join(job_dir, f"{job_id}.xlsx"))
+            else:
+                _remove(part_path)
+            update(state=JOB_DONE, rowsProcessed=rows_processed)
+        except Exception as e:
+            app.logger.error(traceback.format_exc())
+            _remove(part_path)
+            update(state=JOB_FAILED, error=str(e))
+        finally:
+            if _read_text(inflight_path) == job_id:
+                _remove(inflight_path)
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get(
+                    "EXPORT_JOB_WORKERS", DEFAULT_EXPORT_JOB_WORKERS
+                ),
+                thread_name_prefix="export-job",
+            )
+        return _executor
+
+
+def _job_dir():
+    job_dir = current_app.config.get("EXPORT_PATH", "./exports")
+    os.makedirs(job_dir, exist_ok=True)
+    return job_dir
+
+
+def _cleanup_expired(job_dir):
+    """刪除超過 EXPORT_JOB_TTL 的工作狀態與產出檔"""
+    ttl = current_app.config.get("EXPORT_JOB_TTL", DEFAULT_EXPORT_JOB_TTL)
+    expire_before = time.time() - ttl
+
+    for name in os.listdir(job_dir):
+        path = os.path.join(job_dir, name)
+        try:
+            if os.path.getmtime(path) < expire_before:
+                os.remove(path)
+        except OSError:
+            continue
+
+
+def _status_path(job_dir, job_id):
+    return os.path.join(job_dir, f"{job_id}.json")
+
+
+def _write_status(job_dir, status):
+    # 先寫暫存檔再 rename，讀取端不會讀到寫一半的內容
+    path = _status_path(job_dir, status["jobId"])
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as status_file:
+        json.dump(status, status_file)
+    os.replace(tmp_path, path)
+
+
+def _read_text(path):
+    try:
+        with open(path) as text_file:
+            return text_file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
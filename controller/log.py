@@ -2,9 +2,19 @@ from flask import current_app, jsonify, make_response, request
 from models.log import ActivityLog
 from models.user import User
 from models.shared import db
+from sqlalchemy import and_, or_, text
 from sqlalchemy.exc import SQLAlchemyError
+import base64
 import json
+import time
+from datetime import datetime
 from modules.exception import handle_exceptions
+from controller.search_count import COUNT_EXACT, COUNT_ESTIMATED
+from utils.log_payload import unpack
+
+DEFAULT_ACTIVITY_LOG_COUNT_TTL = 60
+
+_estimated_count = None  # (expires_at, count)
 
 
 @handle_exceptions
@@ -22,7 +32,7 @@ def user_logs(user_id):
             'id': log.id,
             'url': log.url,
             'userId': log.user_id,
-            'payload': log.payload,
+            'payload': unpack(log.payload),
             'createdAt': log.created_at.strftime('%Y-%m-%d %H:%M:%S')
         })
 
@@ -34,25 +44,95 @@ def read_multi():
     # Get the limit and offset values from the request
     limit = int(request.args.get('limit', 10))
     offset = int(request.args.get('page', 1)) - 1
+    # 帶 cursor 參數（可為空字串）時改用 keyset 分頁
+    cursor = request.args.get('cursor', None)
+    count_strategy = request.args.get('count', COUNT_ESTIMATED)
+    if count_strategy not in [COUNT_EXACT, COUNT_ESTIMATED]:
+        return make_response(jsonify({"code": 400, "msg": f"count must be one of {COUNT_EXACT}, {COUNT_ESTIMATED}"}), 400)
+
+    seek = None
+    if cursor:
+        try:
+            seek = __decode_cursor(cursor)
+        except ValueError as e:
+            return make_response(jsonify({"code": 400, "msg": str(e)}), 400)
 
-    # Query the total count of ActivityLog
-    total_count = ActivityLog.query.count()
+    # 總數：預設使用資料庫統計的估計值，不掃描整張表
+    total_count, count_status = __count_logs(count_strategy)
 
     # Query the ActivityLog table with limit, offset, order_by and join with User
-    logs = db.session.query(ActivityLog.url, ActivityLog.method, ActivityLog.payload, User.username, ActivityLog.created_at)\
+    query = db.session.query(ActivityLog.id, ActivityLog.url, ActivityLog.method, ActivityLog.payload, User.username, ActivityLog.created_at)\
         .outerjoin(User, ActivityLog.user_id == User.id)\
-        .order_by(ActivityLog.created_at.desc())\
-        .offset(offset*limit)\
-        .limit(limit)\
-        .all()
+        .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+
+    if cursor is None:
+        logs = query.offset(offset*limit).limit(limit).all()
+    else:
+        if seek:
+            created_at, log_id = seek
+            query = query.filter(or_(
+                ActivityLog.created_at < created_at,
+                and_(ActivityLog.created_at == created_at, ActivityLog.id < log_id)))
+        # 多取一筆判斷是否還有下一頁
+        logs = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if cursor is not None and len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = __encode_cursor(logs[-1].created_at, logs[-1].id)
 
     response_data = [{
+        'id': log.id,
         'url': log.url,
         'method': log.method,
-        'payload': (json.dumps(log.payload)[:47] + '...' if log.payload and len(json.dumps(log.payload)) > 50
-                    else (json.dumps(log.payload) if log.payload is not None else '')),
+        'payload': __preview_payload(log.payload),
         'userName': log.username,
         'createdAt': log.created_at.strftime('%Y-%m-%d %H:%M:%S')
     } for log in logs]
 
-    return make_response(jsonify({"code": 200, "msg": "Logs found", "data": response_data, "totalCount": total_count}), 200)
+    result = {"code": 200, "msg": "Logs found", "data": response_data,
+              "totalCount": total_count, "countStatus": count_status}
+    if cursor is not None:
+        result["nextCursor"] = next_cursor
+
+    return make_response(jsonify(result), 200)
+
+
+def __count_logs(count_strategy):
+    """回傳 (總數, count_status)；估計值取自 MySQL 維護的表統計並於行程內快取"""
+    if count_strategy == COUNT_EXACT or db.engine.dialect.name != 'mysql':
+        return ActivityLog.query.count(), COUNT_EXACT
+
+    global _estimated_count
+    now = time.monotonic()
+    if _estimated_count is None or _estimated_count[0] <= now:
+        count = db.session.execute(text("""
+            SELECT TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'activity_log'
+        """)).scalar() or 0
+        ttl = current_app.config.get('ACTIVITY_LOG_COUNT_TTL', DEFAULT_ACTIVITY_LOG_COUNT_TTL)
+        _estimated_count = (now + ttl, int(count))
+
+    return _estimated_count[1], COUNT_ESTIMATED
+
+
+def __encode_cursor(created_at, log_id):
+    payload = json.dumps({"c": created_at.isoformat(), "id": log_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def __decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def __preview_payload(stored):
+    if stored is None:
+        return ''
+
+    payload = json.dumps(unpack(stored))
+    return payload[:47] + '...' if len(payload) > 50 else payload
@@ -0,0 +1,154 @@
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from models.log import ActivityLog
+from models.shared import db
+
+DEFAULT_ACTIVITY_LOG_RETENTION_MONTHS = 12
+DEFAULT_ACTIVITY_LOG_PARTITIONS_AHEAD = 3
+# 刪除過期資料時每批筆數，避免單一交易鎖住大量資料
+DELETE_BATCH_SIZE = 5000
+
+FUTURE_PARTITION = "p_future"
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def plan_partitions(partitions, now, retention_months, months_ahead):
+    """
+    依現有分區（{名稱: 上界 datetime 或 None（MAXVALUE）}）決定要新增與刪除的分區。
+    回傳 (to_add, to_drop)：
+    - to_add: [(名稱, 上界)]，從本月起 months_ahead 個月內尚未建立的月份分區
+    - to_drop: 上界不晚於保留起點（本月往前 retention_months 個月）的分區
+    """
+    current_month = month_start(now)
+    cutoff = add_months(current_month, -retention_months)
+
+    to_drop = sorted(
+        name
+        for name, upper in partitions.items()
+        if upper is not None and upper <= cutoff
+    )
+
+    bounded = [upper for upper in partitions.values() if upper is not None]
+    covered_until = max(bounded) if bounded else None
+    to_add = []
+    month = current_month
+    for _ in range(months_ahead):
+        upper = add_months(month, 1)
+        if covered_until is None or upper > covered_until:
+            to_add.append((f"p{month:%Y%m}", upper))
+        month = upper
+
+    return to_add, to_drop
+
+
+def maintain_activity_log(now=None, retention_months=None, months_ahead=None):
+    """
+    維護 activity_log：
+    - MySQL 分區表：預先建立未來月份分區，並直接 DROP 超過保留期的分區
+    - 其餘分區內（或未分區時）早於保留起點的資料以分批 DELETE 清除
+    回傳統計。
+    """
+    now = now or datetime.now()
+    config = current_app.config
+    if retention_months is None:
+        retention_months = config.get(
+            "ACTIVITY_LOG_RETENTION_MONTHS", DEFAULT_ACTIVITY_LOG_RETENTION_MONTHS
+        )
+    if months_ahead is None:
+        months_ahead = config.get(
+            "ACTIVITY_LOG_PARTITIONS_AHEAD", DEFAULT_ACTIVITY_LOG_PARTITIONS_AHEAD
+        )
+
+    stats = {"added": [], "dropped": [], "deleted": 0}
+    partitions = __read_partitions()
+    if partitions:
+        to_add, to_drop = plan_partitions(partitions, now, retention_months, months_ahead)
+        if to_add and FUTURE_PARTITION in partitions:
+            definitions = [
+                f"PARTITION {name} VALUES LESS THAN ('{upper:%Y-%m-%d}')"
+                for name, upper in to_add
+            ]
+            definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+            db.session.execute(
+                text(
+                    f"ALTER TABLE activity_log REORGANIZE PARTITION {FUTURE_PARTITION} "
+                    f"INTO ({', '.join(definitions)})"
+                )
+            )
+            stats["added"] = [name for name, _ in to_add]
+        if to_drop:
+            db.session.execute(
+                text(f"ALTER TABLE activity_log DROP PARTITION {', '.join(to_drop)}")
+            )
+            stats["dropped"] = to_drop
+
+    cutoff = add_months(month_start(now), -retention_months)
+    while True:
+        ids = [
+            log_id
+            for (log_id,) in db.session.query(ActivityLog.id)
+            .filter(ActivityLog.created_at < cutoff)
+            .limit(DELETE_BATCH_SIZE)
+        ]
+        if not ids:
+            break
+        db.session.query(ActivityLog).filter(ActivityLog.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        stats["deleted"] += len(ids)
+
+    return stats
+
+
+def __read_partitions():
+    """讀取 activity_log 的分區與上界，非 MySQL 或未分區時回傳空 dict"""
+    if db.engine.dialect.name != "mysql":
+        return {}
+
+    rows = db.session.execute(
+        text(
+            """
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'activity_log'
+                AND PARTITION_NAME IS NOT NULL
+            """
+        )
+    ).all()
+
+    partitions = {}
+    for name, description in rows:
+        if description == "MAXVALUE":
+            partitions[name] = None
+        else:
+            partitions[name] = datetime.fromisoformat(description.strip("'"))
+    return partitions
+
+
+@click.command("log-maintain")
+@with_appcontext
+def log_maintain_command():
+    """建立未來月份的 activity_log 分區並清除超過保留期的操作紀錄，可由 cron 每日執行"""
+    stats = maintain_activity_log()
+    click.echo(
+        "Activity log maintenance: added {added}, dropped {dropped}, "
+        "deleted {deleted} rows".format(
+            added=", ".join(stats["added"]) or "none",
+            dropped=", ".join(stats["dropped"]) or "none",
+            deleted=stats["deleted"],
+        )
+    )
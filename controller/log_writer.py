@@ -0,0 +1,172 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import insert
+
+from models.log import ActivityLog
+from models.shared import db
+
+DEFAULT_ACTIVITY_LOG_BATCH_SIZE = 100
+DEFAULT_ACTIVITY_LOG_FLUSH_INTERVAL = 500  # 毫秒
+DEFAULT_ACTIVITY_LOG_QUEUE_SIZE = 10000
+DEFAULT_ACTIVITY_LOG_ENQUEUE_TIMEOUT = 10  # 毫秒
+
+_STOP = object()
+
+_writer = None
+_lock = threading.Lock()
+
+
+class ActivityLogWriter:
+    """
+    於背景執行緒批次寫入 ActivityLog。
+    - 每累積 batch_size 筆或距上次寫入 flush_interval 毫秒，以一次多筆 INSERT 寫入
+    - 佇列已滿時最多等待 enqueue_timeout 毫秒，仍無空間則捨棄並計數
+    """
+
+    def __init__(self, app, batch_size, flush_interval, queue_size, enqueue_timeout):
+        self.app = app
+        self.pid = os.getpid()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval / 1000
+        self.enqueue_timeout = enqueue_timeout / 1000
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stats = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="activity-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def enqueue(self, record):
+        try:
+            self._queue.put(record, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def close(self, timeout=5):
+        """寫入佇列中剩餘的紀錄後結束背景執行緒"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {**self._stats, "queued": self._queue.qsize()}
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                self._write(batch)
+                return
+
+            if record is not None:
+                batch.append(record)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def _write(self, batch):
+        if not batch:
+            return
+
+        try:
+            with self.app.app_context():
+                db.session.execute(insert(ActivityLog), batch)
+                db.session.commit()
+            self._count("written", len(batch))
+            self._count("batches")
+        except Exception as e:
+            self._count("failed", len(batch))
+            self.app.logger.error(f"Failed to write {len(batch)} activity logs: {e}")
+            with self.app.app_context():
+                db.session.rollback()
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+
+def enqueue(record):
+    """將一筆 ActivityLog 欄位資料交由背景執行緒寫入，佇列已滿而捨棄時回傳 False"""
+    return _get_writer().enqueue(record)
+
+
+def stats():
+    """目前行程的寫入統計，尚未寫入過紀錄時為 None"""
+    writer = _writer
+    if writer is None or writer.pid != os.getpid():
+        return None
+    return writer.stats()
+
+
+def shutdown(timeout=5):
+    """寫入尚未寫入的紀錄，於 worker 結束時呼叫"""
+    global _writer
+
+    with _lock:
+        writer = _writer
+        if writer is None or writer.pid != os.getpid():
+            return
+        _writer = None
+    writer.close(timeout)
+
+
+def _get_writer():
+    """每個行程各自啟動背景執行緒（fork 後的子行程不會繼承執行緒）"""
+    global _writer
+
+    app = current_app._get_current_object()
+    writer = _writer
+    if writer is not None and writer.pid == os.getpid() and writer.app is app:
+        return writer
+
+    with _lock:
+        writer = _writer
+        if writer is None or writer.pid != os.getpid() or writer.app is not app:
+            if writer is not None and writer.pid == os.getpid():
+                writer.close()
+            config = app.config
+            _writer = ActivityLogWriter(
+                app,
+                batch_size=config.get(
+                    "ACTIVITY_LOG_BATCH_SIZE", DEFAULT_ACTIVITY_LOG_BATCH_SIZE
+                ),
+                flush_interval=config.get(
+                    "ACTIVITY_LOG_FLUSH_INTERVAL", DEFAULT_ACTIVITY_LOG_FLUSH_INTERVAL
+                ),
+                queue_size=config.get(
+                    "ACTIVITY_LOG_QUEUE_SIZE", DEFAULT_ACTIVITY_LOG_QUEUE_SIZE
+                ),
+                enqueue_timeout=config.get(
+                    "ACTIVITY_LOG_ENQUEUE_TIMEOUT", DEFAULT_ACTIVITY_LOG_ENQUEUE_TIMEOUT
+                ),
+            )
+        return _writer
+
+
+atexit.register(shutdown)
@@ -1,25 +1,61 @@
 import os
 from flask import current_app, jsonify, make_response, request
-from controller.erp import read as read_erp
+from controller import export_job, uniqueness
+from controller.erp import merge_status as merge_erp_status, read as read_erp
+from controller.search_count import (
+    COUNT_EXACT,
+    COUNT_STRATEGIES,
+    count_items,
+    invalidate_series,
+    make_cache_key,
+)
+from controller.search_planner import (
+    compile_search,
+    decode_cursor,
+    encode_cursor,
+    seek_condition,
+    sort_column,
+)
 from models.series import Series, Field, Item, ItemAttribute
 from models.user import User
 from models.archive import Archive
 from models.shared import db
 from models.mapping_table import data_type_map
 from models.image import Image
+from utils.thumbnail import DEFAULT_THUMBNAIL_WORKERS, ensure_thumbnails, remove_thumbnails
+from utils.typed_value import parse_boolean, parse_date, typed_values
 from sqlalchemy.exc import SQLAlchemyError
 from utils.permissions import check_field_permission, has_permission
-from sqlalchemy import and_, text
-from datetime import datetime
+from utils.spreadsheet import detect_format, iter_rows
+from sqlalchemy import and_, case, func, literal, select, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import base64
 from flask_jwt_extended import get_jwt_identity, get_jwt
 from modules.exception import handle_exceptions
 from PIL import Image as PILImage
 import io
+import itertools
+import shutil
+import tempfile
 import xlsxwriter
-from io import BytesIO
 from flask import send_file
 
+# Excel 匯出檔案的 MIME type
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# 一次新增達此筆數時改用批次新增
+DEFAULT_PRODUCT_BULK_THRESHOLD = 100
+# 批次寫入屬性時每批的筆數
+BULK_CHUNK_SIZE = 1000
+# 匯入時每批驗證與寫入的列數、錯誤報告最多列出的筆數
+DEFAULT_PRODUCT_IMPORT_CHUNK_SIZE = 1000
+DEFAULT_PRODUCT_IMPORT_MAX_ERRORS = 1000
+# 複製產品時平行複製圖片檔案的執行緒數
+DEFAULT_PRODUCT_COPY_IMAGE_WORKERS = 8
+
 
 @handle_exceptions
 def read(product_id):
@@ -79,7 +115,9 @@ def read(product_id):
                     erp_product_nos.add(erp_product_no)
 
     # Fetch ERP data in bulk
-    erp_data_map = read_erp(erp_product_nos, item.series_id)
+    erp_data_map, erp_status = read_erp(
+        erp_product_nos, item.series_id, with_status=True
+    )
 
     # Extract ERP data
     erp_data = []
@@ -95,6 +133,7 @@ def read(product_id):
         "erp": erp_data,
         "hasArchive": bool(is_archived),
         "isDeleted": bool(item.is_deleted),
+        "erpStatus": erp_status,
     }
     response = make_response(
         jsonify({"code": 200, "msg": "Success", "data": result}), 200
@@ -107,19 +146,28 @@ def read(product_id):
 
 
 @handle_exceptions
-def create(data):
-    items = []
-
-    for item_data in data:
-        payload = __normalize_payload_from_request(item_data)
-        item, error_response = __create_item(payload, mode="create")
+def create(data, bulk=False):
+    bulk_threshold = current_app.config.get(
+        "PRODUCT_BULK_THRESHOLD", DEFAULT_PRODUCT_BULK_THRESHOLD
+    )
+    if bulk or len(data) >= bulk_threshold:
+        items, error_response = __bulk_create_items(data)
         if error_response:
             return error_response
-        items.append(item)
-
+    else:
+        items = []
+        for item_data in data:
+            payload = __normalize_payload_from_request(item_data)
+            item, error_response = __create_item(payload)
+            if error_response:
+                return error_response
+            items.append(item)
+
+    # commit 後物件會過期，先取出 id 避免逐筆重新查詢
+    result = [{"id": item.id, "seriesId": item.series_id} for item in items]
     db.session.commit()
+    invalidate_series(*{item["seriesId"] for item in result})
 
-    result = [{"id": item.id, "seriesId": item.series_id} for item in items]
     return make_response(jsonify({"code": 201, "msg": "Success", "data": result}), 201)
 
 
@@ -131,10 +179,8 @@ def create_from_items(data):
             jsonify({"code": 400, "msg": "itemIds must be a list"}), 400
         )
 
-    new_items = []
-
-    items_by_id = db.session.query(Item).filter(Item.id.in_(item_ids)).all()
-    found_ids = {item.id for item in items_by_id}
+    source_items = db.session.query(Item).filter(Item.id.in_(item_ids)).all()
+    found_ids = {item.id for item in source_items}
     missing_ids = [item_id for item_id in item_ids if item_id not in found_ids]
     if missing_ids:
         return make_response(
@@ -142,25 +188,109 @@ def create_from_items(data):
             404,
         )
 
-    for item in items_by_id:
-        payload = __normalize_payload_from_item(item)
-        item_created, error_response = __create_item(payload, mode="copy")
-        if error_response:
-            return error_response
-        new_items.append(item_created)
+    new_items, error_response = __copy_items(source_items)
+    if error_response:
+        return error_response
 
-    db.session.commit()
+    # commit 後物件會過期，先取出 id 避免逐筆重新查詢
     result = [{"id": item.id, "seriesId": item.series_id} for item in new_items]
+    db.session.commit()
+    invalidate_series(*{item["seriesId"] for item in result})
     return make_response(jsonify({"code": 201, "msg": "Success", "data": result}), 201)
 
 
+@handle_exceptions
+def import_products(series_id, file):
+    """
+    從 CSV / XLSX 匯入產品，第一列為欄位名稱（與 export_excel 的表頭相同，無法對應的欄位忽略）。
+    逐列串流解析，每 PRODUCT_IMPORT_CHUNK_SIZE 列驗證後於各自的交易寫入；
+    驗證失敗的列不寫入並列於錯誤報告，其餘列照常匯入。
+    """
+    if file is None or not file.filename:
+        return make_response(jsonify({"code": 400, "msg": "Missing file"}), 400)
+
+    file_format = detect_format(file.filename)
+    if file_format is None:
+        return make_response(
+            jsonify({"code": 400, "msg": "Only .csv and .xlsx files are supported"}), 400
+        )
+
+    try:
+        series_id = int(series_id)
+    except (TypeError, ValueError):
+        return make_response(jsonify({"code": 400, "msg": "Invalid seriesId"}), 400)
+
+    existing_series_ids, fields_by_series = __load_series_fields({series_id})
+    if series_id not in existing_series_ids:
+        return make_response(jsonify({"code": 404, "msg": "Series not found"}), 404)
+    # 欄位只讀取，脫離 session 後不會在每批 commit 時過期而重新查詢
+    for field in fields_by_series[series_id]:
+        db.session.expunge(field)
+
+    rows = iter_rows(file.stream, file_format)
+    header = next(rows, None)
+    if not header:
+        return make_response(jsonify({"code": 400, "msg": "Empty file"}), 400)
+
+    # 圖片無法由檔案匯入，不對應圖片欄位；ERP 欄位與匯出的 ERP 資料欄同名，資料來自 ERP，也不匯入
+    fields_by_name = {
+        field.name: field
+        for field in fields_by_series[series_id]
+        if field.data_type.lower() != "picture" and not field.is_erp
+    }
+    columns = []
+    ignored_columns = []
+    for column_index, name in enumerate(header):
+        name = str(name).strip() if name is not None else ""
+        if name in fields_by_name:
+            columns.append((column_index, fields_by_name[name]))
+        elif name:
+            ignored_columns.append(name)
+
+    config = current_app.config
+    chunk_size = config.get("PRODUCT_IMPORT_CHUNK_SIZE", DEFAULT_PRODUCT_IMPORT_CHUNK_SIZE)
+    report = {
+        "imported": 0,
+        "failed": 0,
+        "errors": [],
+        "ignoredColumns": ignored_columns,
+        "maxErrors": config.get("PRODUCT_IMPORT_MAX_ERRORS", DEFAULT_PRODUCT_IMPORT_MAX_ERRORS),
+    }
+    key_fields = uniqueness.resolve_key_fields(fields_by_series=fields_by_series)
+    seen = {}
+
+    # 列號與試算表一致，表頭為第 1 列
+    numbered_rows = enumerate(rows, start=2)
+    while True:
+        chunk = list(itertools.islice(numbered_rows, chunk_size))
+        if not chunk:
+            break
+        __import_chunk(
+            chunk, series_id, columns, fields_by_series, key_fields, seen, report
+        )
+
+    if report["imported"]:
+        invalidate_series(series_id)
+
+    report.pop("maxErrors")
+    return make_response(
+        jsonify({"code": 200, "msg": "Import finished", "data": report}), 200
+    )
+
+
 @handle_exceptions
 def read_multi(data):
     try:
-        data, total_count, _ = __get_series_data(data, for_export=False)
+        data, total_count, _, meta = __get_series_data(data)
         return make_response(
             jsonify(
-                {"code": 200, "msg": "Success", "data": data, "totalCount": total_count}
+                {
+                    "code": 200,
+                    "msg": "Success",
+                    "data": data,
+                    "totalCount": total_count,
+                    **meta,
+                }
             ),
             200,
         )
@@ -171,205 +301,274 @@ def read_multi(data):
 @handle_exceptions
 def export_excel(data):
     try:
-        rows, _, fields = __get_series_data(data, for_export=True)
+        query = __parse_search_request(data, for_export=True)
+        erp_statuses = []
+        chunks = __iter_export_rows(
+            query, current_app.config.get("EXPORT_CHUNK_SIZE", 500), erp_statuses
+        )
 
-        if not rows:
-            return make_response(
-                jsonify({"code": 204, "msg": "No data to export"}), 200
-            )
+        try:
+            # 以第一批非空資料判斷是否有資料可匯出
+            first_rows = next((rows for rows in chunks if rows), None)
+            if not first_rows:
+                return make_response(
+                    jsonify({"code": 204, "msg": "No data to export"}), 200
+                )
 
-        # 取得欄位名稱（以第一筆 attributes 為基準）
-        field_names = [attr["fieldName"] for attr in rows[0]["attributes"]]
-        
-        # 取得 ERP 欄位名稱（如果有的話）
-        erp_field_names = []
-        if rows[0].get("erp"):
-            erp_field_names = [erp_field["key"] for erp_field in rows[0]["erp"]]
-        
-        # 合併所有欄位名稱
-        all_field_names = field_names + erp_field_names
+            # 寫入暫存檔，記憶體用量不隨匯出筆數增加
+            fd, path = tempfile.mkstemp(suffix=".xlsx")
+            os.close(fd)
+            try:
+                __write_export_workbook(
+                    path, itertools.chain([first_rows], chunks), query["fields"]
+                )
+            except Exception:
+                os.remove(path)
+                raise
+        finally:
+            chunks.close()
+
+        response = send_file(
+            path,
+            mimetype=XLSX_MIMETYPE,
+            as_attachment=True,
+            download_name=__export_filename(),
+        )
+        # 檔案已串流輸出，ERP 查詢失敗以標頭告知
+        response.headers["X-ERP-Status"] = merge_erp_status(erp_statuses)
 
-        # 建立 Excel 檔案在記憶體中
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
-        worksheet = workbook.add_worksheet("Products")
+        # 串流完畢後刪除暫存檔
+        @response.call_on_close
+        def remove_export_file():
+            if os.path.exists(path):
+                os.remove(path)
 
-        # 凍結前面五個欄位
-        worksheet.freeze_panes(1, 5)  # 從第1列（標題列之後）和第5欄開始凍結
+        return response
 
-        # 設定欄位寬度和列高度，特別是圖片欄位
-        default_row_height = 20
-        image_row_height = 80  # 圖片列的高度
-        has_image_cols = []
-        
-        # 檢查哪些欄位是圖片類型
-        for col_idx, attr in enumerate(rows[0]["attributes"]):
-            field_id = int(attr["fieldId"])
-            if field_id in fields and fields[field_id].data_type == "picture":
-                has_image_cols.append(col_idx)
-                worksheet.set_column(col_idx, col_idx, 15)  # 設定圖片欄位寬度
-
-        # 寫入表頭
-        for col, name in enumerate(all_field_names):
-            worksheet.write(0, col, name)
-
-        # 寫入每列資料
-        for row_idx, row in enumerate(rows, start=1):
-            # 如果這一行有圖片，設定行高
-            has_image_in_row = False
-            
-            col_idx = 0
-            
-            # 寫入一般欄位資料
-            attr_list = row.get("attributes", [])
-            for attr_idx, attr in enumerate(attr_list):
-                value = attr.get("value", "")
-                data_type = attr.get("dataType", "")
-                
-                if data_type == "picture" and value:
-                    # 處理圖片欄位
-                    has_image_in_row = True
-                    try:
-                        # 從 value 中提取圖片 ID（去掉 /image/ 前綴）
-                        if value.startswith("/image/"):
-                            image_id = value.replace("/image/", "")
-                            
-                            # 從資料庫獲取圖片路徑
-                            image_record = db.session.get(Image, image_id)
-                            if image_record and os.path.exists(image_record.path):
-                                # 插入圖片到 Excel
-                                worksheet.insert_image(row_idx, col_idx, image_record.path, {
-                                    'x_scale': 0.3,  # 縮放比例
-                                    'y_scale': 0.3,
-                                    'x_offset': 2,   # 偏移
-                                    'y_offset': 2
-                                })
-                            else:
-                                worksheet.write(row_idx, col_idx, "圖片不存在")
-                        else:
-                            worksheet.write(row_idx, col_idx, value)
-                    except Exception as e:
-                        # 如果圖片處理失敗，寫入錯誤訊息
-                        worksheet.write(row_idx, col_idx, f"圖片載入失敗: {str(e)}")
-                else:
-                    # 一般欄位
-                    worksheet.write(row_idx, col_idx, value)
-                col_idx += 1
-            
-            # 設定行高
-            if has_image_in_row:
-                worksheet.set_row(row_idx, image_row_height)
-            else:
-                worksheet.set_row(row_idx, default_row_height)
-            
-            # 寫入 ERP 欄位資料
-            erp_list = row.get("erp", [])
-            for erp_field in erp_list:
-                value = erp_field.get("value", "")
-                worksheet.write(row_idx, col_idx, value)
-                col_idx += 1
+    except ValueError as e:
+        return make_response(jsonify({"code": 400, "msg": str(e)}), 400)
 
-        workbook.close()
-        output.seek(0)
 
-        # 使用 UTC+8 時間生成檔名
-        from datetime import datetime, timezone, timedelta
-        utc_plus_8 = timezone(timedelta(hours=8))
-        current_time = datetime.now(utc_plus_8)
-        timestamp = current_time.strftime("%Y%m%d_%H%M%S")
-        filename = f"products_export_{timestamp}.xlsx"
+@handle_exceptions
+def create_export_job(data):
+    try:
+        query = __parse_search_request(data, for_export=True)
+    except ValueError as e:
+        return make_response(jsonify({"code": 400, "msg": str(e)}), 400)
 
-        return send_file(
-            output,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            as_attachment=True,
-            download_name=filename,
+    # 背景執行緒沒有 request，保留查詢參數與權限供執行時使用
+    args = {"sort": request.args.get("sort")} if request.args.get("sort") else {}
+    permissions = query["permissions"]
+    chunk_size = current_app.config.get("EXPORT_CHUNK_SIZE", 500)
+
+    def run_export(path, on_progress):
+        job_query = __parse_search_request(
+            data, for_export=True, args=args, permissions=permissions
         )
+        erp_statuses = []
+        chunks = __iter_export_rows(job_query, chunk_size, erp_statuses)
 
-    except ValueError as e:
-        return make_response(jsonify({"code": 400, "msg": str(e)}), 400)
+        def report_progress(rows_processed):
+            on_progress(rows_processed, erpStatus=merge_erp_status(erp_statuses))
+
+        try:
+            return __write_export_workbook(
+                path, chunks, job_query["fields"], report_progress
+            )
+        finally:
+            chunks.close()
+
+    # 條件與權限相同的匯出共用同一個工作
+    dedup_payload = {
+        "query": make_cache_key(
+            query["series_id"],
+            query["filters"],
+            query["is_deleted"],
+            query["is_archived"],
+        ),
+        "sort": args.get("sort"),
+        "permissions": permissions,
+    }
+    status, _ = export_job.submit(dedup_payload, __export_filename(), run_export)
+
+    return make_response(
+        jsonify({"code": 202, "msg": "Accepted", "data": __export_job_data(status)}),
+        202,
+    )
+
+
+@handle_exceptions
+def read_export_job(job_id):
+    status = export_job.read_status(job_id)
+    if not status:
+        return make_response(jsonify({"code": 404, "msg": "Export job not found"}), 404)
+
+    return make_response(
+        jsonify({"code": 200, "msg": "Success", "data": __export_job_data(status)}),
+        200,
+    )
+
+
+@handle_exceptions
+def download_export_job(job_id):
+    status = export_job.read_status(job_id)
+    if not status:
+        return make_response(jsonify({"code": 404, "msg": "Export job not found"}), 404)
+
+    if status["state"] != export_job.JOB_DONE:
+        return make_response(
+            jsonify({"code": 409, "msg": f"Export job is {status['state']}"}), 409
+        )
+
+    path = export_job.artifact_path(job_id)
+    if not status["rowsProcessed"] or not os.path.exists(path):
+        return make_response(jsonify({"code": 204, "msg": "No data to export"}), 200)
+
+    return send_file(
+        os.path.abspath(path),
+        mimetype=XLSX_MIMETYPE,
+        as_attachment=True,
+        download_name=status["filename"],
+    )
 
 
 @handle_exceptions
 def update_multi(data):
+    """
+    批次更新 item 屬性。
+    item、欄位與既有屬性各以一次 IN 查詢預先載入並在記憶體中驗證，
+    重複檢查整批一次查詢，屬性以 upsert 批次寫入（不存在的屬性會新增）。
+    """
     # 檢查輸入資料的完整性
     if not data:
         return make_response(jsonify({"code": 400, "msg": "Empty data"}), 400)
 
-    # 遍歷每個輸入項目
+    # 同一 item / 欄位重複出現時以最後一筆為準
+    values_by_item = {}
+    is_deleted_by_item = {}
     for item_data in data:
         item_id = item_data.get("itemId")
-        is_deleted = item_data.get("isDeleted")
-        attributes = item_data.get("attributes", [])
-
-        # 檢查輸入項目的完整性
         if not item_id:
             return make_response(jsonify({"code": 400, "msg": "Incomplete data"}), 400)
 
-        # 查詢對應的 Item 記錄
-        item = db.session.get(Item, item_id)
-
-        # 檢查 Item 是否存在
-        if not item:
-            return make_response(jsonify({"code": 404, "msg": "Item not found"}), 404)
-
-        if is_deleted in [0, 1]:
-            item.is_deleted = is_deleted
-
-        # 檢查供應商料號和DST料號是否已經存在（排除當前項目）
-        duplicate_fields = __check_duplicate_required_fields(
-            item.series_id, attributes, exclude_item_id=item_id
-        )
-        if duplicate_fields:
-            return make_response(
-                jsonify({"code": 400, "msg": f"Duplicate values found: {duplicate_fields}"}),
-                400,
-            )
+        values = values_by_item.setdefault(item_id, {})
+        if item_data.get("isDeleted") in [0, 1]:
+            is_deleted_by_item[item_id] = item_data["isDeleted"]
 
-        # 遍歷每個屬性
-        for attribute in attributes:
+        for attribute in item_data.get("attributes", []):
             field_id = attribute.get("fieldId")
-            value = attribute.get("value")
-
-            # 檢查屬性的完整性
             if not field_id:
                 return make_response(
                     jsonify({"code": 400, "msg": "Incomplete attribute data"}), 400
                 )
+            value = attribute.get("value")
+            values[field_id] = (1 if value else 0) if isinstance(value, bool) else value
 
-            # 查詢對應的 Field 記錄
-            field = db.session.get(Field, field_id)
+    items = {
+        item.id: item
+        for item in db.session.query(Item).filter(Item.id.in_(list(values_by_item)))
+    }
+    if len(items) != len(values_by_item):
+        return make_response(jsonify({"code": 404, "msg": "Item not found"}), 404)
+
+    field_ids = {field_id for values in values_by_item.values() for field_id in values}
+    fields = {}
+    if field_ids:
+        fields = {
+            field.id: field
+            for field in db.session.query(Field).filter(Field.id.in_(list(field_ids)))
+        }
+
+    for item_id, values in values_by_item.items():
+        for field_id, value in values.items():
+            field = fields.get(field_id)
             if not field:
                 return make_response(
                     jsonify({"code": 404, "msg": f"field_id:{field_id} not found"}), 404
                 )
+            # 不存在的屬性會被新增，欄位必須屬於 item 的系列
+            if field.series_id != items[item_id].series_id:
+                return make_response(
+                    jsonify(
+                        {
+                            "code": 400,
+                            "msg": f"field_id:{field_id} does not belong to series of item {item_id}",
+                        }
+                    ),
+                    400,
+                )
 
             # Check if the value is of the correct data type
             type_err = __check_field_type(field, value)
             if len(type_err) != 0:
                 return make_response(jsonify({"code": 400, "msg": type_err}), 400)
 
-            item_attribute = (
-                db.session.query(ItemAttribute)
-                .filter_by(item_id=item_id, field_id=field_id)
-                .first()
-            )
+    # 檢查供應商料號和DST料號是否已經存在（排除當前項目）
+    series_by_item = {item_id: item.series_id for item_id, item in items.items()}
+    duplicates = uniqueness.find_duplicates(
+        [
+            (item_id, series_by_item[item_id], values, item_id)
+            for item_id, values in values_by_item.items()
+        ],
+        uniqueness.resolve_key_fields(set(series_by_item.values())),
+    )
+    if duplicates:
+        duplicate_fields = next(iter(duplicates.values()))
+        return make_response(
+            jsonify({"code": 400, "msg": f"Duplicate values found: {duplicate_fields}"}),
+            400,
+        )
 
-            if isinstance(value, bool):
-                value = 1 if value else 0
+    current_values = {}
+    if field_ids:
+        current_values = {
+            (item_id, field_id): value
+            for item_id, field_id, value in db.session.query(
+                ItemAttribute.item_id, ItemAttribute.field_id, ItemAttribute.value
+            ).filter(
+                ItemAttribute.item_id.in_(list(values_by_item)),
+                ItemAttribute.field_id.in_(list(field_ids)),
+            )
+        }
+    # 儲存圖片時可能 commit 使物件過期，先取出欄位型別
+    data_types = {field_id: field.data_type for field_id, field in fields.items()}
+
+    for is_deleted in [0, 1]:
+        deleted_ids = [
+            item_id for item_id, value in is_deleted_by_item.items() if value == is_deleted
+        ]
+        if deleted_ids:
+            db.session.query(Item).filter(Item.id.in_(deleted_ids)).update(
+                {Item.is_deleted: is_deleted}, synchronize_session=False
+            )
 
-            if field.data_type.lower() == "picture":
+    attribute_rows = []
+    for item_id, values in values_by_item.items():
+        for field_id, value in values.items():
+            data_type = data_types[field_id]
+            current_value = current_values.get((item_id, field_id))
+            if data_type.lower() == "picture":
                 if value:
-                    value = __save_image(value, item.id, field.id, item_attribute.value)
-                else:
-                    if item_attribute.value:
-                        __delete_image(item_attribute.value)
+                    value = __save_image(value, item_id, field_id, current_value)
+                elif current_value:
+                    __delete_image(current_value)
+
+            value_number, value_date = typed_values(value, data_type)
+            attribute_rows.append(
+                {
+                    "item_id": item_id,
+                    "field_id": field_id,
+                    "value": value,
+                    "value_number": value_number,
+                    "value_date": value_date,
+                }
+            )
 
-            if item_attribute:
-                item_attribute.value = value
+    __upsert_attributes(attribute_rows)
 
     # 儲存變更到資料庫
     db.session.commit()
+    invalidate_series(*set(series_by_item.values()))
 
     # 回傳成功訊息
     return make_response(jsonify({"code": 200, "msg": "ItemAttributes updated"}), 200)
@@ -388,6 +587,7 @@ def delete(data):
         item.is_deleted = 1
 
     db.session.commit()
+    invalidate_series(*{item.series_id for item in items_to_delete})
 
     return make_response(jsonify({"code": 200, "msg": "Items deleted"}), 200)
 
@@ -408,34 +608,7 @@ def __normalize_payload_from_request(item_data):
     }
 
 
-def __normalize_payload_from_item(item):
-    fields = __get_fields_by_series(item.series_id)
-    attributes_query = db.session.query(ItemAttribute).filter_by(item_id=item.id)
-    attributes_by_field = {attr.field_id: attr for attr in attributes_query.all()}
-
-    normalized_attributes = []
-    first_string_field_modified = False
-
-    for field in fields:
-        source_attr = attributes_by_field.get(field.id)
-        value = source_attr.value if source_attr else None
-
-        if field.data_type == "picture" and value:
-            normalized_attributes.append({"fieldId": field.id, "value": value})
-        elif field.data_type == "string" and value and not first_string_field_modified:
-            normalized_attributes.append({"fieldId": field.id, "value": f"copy {value}"})
-            first_string_field_modified = True
-        else:
-            normalized_attributes.append({"fieldId": field.id, "value": value})
-
-    return {
-        "series_id": item.series_id,
-        "attributes": normalized_attributes,
-        "fields": fields,
-    }
-
-
-def __create_item(payload, mode="create"):
+def __create_item(payload):
     series_id = payload.get("series_id")
     attributes = payload.get("attributes", [])
     fields = payload.get("fields")
@@ -462,7 +635,11 @@ def __create_item(payload, mode="create"):
             400,
         )
 
-    duplicate_fields = __check_duplicate_required_fields(series_id, attributes)
+    duplicate_fields = uniqueness.check_item(
+        series_id,
+        attributes,
+        uniqueness.resolve_key_fields(fields_by_series={series_id: fields}),
+    )
     if duplicate_fields:
         return None, make_response(
             jsonify({"code": 400, "msg": f"Duplicate values found: {duplicate_fields}"}),
@@ -479,30 +656,412 @@ def __create_item(payload, mode="create"):
         )
         value = attribute.get("value") if attribute else None
 
-        # Only run type checking for create mode to avoid base64 expectations on copy
-        if mode != "copy":
-            type_err = __check_field_type(field, value)
-            if len(type_err) != 0:
-                return None, make_response(jsonify({"code": 400, "msg": type_err}), 400)
+        type_err = __check_field_type(field, value)
+        if len(type_err) != 0:
+            return None, make_response(jsonify({"code": 400, "msg": type_err}), 400)
 
         if field.data_type.lower() == "picture" and value:
-            if mode == "copy":
-                value = __copy_image(value, item.id, field.id)
-            else:
-                value = __save_image(value, item.id, field.id)
+            value = __save_image(value, item.id, field.id)
 
-        item_attribute = ItemAttribute(item_id=item.id, field_id=field.id, value=value)
+        item_attribute = ItemAttribute(item_id=item.id, field_id=field.id)
+        item_attribute.set_value(value, field.data_type)
         db.session.add(item_attribute)
 
     return item, None
 
 
-def __get_series_data(data, for_export=False):
+def __copy_items(source_items):
+    """
+    複製 item，回傳 (新 item, error_response)。
+    欄位、來源的字串 / 圖片屬性與圖片路徑各以一次查詢載入，重複檢查整批一次查詢；
+    非圖片屬性以 INSERT ... SELECT 直接由來源複製（缺少的屬性寫入 NULL），
+    每個 item 第一個有值的字串欄位加上 "copy " 前綴；圖片檔案以執行緒池平行複製。
+    """
+    _, fields_by_series = __load_series_fields({item.series_id for item in source_items})
+    fields = {field.id: field for fields in fields_by_series.values() for field in fields}
+    key_fields = uniqueness.resolve_key_fields(fields_by_series=fields_by_series)
+
+    # 只載入決定前綴、重複檢查與複製圖片所需的屬性值
+    loaded_field_ids = [
+        field_id
+        for field_id, field in fields.items()
+        if field.data_type.lower() in ["string", "picture"] or field_id in key_fields
+    ]
+    source_values = {}
+    if loaded_field_ids:
+        for item_id, field_id, value in db.session.query(
+            ItemAttribute.item_id, ItemAttribute.field_id, ItemAttribute.value
+        ).filter(
+            ItemAttribute.item_id.in_(list({item.id for item in source_items})),
+            ItemAttribute.field_id.in_(loaded_field_ids),
+        ):
+            source_values.setdefault(item_id, {})[field_id] = value
+
+    prefix_fields = {}
+    rows = []
+    for index, item in enumerate(source_items):
+        values = dict(source_values.get(item.id, {}))
+        for field in fields_by_series[item.series_id]:
+            if field.data_type.lower() == "string" and values.get(field.id):
+                prefix_fields[item.id] = field.id
+                values[field.id] = f"copy {values[field.id]}"
+                break
+        rows.append((index, item.series_id, values, None))
+
+    duplicates = uniqueness.find_duplicates(rows, key_fields)
+    if duplicates:
+        duplicate_fields = next(iter(duplicates.values()))
+        return None, make_response(
+            jsonify({"code": 400, "msg": f"Duplicate values found: {duplicate_fields}"}),
+            400,
+        )
+
+    new_items = [Item(series_id=item.series_id) for item in source_items]
+    db.session.add_all(new_items)
+    db.session.flush()
+    new_ids = {source.id: item.id for source, item in zip(source_items, new_items)}
+
+    source_ids = list(new_ids)
+    for start in range(0, len(source_ids), BULK_CHUNK_SIZE):
+        chunk = source_ids[start:start + BULK_CHUNK_SIZE]
+        db.session.execute(
+            ItemAttribute.__table__.insert().from_select(
+                ["item_id", "field_id", "value", "value_number", "value_date"],
+                __copy_attributes_select(
+                    {item_id: new_ids[item_id] for item_id in chunk},
+                    {
+                        item_id: prefix_fields[item_id]
+                        for item_id in chunk
+                        if item_id in prefix_fields
+                    },
+                ),
+            )
+        )
+
+    # 圖片：先查詢來源路徑，平行複製檔案後建立新的 Image 與屬性
+    pictures = []
+    for source in source_items:
+        for field in fields_by_series[source.series_id]:
+            if field.data_type.lower() == "picture":
+                value = source_values.get(source.id, {}).get(field.id)
+                pictures.append((new_ids[source.id], field.id, str(value) if value else None))
+
+    image_paths = {}
+    image_ids = {image_id for _, _, image_id in pictures if image_id}
+    if image_ids:
+        image_paths = {
+            str(image_id): path
+            for image_id, path in db.session.query(Image.id, Image.path).filter(
+                Image.id.in_(list(image_ids))
+            )
+        }
+
+    copies = []
+    for item_id, field_id, image_id in pictures:
+        if image_id and image_id in image_paths:
+            image_name, image_path = __img_path_and_name(item_id, field_id)
+            copies.append((item_id, field_id, image_name, image_paths[image_id], image_path))
+        elif image_id:
+            current_app.logger.warning(f"Source image not found in database: {image_id}")
+
+    errors = __copy_files([(source_path, path) for _, _, _, source_path, path in copies])
+    images = {}
+    for (item_id, field_id, image_name, source_path, path), error in zip(copies, errors):
+        if error:
+            current_app.logger.warning(f"Error copying image {source_path}: {error}")
+        else:
+            images[(item_id, field_id)] = Image(name=image_name[:-4], path=path)
+    db.session.add_all(images.values())
+    db.session.flush()
+
+    attribute_rows = []
+    for item_id, field_id, _ in pictures:
+        image = images.get((item_id, field_id))
+        attribute_rows.append(
+            {
+                "item_id": item_id,
+                "field_id": field_id,
+                "value": image.id if image else None,
+                "value_number": None,
+                "value_date": None,
+            }
+        )
+    for start in range(0, len(attribute_rows), BULK_CHUNK_SIZE):
+        db.session.execute(
+            ItemAttribute.__table__.insert(), attribute_rows[start:start + BULK_CHUNK_SIZE]
+        )
+
+    return new_items, None
+
+
+def __copy_attributes_select(new_ids, prefix_fields):
+    """
+    產生複製屬性的 SELECT：來源 item 與其系列的每個非圖片欄位各一列，
+    item_id 以 CASE 對應到新 item，prefix_fields（{來源 item id: 欄位 id}）的值加上 "copy " 前綴。
+    """
+    value = ItemAttribute.value
+    if prefix_fields:
+        value = case(
+            (
+                Field.id == case(prefix_fields, value=Item.id),
+                literal("copy ") + ItemAttribute.value,
+            ),
+            else_=ItemAttribute.value,
+        )
+
+    return (
+        select(
+            case(new_ids, value=Item.id),
+            Field.id,
+            value,
+            ItemAttribute.value_number,
+            ItemAttribute.value_date,
+        )
+        .select_from(Item)
+        .join(Field, Field.series_id == Item.series_id)
+        .outerjoin(
+            ItemAttribute,
+            and_(ItemAttribute.item_id == Item.id, ItemAttribute.field_id == Field.id),
+        )
+        .where(Item.id.in_(list(new_ids)), func.lower(Field.data_type) != "picture")
+    )
+
+
+def __bulk_create_items(data):
+    """
+    批次新增 item，回傳 (items, error_response)。
+    系列與欄位只查詢一次，全部資料先驗證（含一次查詢的重複檢查），
+    任一筆失敗時回傳每筆的錯誤且不寫入；item 批次 flush，屬性以 executemany 寫入。
+    """
+    payloads = [__normalize_payload_from_request(item_data) for item_data in data]
+    existing_series_ids, fields_by_series = __load_series_fields(
+        {payload["series_id"] for payload in payloads if payload["series_id"]}
+    )
+
+    errors = []
+    rows = []
+    for index, payload in enumerate(payloads):
+        values, error = __validate_bulk_payload(
+            payload, existing_series_ids, fields_by_series
+        )
+        if error:
+            errors.append({"index": index, "msg": error})
+        rows.append((payload["series_id"], values))
+
+    valid_rows = [
+        (index, series_id, values, None)
+        for index, (series_id, values) in enumerate(rows)
+        if values is not None
+    ]
+    duplicates = uniqueness.find_duplicates(
+        valid_rows, uniqueness.resolve_key_fields(fields_by_series=fields_by_series)
+    )
+    for index, duplicate_fields in duplicates.items():
+        errors.append(
+            {"index": index, "msg": f"Duplicate values found: {duplicate_fields}"}
+        )
+
+    if errors:
+        errors.sort(key=lambda error: error["index"])
+        return None, make_response(
+            jsonify(
+                {
+                    "code": 400,
+                    "msg": f"{len(errors)} item(s) failed validation",
+                    "errors": errors,
+                }
+            ),
+            400,
+        )
+
+    return __insert_items(rows, fields_by_series), None
+
+
+def __load_series_fields(series_ids):
+    """回傳 (存在的系列 id, {series_id: [依 sequence 排序的 Field]})"""
+    existing_series_ids = {
+        series_id
+        for (series_id,) in db.session.query(Series.id).filter(Series.id.in_(series_ids))
+    }
+    fields_by_series = {series_id: [] for series_id in existing_series_ids}
+    for field in (
+        db.session.query(Field)
+        .filter(Field.series_id.in_(existing_series_ids))
+        .order_by(Field.sequence)
+    ):
+        fields_by_series[field.series_id].append(field)
+
+    return existing_series_ids, fields_by_series
+
+
+def __insert_items(rows, fields_by_series):
+    """
+    rows 為已驗證的 [(series_id, {field_id: value})]，回傳新增的 Item。
+    item 一次 flush 取得 id，屬性（含型別投影欄位）以 executemany 寫入。
+    """
+    items = [Item(series_id=series_id) for series_id, _ in rows]
+    db.session.add_all(items)
+    db.session.flush()
+
+    attribute_rows = []
+    for item, (series_id, values) in zip(items, rows):
+        for field in fields_by_series[series_id]:
+            value = values.get(field.id)
+            if field.data_type.lower() == "picture" and value:
+                value = __save_image(value, item.id, field.id)
+
+            value_number, value_date = typed_values(value, field.data_type)
+            attribute_rows.append(
+                {
+                    "item_id": item.id,
+                    "field_id": field.id,
+                    "value": value,
+                    "value_number": value_number,
+                    "value_date": value_date,
+                }
+            )
+
+    # 使用 Core insert，含 None 的資料列不會被拆成不同欄位組合，整批以 executemany 寫入
+    for start in range(0, len(attribute_rows), BULK_CHUNK_SIZE):
+        db.session.execute(
+            ItemAttribute.__table__.insert(), attribute_rows[start:start + BULK_CHUNK_SIZE]
+        )
+
+    return items
+
+
+def __upsert_attributes(rows):
+    """
+    以 item_attribute 主鍵 (item_id, field_id) upsert 屬性（含型別投影欄位），
+    MySQL 使用 INSERT ... ON DUPLICATE KEY UPDATE，其餘（測試用 SQLite）使用 ON CONFLICT。
+    """
+    table = ItemAttribute.__table__
+    columns = ["value", "value_number", "value_date"]
+    if db.engine.dialect.name == "mysql":
+        statement = mysql_insert(table)
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in columns}
+        )
+    else:
+        statement = sqlite_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=["item_id", "field_id"],
+            set_={column: statement.excluded[column] for column in columns},
+        )
+
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        db.session.execute(statement, rows[start:start + BULK_CHUNK_SIZE])
+
+
+def __import_attributes(cells, columns):
     """
-    共用產品查詢邏輯，可用於一般查詢或 Excel 匯出
+    將一列儲存格轉為 [{fieldId, value}]，回傳 (attributes, None) 或 (None, 錯誤訊息)。
+    布林欄位的 TRUE/FALSE、yes/no 等文字轉為 1 / 0（讀取時以 int 解析），無法辨識時視為錯誤。
+    """
+    attributes = []
+    for column_index, field in columns:
+        if column_index >= len(cells) or cells[column_index] is None:
+            continue
+
+        value = cells[column_index]
+        if field.data_type.lower() == "boolean":
+            value = parse_boolean(value)
+            if value is None:
+                return None, (
+                    f"Incorrect data type for field: {field.name}. "
+                    f"Expected boolean, got {cells[column_index]!r}."
+                )
+        attributes.append({"fieldId": field.id, "value": value})
+
+    return attributes, None
+
+
+def __import_chunk(chunk, series_id, columns, fields_by_series, key_fields, seen, report):
+    """驗證並寫入一批匯入資料，結果累加至 report"""
+    errors = []
+    valid_rows = []
+    for row_number, cells in chunk:
+        # 略過空白列
+        if all(cell is None for cell in cells):
+            continue
+
+        attributes, error = __import_attributes(cells, columns)
+        if error:
+            errors.append({"row": row_number, "msg": error})
+            continue
+
+        payload = {"series_id": series_id, "attributes": attributes}
+        values, error = __validate_bulk_payload(payload, {series_id}, fields_by_series)
+        if error:
+            errors.append({"row": row_number, "msg": error})
+        else:
+            valid_rows.append((row_number, series_id, values, None))
+
+    duplicates = uniqueness.find_duplicates(valid_rows, key_fields, seen)
+    for row_number, duplicate_fields in duplicates.items():
+        errors.append(
+            {"row": row_number, "msg": f"Duplicate values found: {duplicate_fields}"}
+        )
+
+    rows = [
+        (series_id, values)
+        for row_number, series_id, values, _ in valid_rows
+        if row_number not in duplicates
+    ]
+    if rows:
+        __insert_items(rows, fields_by_series)
+        db.session.commit()
+        # 已寫入的 item 不再需要，避免 session 隨匯入筆數成長
+        db.session.expunge_all()
+
+    report["imported"] += len(rows)
+    report["failed"] += len(errors)
+    room = report["maxErrors"] - len(report["errors"])
+    errors.sort(key=lambda error: error["row"])
+    report["errors"].extend(errors[:max(room, 0)])
+
+
+def __validate_bulk_payload(payload, existing_series_ids, fields_by_series):
+    """驗證單筆新增資料，回傳 ({field_id: value}, None) 或 (None, 錯誤訊息)"""
+    series_id = payload["series_id"]
+    if not series_id:
+        return None, "Incomplete data"
+    if series_id not in existing_series_ids:
+        return None, "Series not found"
+
+    # 同一欄位重複出現時與單筆新增相同，取第一個
+    values = {}
+    for attribute in payload["attributes"]:
+        values.setdefault(attribute.get("fieldId"), attribute.get("value"))
+
+    fields = fields_by_series.get(series_id, [])
+    missing_field = [
+        field.name for field in fields if field.is_required and field.id not in values
+    ]
+    if missing_field:
+        return None, f"Missing required field: {missing_field}"
+
+    for field in fields:
+        type_err = __check_field_type(field, values.get(field.id))
+        if type_err:
+            return None, type_err
+
+    return values, None
+
+
+def __parse_search_request(data, for_export=False, args=None, permissions=None):
+    """
+    驗證產品查詢條件，可用於一般查詢或 Excel 匯出
     - data: dict，包含 seriesId, filters
-    - for_export: True 表示匯出（不限制筆數），False 表示有分頁限制
+    - for_export: True 表示匯出（不分頁、不計算總數），False 表示有分頁限制
+    - args: 查詢字串參數，預設為目前 request 的 args（背景匯出時由呼叫端提供）
+    - permissions: 欄位權限，預設依目前登入者判斷
     """
+    if args is None:
+        args = request.args
+    if permissions is None:
+        permissions = __resolve_permissions()
+
     series_id = data.get("seriesId")
     if not series_id:
         raise ValueError("SeriesId not found")
@@ -519,9 +1078,15 @@ def __get_series_data(data, for_export=False):
     if not series:
         raise ValueError("Series not found")
 
-    page = int(request.args.get("page", 1)) if not for_export else 1
-    limit = int(request.args.get("limit", 10)) if not for_export else 999999
-    sort_param = request.args.get("sort", None)
+    page = int(args.get("page", 1)) if not for_export else 1
+    limit = int(args.get("limit", 10)) if not for_export else None
+    sort_param = args.get("sort", None)
+    # 帶 cursor 參數（可為空字串）時改用 keyset 分頁
+    cursor = args.get("cursor", None) if not for_export else None
+    # 匯出不需要總數
+    count_strategy = args.get("count", COUNT_EXACT) if not for_export else None
+    if count_strategy is not None and count_strategy not in COUNT_STRATEGIES:
+        raise ValueError(f"count must be one of {', '.join(COUNT_STRATEGIES)}")
 
     sort_field_id, sort_order = None, None
     if sort_param:
@@ -539,6 +1104,9 @@ def __get_series_data(data, for_export=False):
         for field in db.session.query(Field).filter(Field.series_id == series_id)
     }
 
+    if sort_field_id and sort_field_id not in fields:
+        raise ValueError("Invalid sort parameter")
+
     # 驗證欄位與資料型別
     for filter_criteria in filters:
         field_id = filter_criteria["fieldId"]
@@ -549,30 +1117,300 @@ def __get_series_data(data, for_export=False):
         if len(type_err) != 0:
             raise ValueError(type_err)
 
-    # If is_archived is 2, treat it as None (all) for the query functions
-    query_is_archived = is_archived if is_archived != 2 else None
-    # If is_deleted is 2, treat it as None (all) for the query functions
-    query_is_deleted = is_deleted if is_deleted != 2 else None
+    return {
+        "series_id": series_id,
+        "filters": filters,
+        "fields": fields,
+        "sort_field_id": sort_field_id,
+        "sort_order": sort_order,
+        "page": page,
+        "limit": limit,
+        "cursor": cursor,
+        "count_strategy": count_strategy,
+        # If is_deleted / is_archived is 2, treat it as None (all) for the query functions
+        "is_deleted": is_deleted if is_deleted != 2 else None,
+        "is_archived": is_archived if is_archived != 2 else None,
+        "permissions": permissions,
+    }
+
+
+def __resolve_permissions():
+    """查詢流程需要的權限只在進入時判斷一次"""
+    return {
+        "limit-field.read": check_field_permission("limit-field.read"),
+        "archive.create": check_field_permission("archive.create"),
+    }
+
+
+def __get_series_data(data):
+    """產品分頁查詢，回傳 (data, total_count, fields, meta)"""
+    query = __parse_search_request(data)
+    series_id = query["series_id"]
+    fields = query["fields"]
 
     # 查詢資料
-    items, conditions, parameters = __get_items(
-        series_id,
-        filters,
+    plan = compile_search(
+        series_id, query["filters"], fields, query["is_deleted"], query["is_archived"]
+    )
+    items, next_cursor = __get_items(
+        plan,
         fields,
-        sort_field_id,
-        sort_order,
-        limit,
-        page,
-        query_is_deleted,
-        query_is_archived,
+        query["sort_field_id"],
+        query["sort_order"],
+        query["limit"],
+        query["page"],
+        query["cursor"],
+    )
+    # 本頁所有 item 的屬性只查詢一次，供 ERP 料號擷取與結果組裝共用
+    permissions = query["permissions"]
+    attributes_dict = __load_attributes(items)
+    erp_data_map, erp_status = __read_erp(
+        items, fields, series_id, attributes_dict, permissions
+    )
+    data = __combine_data_result(
+        items, fields, erp_data_map, attributes_dict, permissions
+    )
+    removed_count = __apply_archive_visibility(data, permissions)
+
+    meta = {"erpStatus": erp_status}
+    total_count = None
+    count_strategy = query["count_strategy"]
+    if count_strategy is not None:
+        total_count, count_status = count_items(
+            series_id,
+            make_cache_key(
+                series_id, query["filters"], query["is_deleted"], query["is_archived"]
+            ),
+            plan,
+            make_cache_key(series_id, [], query["is_deleted"], query["is_archived"]),
+            compile_search(
+                series_id, [], fields, query["is_deleted"], query["is_archived"]
+            ),
+            count_strategy,
+        )
+        if total_count is not None:
+            total_count -= removed_count
+        if count_strategy != COUNT_EXACT:
+            meta["countStatus"] = count_status
+
+    if query["cursor"] is not None:
+        meta["nextCursor"] = next_cursor
+
+    return data, total_count, fields, meta
+
+
+def __iter_export_rows(query, chunk_size, erp_statuses=None):
+    """
+    以 server-side cursor 串流讀取所有符合條件的 item，每 chunk_size 筆組裝後 yield。
+    串流使用獨立連線，屬性與 ERP 查詢仍走 session。
+    erp_statuses 為 list 時，每批的 ERP 狀態會附加於其中。
+    """
+    series_id = query["series_id"]
+    fields = query["fields"]
+    permissions = query["permissions"]
+    # 匯出不佔用互動請求的 worker，每批可等待 ERP 較久
+    erp_budget = current_app.config.get("ERP_EXPORT_LATENCY_BUDGET", 30)
+    plan = compile_search(
+        series_id, query["filters"], fields, query["is_deleted"], query["is_archived"]
+    )
+    sql_query, parameters = __build_items_query(
+        plan, fields, query["sort_field_id"], query["sort_order"]
+    )
+
+    with db.engine.connect() as connection:
+        result = connection.execution_options(stream_results=True).execute(
+            text(sql_query), parameters
+        )
+        for items in result.partitions(chunk_size):
+            attributes_dict = __load_attributes(items)
+            erp_data_map, erp_status = __read_erp(
+                items, fields, series_id, attributes_dict, permissions, erp_budget
+            )
+            if erp_statuses is not None:
+                erp_statuses.append(erp_status)
+            rows = __combine_data_result(
+                items, fields, erp_data_map, attributes_dict, permissions
+            )
+            __apply_archive_visibility(rows, permissions)
+
+            # 釋放本批屬性物件，避免 session 隨匯出筆數成長
+            for attribute in attributes_dict.values():
+                db.session.expunge(attribute)
+
+            yield rows
+
+
+def __write_export_workbook(path, chunks, fields, on_progress=None):
+    """
+    以 constant_memory 模式逐列寫入 Excel，回傳寫入的資料筆數。
+    on_progress(rows_written) 於每批寫完後呼叫。
+    """
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    worksheet = workbook.add_worksheet("Products")
+
+    # 凍結前面五個欄位
+    worksheet.freeze_panes(1, 5)  # 從第1列（標題列之後）和第5欄開始凍結
+
+    # 設定欄位寬度和列高度，特別是圖片欄位
+    default_row_height = 20
+    image_row_height = 80  # 圖片列的高度
+
+    thumbnail_size = current_app.config.get("EXPORT_THUMBNAIL_SIZE", 100)
+    # 整次匯出共用的圖片檔案快取，同一張圖片只查詢與檢查一次
+    image_files = {}
+
+    row_idx = 0
+    for rows in chunks:
+        __resolve_export_images(rows, thumbnail_size, image_files)
+
+        for row in rows:
+            if row_idx == 0:
+                # 取得欄位名稱（以第一筆 attributes 為基準）
+                field_names = [attr["fieldName"] for attr in row["attributes"]]
+
+                # 取得 ERP 欄位名稱（如果有的話）
+                erp_field_names = []
+                if row.get("erp"):
+                    erp_field_names = [erp_field["key"] for erp_field in row["erp"]]
+
+                # 檢查哪些欄位是圖片類型
+                for col_idx, attr in enumerate(row["attributes"]):
+                    field_id = int(attr["fieldId"])
+                    if field_id in fields and fields[field_id].data_type == "picture":
+                        worksheet.set_column(col_idx, col_idx, 15)  # 設定圖片欄位寬度
+
+                # 寫入表頭
+                for col, name in enumerate(field_names + erp_field_names):
+                    worksheet.write(0, col, name)
+
+            row_idx += 1
+            attr_list = row.get("attributes", [])
+
+            # constant_memory 模式下需在寫入儲存格前設定行高
+            has_image_in_row = any(
+                attr.get("dataType", "") == "picture" and attr.get("value")
+                for attr in attr_list
+            )
+            if has_image_in_row:
+                worksheet.set_row(row_idx, image_row_height)
+            else:
+                worksheet.set_row(row_idx, default_row_height)
+
+            col_idx = 0
+
+            # 寫入一般欄位資料
+            for attr in attr_list:
+                value = attr.get("value", "")
+                data_type = attr.get("dataType", "")
+
+                if data_type == "picture" and value:
+                    # 處理圖片欄位
+                    try:
+                        # 從 value 中提取圖片 ID（去掉 /image/ 前綴）
+                        if value.startswith("/image/"):
+                            image_file = image_files.get(value.replace("/image/", ""))
+                            if image_file:
+                                image_path, scale = image_file
+                                # 插入圖片到 Excel
+                                worksheet.insert_image(row_idx, col_idx, image_path, {
+                                    'x_scale': scale,  # 縮放比例
+                                    'y_scale': scale,
+                                    'x_offset': 2,   # 偏移
+                                    'y_offset': 2
+                                })
+                            else:
+                                worksheet.write(row_idx, col_idx, "圖片不存在")
+                        else:
+                            worksheet.write(row_idx, col_idx, value)
+                    except Exception as e:
+                        # 如果圖片處理失敗，寫入錯誤訊息
+                        worksheet.write(row_idx, col_idx, f"圖片載入失敗: {str(e)}")
+                else:
+                    # 一般欄位
+                    worksheet.write(row_idx, col_idx, value)
+                col_idx += 1
+
+            # 寫入 ERP 欄位資料
+            erp_list = row.get("erp", [])
+            for erp_field in erp_list:
+                value = erp_field.get("value", "")
+                worksheet.write(row_idx, col_idx, value)
+                col_idx += 1
+
+        if on_progress:
+            on_progress(row_idx)
+
+    workbook.close()
+
+    return row_idx
+
+
+def __export_filename():
+    # 使用 UTC+8 時間生成檔名
+    utc_plus_8 = timezone(timedelta(hours=8))
+    timestamp = datetime.now(utc_plus_8).strftime("%Y%m%d_%H%M%S")
+    return f"products_export_{timestamp}.xlsx"
+
+
+def __export_job_data(status):
+    return {
+        "jobId": status["jobId"],
+        "state": status["state"],
+        "rowsProcessed": status["rowsProcessed"],
+        "error": status["error"],
+        "createdAt": status["createdAt"],
+        "updatedAt": status["updatedAt"],
+        "erpStatus": status.get("erpStatus"),
+    }
+
+
+def __resolve_export_images(rows, thumbnail_size, image_files):
+    """
+    將本批資料中尚未處理的圖片加入 image_files：{image_id: (path, scale) 或 None}。
+    圖片記錄以一次 IN 查詢取得；優先使用縮圖，縮圖無法產生時退回原圖並縮放顯示；
+    記錄或檔案不存在時為 None。
+    """
+    image_ids = {
+        attr["value"].replace("/image/", "")
+        for row in rows
+        for attr in row.get("attributes", [])
+        if attr.get("dataType") == "picture"
+        and isinstance(attr.get("value"), str)
+        and attr["value"].startswith("/image/")
+    } - image_files.keys()
+    if not image_ids:
+        return image_files
+
+    image_records = (
+        db.session.query(Image.id, Image.path)
+        .filter(
+            Image.id.in_(
+                [int(image_id) for image_id in image_ids if image_id.isdigit()]
+            )
+        )
+        .all()
     )
-    erp_data_map = __read_erp(items, fields, series_id)
-    data = __combine_data_result(items, fields, erp_data_map)
-    total_count = __count_total_count(
-        data, filters, conditions, parameters, query_is_deleted, query_is_archived
+    paths = {str(image_record.id): image_record.path for image_record in image_records}
+
+    originals = {}
+    for image_id in image_ids:
+        path = paths.get(image_id)
+        if path and os.path.exists(path):
+            originals[image_id] = path
+        else:
+            image_files[image_id] = None
+
+    thumbnails = ensure_thumbnails(
+        list(originals.items()),
+        thumbnail_size,
+        current_app.config.get("THUMBNAIL_WORKERS", DEFAULT_THUMBNAIL_WORKERS),
     )
+    for image_id, path in originals.items():
+        image_files[image_id] = (
+            (thumbnails[image_id], 1) if image_id in thumbnails else (path, 0.3)
+        )
 
-    return data, total_count, fields
+    return image_files
 
 
 def __save_image(image_data, item_id, field_id, image_id=None):
@@ -592,6 +1430,9 @@ def __save_image(image_data, item_id, field_id, image_id=None):
         with open(image_path, "wb") as image_file:
             image_file.write(image_bytes)
 
+        if image_id:
+            remove_thumbnails(image_path, image_id)
+
     if image_id:
         # If image_id exists, update the existing image path
         image = db.session.get(Image, image_id)
@@ -611,44 +1452,25 @@ def __save_image(image_data, item_id, field_id, image_id=None):
     return image.id
 
 
-def __copy_image(source_image_id, new_item_id, field_id):
-    """複製圖片檔案到新的位置，用於產品複製功能"""
-    import os
-    import shutil
-    
-    # 如果沒有圖片 ID，返回 None
-    if not source_image_id:
-        return None
-    
-    try:
-        # 從資料庫中找到原始圖片記錄
-        source_image = db.session.get(Image, source_image_id)
-        if not source_image:
-            current_app.logger.warning(f"Source image not found in database: {source_image_id}")
-            return None
-        
-        # 檢查原始圖片檔案是否存在
-        if not os.path.exists(source_image.path):
-            current_app.logger.warning(f"Source image file not found: {source_image.path}")
-            return None
-        
-        # 產生新的圖片名稱和路徑
-        new_image_name, new_image_path = __img_path_and_name(new_item_id, field_id)
-        
-        # 複製圖片檔案
-        shutil.copy2(source_image.path, new_image_path)
-        
-        # 在資料庫中建立新的圖片記錄
-        new_image = Image(name=new_image_name[:-4], path=new_image_path)
-        db.session.add(new_image)
-        db.session.flush()
-        
-        return new_image.id
-        
-    except Exception as e:
-        current_app.logger.error(f"Error copying image: {str(e)}")
+def __copy_files(pairs):
+    """以執行緒池平行複製檔案，回傳每組 (來源, 目的) 的錯誤（成功為 None）"""
+
+    def copy(pair):
+        try:
+            shutil.copy2(*pair)
+        except OSError as error:
+            return error
         return None
 
+    if not pairs:
+        return []
+
+    workers = current_app.config.get(
+        "PRODUCT_COPY_IMAGE_WORKERS", DEFAULT_PRODUCT_COPY_IMAGE_WORKERS
+    )
+    with ThreadPoolExecutor(max_workers=min(workers, len(pairs))) as executor:
+        return list(executor.map(copy, pairs))
+
 
 def __delete_image(image_id):
     image = db.session.get(Image, image_id)
@@ -659,6 +1481,7 @@ def __delete_image(image_id):
 
         if os.path.exists(image_path):
             os.remove(image_path)
+        remove_thumbnails(image_path, image_id)
     else:
         raise Exception("Image with the specified image_id does not exist.")
 
@@ -709,56 +1532,14 @@ def __check_field_required(fields_query, filters, is_required_var):
 def __is_datetime(string):
     """
     檢查字串是否為有效的日期格式
-    支援多種日期格式：
+    支援的格式見 utils.typed_value.DATE_FORMATS：
     - %Y/%m/%d (2025/01/07)
     - %m/%d/%y (01/07/25)
     - %m/%d/%Y (01/07/2025)
     - %Y-%m-%d (2025-01-07)
     - %d/%m/%Y (07/01/2025)
     """
-    date_formats = [
-        "%Y/%m/%d",  # 2025/01/07
-        "%m/%d/%y",  # 01/07/25
-        "%m/%d/%Y",  # 01/07/2025
-        "%Y-%m-%d",  # 2025-01-07
-        "%d/%m/%Y",  # 07/01/2025
-        "%d-%m-%Y",  # 07-01-2025
-    ]
-    
-    for date_format in date_formats:
-        try:
-            datetime.strptime(string, date_format)
-            return True
-        except ValueError:
-            continue
-    
-    return False
-
-
-def __normalize_date(date_string):
-    """
-    將不同格式的日期字串標準化為 YYYY-MM-DD 格式
-    """
-    if not date_string:
-        return None
-        
-    date_formats = [
-        "%Y/%m/%d",  # 2025/01/07
-        "%m/%d/%y",  # 01/07/25
-        "%m/%d/%Y",  # 01/07/2025
-        "%Y-%m-%d",  # 2025-01-07
-        "%d/%m/%Y",  # 07/01/2025
-        "%d-%m-%Y",  # 07-01-2025
-    ]
-    
-    for date_format in date_formats:
-        try:
-            parsed_date = datetime.strptime(date_string, date_format)
-            return parsed_date.strftime("%Y-%m-%d")
-        except ValueError:
-            continue
-    
-    return None
+    return parse_date(string) is not None
 
 
 def __check_field_type(field, value):
@@ -809,219 +1590,101 @@ def __check_field_type(field, value):
     return type_err
 
 
-def __check_condition(field, operation, field_name, value_name):
-    condition = f"""
-    (item.id, item.series_id) IN (
-        SELECT DISTINCT item.id,
-                        item.series_id
-        FROM item
-            JOIN item_attribute ON item.id = item_attribute.item_id
-        WHERE item.series_id = :series_id
-            AND item_attribute.field_id = :{field_name}
-            AND item_attribute.value = :{value_name}
-    )
-    """
-
-    if operation == "greater":
-        if field.data_type.lower() == "number":
-            condition = f"""
-            (item.id, item.series_id) IN (
-                SELECT DISTINCT item.id,
-                                item.series_id
-                FROM item
-                    JOIN item_attribute ON item.id = item_attribute.item_id
-                WHERE item.series_id = :series_id
-                    AND item_attribute.field_id = :{field_name}
-                    AND CAST(item_attribute.value AS float) >= :{value_name}
-            )
-            """
-        elif field.data_type.lower() == "datetime":
-            condition = f"""
-            (item.id, item.series_id) IN (
-                SELECT DISTINCT item.id,
-                                item.series_id
-                FROM item
-                    JOIN item_attribute ON item.id = item_attribute.item_id
-                WHERE item.series_id = :series_id
-                    AND item_attribute.field_id = :{field_name}
-                    AND DATE(item_attribute.value) >= DATE(:{value_name})
-            )
-            """
-
-    elif operation == "less":
-        if field.data_type.lower() == "number":
-            condition = f"""
-            (item.id, item.series_id) IN (
-                SELECT DISTINCT item.id,
-                                item.series_id
-                FROM item
-                    JOIN item_attribute ON item.id = item_attribute.item_id
-                WHERE item.series_id = :series_id
-                    AND item_attribute.field_id = :{field_name}
-                    AND CAST(item_attribute.value AS float) <= :{value_name}
-            )
-            """
-        elif field.data_type.lower() == "datetime":
-            condition = f"""
-            (item.id, item.series_id) IN (
-                SELECT DISTINCT item.id,
-                                item.series_id
-                FROM item
-                    JOIN item_attribute ON item.id = item_attribute.item_id
-                WHERE item.series_id = :series_id
-                    AND item_attribute.field_id = :{field_name}
-                    AND DATE(item_attribute.value) <= DATE(:{value_name})
-            )
-            """
-    elif operation in ["equals", "equal"] and field.data_type.lower() == "datetime":
-        # 對於日期相等比較，使用 DATE() 函數確保只比較日期部分
-        condition = f"""
-        (item.id, item.series_id) IN (
-            SELECT DISTINCT item.id,
-                            item.series_id
-            FROM item
-                JOIN item_attribute ON item.id = item_attribute.item_id
-            WHERE item.series_id = :series_id
-                AND item_attribute.field_id = :{field_name}
-                AND DATE(item_attribute.value) = DATE(:{value_name})
-        )
-        """
-
-    if field.data_type.lower() == "string":
-        condition = f"""
-                (item.id, item.series_id) IN (
-                    SELECT DISTINCT item.id,
-                                    item.series_id
-                    FROM item
-                        JOIN item_attribute ON item.id = item_attribute.item_id
-                    WHERE item.series_id = :series_id
-                        AND item_attribute.field_id = :{field_name}
-                        AND item_attribute.value LIKE :{value_name}
-                )
-                """
-    return condition
-
-
-def __create_count_query(count_query, conditions):
-    count_query += """
-            AND (
-        """
-    # Using the same conditions for the count query
-    count_query += " AND ".join(conditions)
-    count_query += ")"
-
-    return count_query
-
-
-def __get_items(
-    series_id,
-    filters,
-    fields,
-    sort_field_id,
-    sort_order,
-    limit,
-    page,
-    is_deleted=0,
-    is_archived=None,
-):
-    # Create a SQL query to find the items
-    sql_query = """
-            SELECT item.id AS item_id,
-                item.series_id AS item_series_id,
-                s.name AS series_name,
-                item.is_deleted AS is_deleted
-            FROM item
-            JOIN series AS s ON item.series_id = s.id
-            WHERE item.series_id = :series_id
+def __build_items_query(plan, fields, sort_field_id, sort_order, cursor=None):
+    """組出查詢 item 的 SQL（不含 LIMIT），cursor 有值時加上 keyset 條件"""
+    columns = """
+        item.id AS item_id,
+        item.series_id AS item_series_id,
+        s.name AS series_name,
+        item.is_deleted AS is_deleted
         """
+    parameters = dict(plan.parameters)
+    extra_joins = []
+    extra_conditions = []
+    order_direction = " DESC" if sort_order == "desc" else ""
 
-    conditions = []
-    parameters = {"series_id": series_id}
-
-    if is_deleted is not None:
-        sql_query += " AND item.is_deleted = :is_deleted"
-        parameters["is_deleted"] = is_deleted
-
-    if is_archived is not None:
-        if is_archived == 1:
-            sql_query += " AND item.id IN (SELECT item_id FROM archive)"
-        else:
-            sql_query += " AND item.id NOT IN (SELECT item_id FROM archive)"
-
-    # if there is condition
-    if len(filters) > 0:
-        sql_query += """
-                AND (
-            """
-
-        for index, filter_criteria in enumerate(filters):
-            field_id = filter_criteria["fieldId"]
-            value = filter_criteria["value"]
-            operation = filter_criteria.get("operation", "equals")
-            field = fields[field_id]
-
-            field_name = f"field_id{index}"
-            value_name = f"value{index}"
-
-            parameters[field_name] = field_id
-
-            # 處理不同資料型別的值綁定
-            if field.data_type.lower() == "string":
-                parameters[value_name] = f"%{value}%"
-            elif field.data_type.lower() == "datetime":
-                # 標準化日期格式為 YYYY-MM-DD
-                normalized_date = __normalize_date(value)
-                if normalized_date:
-                    parameters[value_name] = normalized_date
-                else:
-                    # 如果日期格式無效，使用原始值（可能會導致查詢失敗，但會有適當的錯誤處理）
-                    parameters[value_name] = value
-            else:
-                parameters[value_name] = value
+    sort_column_name = None
+    if sort_field_id:
+        sort_column_name = sort_column(fields[sort_field_id])
+        extra_joins.append(
+            """ LEFT JOIN item_attribute AS sort_attr
+                ON sort_attr.item_id = item.id AND sort_attr.field_id = :sort_field_id"""
+        )
+        columns += f", {sort_column_name} AS sort_key"
+        parameters["sort_field_id"] = sort_field_id
+        order_by = f" ORDER BY {sort_column_name}{order_direction}, item.id{order_direction}"
+    else:
+        order_by = " ORDER BY item.id"
 
-            condition = __check_condition(field, operation, field_name, value_name)
+    if cursor:
+        sort_key, cursor_id = decode_cursor(cursor, sort_field_id, sort_order)
+        extra_conditions.append(seek_condition(sort_column_name, sort_order, sort_key))
+        parameters["cursor_key"] = sort_key
+        parameters["cursor_id"] = cursor_id
 
-            conditions.append(condition)
+    sql_query = plan.select(columns, extra_joins, extra_conditions) + order_by
+    return sql_query, parameters
 
-        sql_query += " AND ".join(conditions)
-        sql_query += ")"
 
-    if sort_field_id:
-        sql_query += f" ORDER BY (SELECT value FROM item_attribute WHERE item_id = item.id AND field_id = :sort_field_id)"
-        if sort_order == "desc":
-            sql_query += " DESC"
-        parameters["sort_field_id"] = sort_field_id
+def __get_items(plan, fields, sort_field_id, sort_order, limit, page, cursor=None):
+    """
+    查詢一頁 item。
+    cursor 為 None 時使用 LIMIT/OFFSET；否則使用 keyset 分頁（空字串表示第一頁），
+    並回傳下一頁的 cursor（沒有下一頁時為 None）。
+    """
+    sql_query, parameters = __build_items_query(
+        plan, fields, sort_field_id, sort_order, cursor
+    )
 
-    sql_query += " LIMIT :limit OFFSET :page"
-    parameters["limit"] = limit
-    parameters["page"] = (page - 1) * limit
+    if cursor is None:
+        sql_query += " LIMIT :limit OFFSET :page"
+        parameters["limit"] = limit
+        parameters["page"] = (page - 1) * limit
+    else:
+        # 多取一筆判斷是否還有下一頁
+        sql_query += " LIMIT :limit"
+        parameters["limit"] = limit + 1
 
     # Execute the SQL query
     result = db.session.execute(text(sql_query), parameters).fetchall()
 
-    return result, conditions, parameters
+    next_cursor = None
+    if cursor is not None and len(result) > limit:
+        result = result[:limit]
+        last_row = result[-1]
+        next_cursor = encode_cursor(
+            sort_field_id,
+            sort_order,
+            last_row.sort_key if sort_field_id else None,
+            last_row.item_id,
+        )
 
+    return result, next_cursor
 
-def __combine_data_result(items, fields, erp_data_map):
-    # Format the output
-    data = []
 
+def __load_attributes(items):
     # Get all relevant ItemAttributes in a single query
     item_ids = [row[0] for row in items]
+    if not item_ids:
+        return {}
+
     all_attributes = (
         db.session.query(ItemAttribute)
-        .filter(and_(ItemAttribute.item_id.in_(item_ids)))
+        .filter(ItemAttribute.item_id.in_(item_ids))
         .all()
     )
 
     # Convert the list of attributes into a dictionary for easier look-up
-    attributes_dict = {(attr.item_id, attr.field_id): attr for attr in all_attributes}
+    return {(attr.item_id, attr.field_id): attr for attr in all_attributes}
 
-    
+
+def __combine_data_result(items, fields, erp_data_map, attributes_dict, permissions):
+    # Format the output
+    data = []
 
     for row in items:
         fields_data = []
-        item_id, item_series_id, series_name, is_deleted = row
+        item_id, item_series_id, series_name, is_deleted = row[:4]
         erp_data = []
         for field in sorted(fields.values(), key=lambda x: x.sequence):
             item = attributes_dict.get((item_id, field.id))
@@ -1029,7 +1692,7 @@ def __combine_data_result(items, fields, erp_data_map):
             # check permission disable field
             is_limit_permission_ok = True
             if field.is_limit_field:
-                is_limit_permission_ok = check_field_permission("limit-field.read")
+                is_limit_permission_ok = permissions["limit-field.read"]
             if is_limit_permission_ok and not field.is_erp:
                 fields_data.append(
                     {
@@ -1058,9 +1721,8 @@ def __combine_data_result(items, fields, erp_data_map):
     return data
 
 
-def __count_total_count(
-    data, filters, conditions, parameters, status_filter=1, is_archived=None
-):
+def __apply_archive_visibility(data, permissions):
+    """標記 hasArchive；沒有 archive.create 權限時移除已封存的項目並回傳移除筆數"""
     # find archive exist
     item_ids = [item_data["itemId"] for item_data in data]
 
@@ -1074,39 +1736,12 @@ def __count_total_count(
         item_id = item_data["itemId"]
         item_data["hasArchive"] = item_id in archive_item_ids
 
-    count_query = """
-            SELECT COUNT(item.id) 
-            FROM item
-            JOIN series AS s ON item.series_id = s.id
-            WHERE item.series_id = :series_id
-        """
-
-    if status_filter is not None:
-        count_query += " AND item.is_deleted = :is_deleted"
-        if "is_deleted" not in parameters:
-             parameters["is_deleted"] = status_filter
-
-    if is_archived is not None:
-        if is_archived == 1:
-            count_query += " AND item.id IN (SELECT item_id FROM archive)"
-        else:
-            count_query += " AND item.id NOT IN (SELECT item_id FROM archive)"
-
-    # if there is condition
-    if len(filters) > 0:
-        count_query = __create_count_query(count_query, conditions)
-
-    # Execute the count query
-    count_result = db.session.execute(text(count_query), parameters).fetchone()
-    total_count = count_result[0]
-
     # check archive.update permission not exist delete item with archive false
-    is_archive_permission_ok = check_field_permission("archive.create")
+    is_archive_permission_ok = permissions["archive.create"]
 
+    removed_count = 0  # record remove count
     if not is_archive_permission_ok:
         # archive.update not exist
-        removed_count = 0  # record remove count
-
         for item_data in data.copy():
             item_id = item_data["itemId"]
             has_archive = item_id in archive_item_ids
@@ -1116,80 +1751,27 @@ def __count_total_count(
                 data.remove(item_data)
                 removed_count += 1
 
-        # 从 total_count 中减去被删除的数量
-        total_count -= removed_count
-
-    return total_count
+    # 由呼叫端從 total_count 中減去被刪除的數量
+    return removed_count
 
 
-def __read_erp(items, fields, series_id):
+def __read_erp(items, fields, series_id, attributes_dict, permissions, budget=None):
     # Extract all product numbers from the result that need ERP data
+    erp_fields = [field for field in fields.values() if field.search_erp]
+
     product_nos_to_fetch = set()
     for row in items:
-        item_id, item_series_id, series_name, is_deleted = row
-        for field in fields.values():
-            if field.search_erp:
-                item = (
-                    db.session.query(ItemAttribute)
-                    .filter(
-                        and_(
-                            ItemAttribute.item_id == item_id,
-                            ItemAttribute.field_id == field.id,
-                        )
-                    )
-                    .first()
-                )
-                erp_product_no = __get_field_value_by_type(item)
-                product_nos_to_fetch.add(erp_product_no)
+        item_id = row[0]
+        for field in erp_fields:
+            item = attributes_dict.get((item_id, field.id))
+            erp_product_no = __get_field_value_by_type(item)
+            product_nos_to_fetch.add(erp_product_no)
 
     # Fetch ERP data in a single call
-    return read_erp(product_nos_to_fetch, series_id)
-
-
-def __check_duplicate_required_fields(series_id, attributes, exclude_item_id=None):
-    """檢查供應商料號和DST料號是否已經存在，可選擇排除指定 item。"""
-    duplicate_fields = []
-
-    supplier_field = db.session.query(Field).filter(
-        and_(Field.series_id == series_id, Field.name == "供應商料號")
-    ).first()
-
-    dst_field = db.session.query(Field).filter(
-        and_(Field.series_id == series_id, Field.name == "DST料號")
-    ).first()
-
-    base_filters = [Item.series_id == series_id, Item.is_deleted == 0]
-    if exclude_item_id is not None:
-        base_filters.append(Item.id != exclude_item_id)
-
-    if supplier_field:
-        supplier_attr = next(
-            (a for a in attributes if a.get("fieldId") == supplier_field.id), None
-        )
-        if supplier_attr and supplier_attr.get("value"):
-            existing_supplier = db.session.query(ItemAttribute).join(Item).filter(
-                and_(
-                    ItemAttribute.field_id == supplier_field.id,
-                    ItemAttribute.value == supplier_attr["value"],
-                    *base_filters,
-                )
-            ).first()
-            if existing_supplier:
-                duplicate_fields.append(f"供應商料號 '{supplier_attr['value']}' 已存在")
-
-    if dst_field:
-        dst_attr = next(
-            (a for a in attributes if a.get("fieldId") == dst_field.id), None
-        )
-        if dst_attr and dst_attr.get("value"):
-            existing_dst = db.session.query(ItemAttribute).join(Item).filter(
-                and_(
-                    ItemAttribute.field_id == dst_field.id,
-                    ItemAttribute.value == dst_attr["value"],
-                    *base_filters,
-                )
-            ).first()
-            if existing_dst:
-                duplicate_fields.append(f"DST料號 '{dst_attr['value']}' 已存在")
-
-    return duplicate_fields
+    return read_erp(
+        product_nos_to_fetch,
+        series_id,
+        permissions["limit-field.read"],
+        with_status=True,
+        budget=budget,
+    )
@@ -3,6 +3,7 @@ from models.user import Permission, Role, RolePermission, User
 from models.shared import db
 from sqlalchemy.exc import SQLAlchemyError
 from modules.exception import handle_exceptions
+from utils import token_state
 
 
 @handle_exceptions
@@ -80,11 +81,14 @@ def __update_role_permissions(role_id, permission_ids):
 
     # 更新擁有此角色的所有使用者的 token_version，強制重新登入
     role = db.session.get(Role, role_id)
+    user_ids = []
     if role:
         for user in role.users:
             user.token_version += 1
+            user_ids.append(user.id)
 
     db.session.commit()
+    token_state.invalidate(*user_ids)
 
 
 @handle_exceptions
@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+from sqlalchemy import text
+
+from models.shared import db
+from utils import series_generation
+
+# 總數計算策略
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATED = "estimated"
+COUNT_ASYNC = "async"
+COUNT_STRATEGIES = [COUNT_EXACT, COUNT_CACHED, COUNT_ESTIMATED, COUNT_ASYNC]
+
+DEFAULT_COUNT_CACHE_TTL = 60
+DEFAULT_COUNT_CACHE_SIZE = 1024
+
+_cache = OrderedDict()  # cache_key -> (generation, expires_at, count)
+# series_id -> 本行程的寫入次數；跨 worker 的寫入以 series_generation 共用的計數器通知
+_series_generation = {}
+_pending = set()
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-count")
+
+
+def make_cache_key(series_id, filters, is_deleted, is_archived):
+    """以系列與正規化後的篩選條件組成快取 key，條件順序不影響結果"""
+    normalized_filters = sorted(
+        (
+            filter_criteria["fieldId"],
+            filter_criteria.get("operation", "equals"),
+            json.dumps(filter_criteria["value"], sort_keys=True, default=str),
+        )
+        for filter_criteria in filters
+    )
+    return json.dumps([series_id, is_deleted, is_archived, normalized_filters])
+
+
+def invalidate_series(*series_ids):
+    """系列內的 item 有寫入時呼叫，使所有 worker 中該系列快取的總數失效"""
+    series_ids = [series_id for series_id in series_ids if series_id is not None]
+    with _lock:
+        for series_id in series_ids:
+            _series_generation[series_id] = _series_generation.get(series_id, 0) + 1
+
+    if series_ids and has_app_context():
+        series_generation.bump(*series_ids)
+
+
+def count_items(series_id, cache_key, plan, base_cache_key, base_plan, strategy=COUNT_EXACT):
+    """
+    依策略計算搜尋總數，回傳 (total_count, count_status)。
+    base_cache_key / base_plan 為同系列未篩選的查詢，與篩選條件無關，所有條件共用同一個未篩選總數。
+    - exact：每次重新 COUNT
+    - cached：命中快取直接回傳，否則 COUNT 後寫入快取
+    - estimated：未篩選總數（可快取）乘上查詢計畫推估的選擇率
+    - async：命中快取直接回傳，否則於背景計算並回傳 (None, "pending")
+    """
+    if strategy not in COUNT_STRATEGIES:
+        raise ValueError(f"count must be one of {', '.join(COUNT_STRATEGIES)}")
+
+    if strategy == COUNT_EXACT:
+        return _execute_count(plan), COUNT_EXACT
+
+    generation = _generation(series_id)
+    cached = _get(cache_key, generation)
+    if cached is not None:
+        return cached, COUNT_CACHED
+
+    if strategy == COUNT_CACHED:
+        count = _execute_count(plan)
+        _store(cache_key, generation, count)
+        return count, COUNT_EXACT
+
+    if strategy == COUNT_ESTIMATED:
+        base_count = _get(base_cache_key, generation)
+        if base_count is None:
+            base_count = _execute_count(base_plan)
+            _store(base_cache_key, generation, base_count)
+        return int(round(base_count * plan.selectivity)), COUNT_ESTIMATED
+
+    _count_in_background(cache_key, generation, plan)
+    return None, "pending"
+
+
+def _execute_count(plan):
+    return db.session.execute(text(plan.count()), plan.parameters).scalar()
+
+
+def _count_in_background(cache_key, generation, plan):
+    with _lock:
+        if cache_key in _pending:
+            return
+        _pending.add(cache_key)
+
+    app = current_app._get_current_object()
+    sql, parameters = plan.count(), dict(plan.parameters)
+
+    def run():
+        try:
+            # 背景執行緒使用自己的 app context 與 session
+            with app.app_context():
+                count = db.session.execute(text(sql), parameters).scalar()
+                _store(cache_key, generation, count)
+        except Exception as e:
+            app.logger.error(f"Background count failed: {e}")
+        finally:
+            with _lock:
+                _pending.discard(cache_key)
+
+    _executor.submit(run)
+
+
+def _generation(series_id):
+    """本行程與跨 worker 共用的寫入世代，任一變動即代表快取失效"""
+    with _lock:
+        local = _series_generation.get(series_id, 0)
+    return local, series_generation.current(series_id)
+
+
+def _get(cache_key, generation):
+    with _lock:
+        entry = _cache.get(cache_key)
+        if not entry:
+            return None
+
+        entry_generation, expires_at, count = entry
+        if entry_generation != generation or expires_at <= time.monotonic():
+            del _cache[cache_key]
+            return None
+
+        _cache.move_to_end(cache_key)
+        return count
+
+
+def _store(cache_key, generation, count):
+    ttl = current_app.config.get("COUNT_CACHE_TTL", DEFAULT_COUNT_CACHE_TTL)
+    max_size = current_app.config.get("COUNT_CACHE_SIZE", DEFAULT_COUNT_CACHE_SIZE)
+
+    with _lock:
+        _cache[cache_key] = (generation, time.monotonic() + ttl, count)
+        _cache.move_to_end(cache_key)
+        while len(_cache) > max_size:
+            _cache.popitem(last=False)
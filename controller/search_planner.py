@@ -0,0 +1,268 @@
+import base64
+import json
+import threading
+import time
+
+from sqlalchemy import bindparam, text
+
+from models.shared import db
+from utils.typed_value import parse_date, parse_number
+
+# 欄位基數統計的快取秒數
+FIELD_STATS_TTL = 600
+
+# 無法由統計推估時使用的選擇率
+RANGE_SELECTIVITY = 1 / 3
+LIKE_SELECTIVITY = 1 / 10
+DEFAULT_SELECTIVITY = 1 / 2
+
+_field_stats = {}  # field_id -> (expires_at, distinct_count)
+_field_stats_lock = threading.Lock()
+
+
+class SearchPlan:
+    """
+    /product/search 的編譯結果。
+    所有篩選條件編譯成同一個陳述式：每個被篩選的欄位對 item_attribute 做一次 self-join，
+    依推估選擇率由高至低排列，查詢資料與計算總數共用同一份 FROM / WHERE。
+    """
+
+    def __init__(self, joins, conditions, parameters, selectivity=1.0):
+        self.joins = joins
+        self.conditions = conditions
+        self.parameters = parameters
+        # 所有篩選條件合計的推估選擇率，供推估總數使用
+        self.selectivity = selectivity
+
+    def from_clause(self, extra_joins=(), extra_conditions=()):
+        sql = """
+            FROM item
+            JOIN series AS s ON item.series_id = s.id
+        """
+        sql += "".join(self.joins) + "".join(extra_joins)
+        sql += " WHERE " + " AND ".join(
+            self.conditions + [f"({condition})" for condition in extra_conditions]
+        )
+        return sql
+
+    def select(self, columns, extra_joins=(), extra_conditions=()):
+        return f"SELECT {columns} {self.from_clause(extra_joins, extra_conditions)}"
+
+    def count(self):
+        return self.select("COUNT(item.id)")
+
+
+def compile_search(series_id, filters, fields, is_deleted=None, is_archived=None):
+    """將篩選條件清單編譯成 SearchPlan"""
+    conditions = ["item.series_id = :series_id"]
+    parameters = {"series_id": series_id}
+
+    if is_deleted is not None:
+        conditions.append("item.is_deleted = :is_deleted")
+        parameters["is_deleted"] = is_deleted
+
+    if is_archived is not None:
+        if is_archived == 1:
+            conditions.append("item.id IN (SELECT item_id FROM archive)")
+        else:
+            conditions.append("item.id NOT IN (SELECT item_id FROM archive)")
+
+    # 同一欄位的多個條件合併在同一個 join 上（item_attribute 每個 item/field 只有一列）
+    predicates_by_field = {}
+    for filter_criteria in filters:
+        field_id = filter_criteria["fieldId"]
+        operation = filter_criteria.get("operation", "equals")
+        predicates_by_field.setdefault(field_id, []).append(
+            (operation, filter_criteria["value"])
+        )
+
+    stats = _get_field_stats(
+        [
+            field_id
+            for field_id, predicates in predicates_by_field.items()
+            if any(_is_equality(fields[field_id], op) for op, _ in predicates)
+        ]
+    )
+
+    selectivities = {
+        field_id: _estimate_selectivity(
+            fields[field_id], predicates, stats.get(field_id)
+        )
+        for field_id, predicates in predicates_by_field.items()
+    }
+    ordered_field_ids = sorted(predicates_by_field, key=selectivities.get)
+
+    joins = []
+    value_index = 0
+    for join_index, field_id in enumerate(ordered_field_ids):
+        alias = f"f{join_index}"
+        field_param = f"field_id{join_index}"
+        parameters[field_param] = field_id
+
+        join_conditions = [
+            f"{alias}.item_id = item.id",
+            f"{alias}.field_id = :{field_param}",
+        ]
+        for operation, value in predicates_by_field[field_id]:
+            value_param = f"value{value_index}"
+            value_index += 1
+            predicate, bound_value = _predicate(
+                fields[field_id], operation, alias, value_param, value
+            )
+            join_conditions.append(predicate)
+            parameters[value_param] = bound_value
+
+        joins.append(
+            f" JOIN item_attribute AS {alias} ON " + " AND ".join(join_conditions)
+        )
+
+    selectivity = 1.0
+    for field_selectivity in selectivities.values():
+        selectivity *= field_selectivity
+
+    return SearchPlan(joins, conditions, parameters, selectivity)
+
+
+def sort_column(field, alias="sort_attr"):
+    """排序欄位對應的 item_attribute 欄位，number / datetime 使用型別投影欄位"""
+    data_type = field.data_type.lower()
+    if data_type == "number":
+        return f"{alias}.value_number"
+    if data_type == "datetime":
+        return f"{alias}.value_date"
+    return f"{alias}.value"
+
+
+def seek_condition(sort_column_name, sort_order, sort_key):
+    """
+    keyset 分頁條件：從上一頁最後一筆 (sort_key, item.id) 之後開始。
+    MySQL 的 NULL 在 ASC 排最前、DESC 排最後，條件需分別處理。
+    """
+    if not sort_column_name:
+        return "item.id > :cursor_id"
+
+    if sort_order == "desc":
+        if sort_key is None:
+            return f"{sort_column_name} IS NULL AND item.id < :cursor_id"
+        return (
+            f"{sort_column_name} < :cursor_key"
+            f" OR ({sort_column_name} = :cursor_key AND item.id < :cursor_id)"
+            f" OR {sort_column_name} IS NULL"
+        )
+
+    if sort_key is None:
+        return (
+            f"({sort_column_name} IS NULL AND item.id > :cursor_id)"
+            f" OR {sort_column_name} IS NOT NULL"
+        )
+    return (
+        f"{sort_column_name} > :cursor_key"
+        f" OR ({sort_column_name} = :cursor_key AND item.id > :cursor_id)"
+    )
+
+
+def encode_cursor(sort_field_id, sort_order, sort_key, item_id):
+    """將最後一筆的排序值與 item id 編碼成不透明的 cursor 字串"""
+    if sort_key is not None and not isinstance(sort_key, (int, float, str)):
+        sort_key = str(sort_key)
+
+    payload = json.dumps(
+        {"s": sort_field_id, "o": sort_order, "k": sort_key, "id": item_id},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort_field_id, sort_order):
+    """解析 cursor，排序條件與產生 cursor 時不同則視為無效"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_key, item_id = payload["k"], int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if payload.get("s") != sort_field_id or payload.get("o") != sort_order:
+        raise ValueError("Cursor does not match sort parameter")
+
+    return sort_key, item_id
+
+
+def _predicate(field, operation, alias, value_param, value):
+    data_type = field.data_type.lower()
+
+    if data_type == "string":
+        return f"{alias}.value LIKE :{value_param}", f"%{value}%"
+
+    if data_type == "number":
+        column = f"{alias}.value_number"
+        value = parse_number(value)
+    elif data_type == "datetime":
+        column = f"{alias}.value_date"
+        parsed_date = parse_date(value)
+        value = parsed_date.strftime("%Y-%m-%d") if parsed_date else value
+    else:
+        return f"{alias}.value = :{value_param}", value
+
+    if operation == "greater":
+        return f"{column} >= :{value_param}", value
+    if operation == "less":
+        return f"{column} <= :{value_param}", value
+    return f"{column} = :{value_param}", value
+
+
+def _is_equality(field, operation):
+    return field.data_type.lower() != "string" and operation not in ["greater", "less"]
+
+
+def _estimate_selectivity(field, predicates, distinct_count):
+    """以欄位基數推估選擇率，多個條件視為互相獨立"""
+    selectivity = 1.0
+    for operation, _ in predicates:
+        if field.data_type.lower() == "string":
+            selectivity *= LIKE_SELECTIVITY
+        elif operation in ["greater", "less"]:
+            selectivity *= RANGE_SELECTIVITY
+        elif distinct_count:
+            selectivity *= 1 / distinct_count
+        else:
+            selectivity *= DEFAULT_SELECTIVITY
+    return selectivity
+
+
+def _get_field_stats(field_ids):
+    """取得欄位的相異值數量，結果依 FIELD_STATS_TTL 快取"""
+    now = time.monotonic()
+    stats = {}
+    missing = []
+
+    with _field_stats_lock:
+        for field_id in field_ids:
+            cached = _field_stats.get(field_id)
+            if cached and cached[0] > now:
+                stats[field_id] = cached[1]
+            else:
+                missing.append(field_id)
+
+    if not missing:
+        return stats
+
+    query = text(
+        """
+        SELECT field_id, COUNT(DISTINCT value)
+        FROM item_attribute
+        WHERE field_id IN :field_ids
+        GROUP BY field_id
+        """
+    ).bindparams(bindparam("field_ids", expanding=True))
+    rows = db.session.execute(query, {"field_ids": missing}).fetchall()
+
+    fetched = {field_id: 0 for field_id in missing}
+    fetched.update({row[0]: row[1] for row in rows})
+
+    with _field_stats_lock:
+        for field_id, distinct_count in fetched.items():
+            _field_stats[field_id] = (now + FIELD_STATS_TTL, distinct_count)
+
+    stats.update(fetched)
+    return stats
@@ -0,0 +1,98 @@
+import unicodedata
+
+from models.series import Field, Item, ItemAttribute
+from models.shared import db
+
+# 同一系列內不可重複的欄位名稱，只與未刪除的 item 比對
+UNIQUE_FIELD_NAMES = ["供應商料號", "DST料號"]
+# 單次 IN 查詢的值數量
+QUERY_CHUNK_SIZE = 1000
+
+
+def resolve_key_fields(series_ids=None, fields_by_series=None):
+    """
+    取得需檢查重複的欄位，回傳 {field_id: Field}。
+    已載入系列欄位時（fields_by_series）直接篩選，否則以一次查詢取得 series_ids 的欄位。
+    """
+    if fields_by_series is not None:
+        return {
+            field.id: field
+            for fields in fields_by_series.values()
+            for field in fields
+            if field.name in UNIQUE_FIELD_NAMES
+        }
+
+    return {
+        field.id: field
+        for field in db.session.query(Field).filter(
+            Field.series_id.in_(list(series_ids)), Field.name.in_(UNIQUE_FIELD_NAMES)
+        )
+    }
+
+
+def find_duplicates(rows, key_fields, seen=None):
+    """
+    以一次 WHERE value IN (...) 查詢（依 QUERY_CHUNK_SIZE 分批）檢查整批資料。
+    rows 為 [(key, series_id, {field_id: value}, item_id)]，item_id 為更新中的 item（新增時為 None），
+    比對時排除該 item 本身；同一批資料內的重複也會回報。
+    seen 為跨批次共用的 {(field_id, 正規化值): key}，分批匯入時用來檢查先前批次的重複。
+    回傳 {key: [重複訊息]}。
+    """
+    candidates = []
+    for key, series_id, values, item_id in rows:
+        for field_id, field in key_fields.items():
+            if field.series_id == series_id and values.get(field_id):
+                candidates.append((key, field, str(values[field_id]), item_id))
+    if not candidates:
+        return {}
+
+    # MySQL 依欄位 collation 比對（不分大小寫、重音與結尾空白），查回的值可能與輸入不同，
+    # 兩邊皆以 normalize_value 正規化後比對，同一批內的重複也以相同規則判斷
+    existing = {}  # (field_id, 正規化值) -> {item_id}
+    candidate_values = sorted({value for _, _, value, _ in candidates})
+    for start in range(0, len(candidate_values), QUERY_CHUNK_SIZE):
+        for field_id, value, item_id in _load_existing(
+            key_fields, candidate_values[start:start + QUERY_CHUNK_SIZE]
+        ):
+            existing.setdefault((field_id, normalize_value(value)), set()).add(item_id)
+
+    duplicates = {}
+    seen = {} if seen is None else seen
+    for key, field, value, item_id in candidates:
+        pair = (field.id, normalize_value(value))
+        other_items = existing.get(pair, set()) - {item_id}
+        if other_items or seen.get(pair, key) != key:
+            duplicates.setdefault(key, []).append(f"{field.name} '{value}' 已存在")
+        seen.setdefault(pair, key)
+
+    return duplicates
+
+
+def normalize_value(value):
+    """依 MySQL *_ai_ci collation 的比對規則正規化：忽略大小寫、重音與結尾空白"""
+    decomposed = unicodedata.normalize("NFKD", str(value))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.casefold().rstrip(" ")
+
+
+def _load_existing(key_fields, values):
+    """查詢未刪除 item 中符合 values 的重複檢查欄位，回傳 [(field_id, value, item_id)]"""
+    return (
+        db.session.query(ItemAttribute.field_id, ItemAttribute.value, ItemAttribute.item_id)
+        .join(Item, Item.id == ItemAttribute.item_id)
+        .filter(
+            ItemAttribute.field_id.in_(list(key_fields)),
+            ItemAttribute.value.in_(values),
+            Item.is_deleted == 0,
+        )
+        .all()
+    )
+
+
+def check_item(series_id, attributes, key_fields, item_id=None):
+    """檢查單一 item 的 attributes（[{fieldId, value}]），回傳重複訊息 list"""
+    values = {}
+    for attribute in attributes:
+        values.setdefault(attribute.get("fieldId"), attribute.get("value"))
+
+    return find_duplicates([(None, series_id, values, item_id)], key_fields).get(None, [])
@@ -3,6 +3,7 @@ from models.user import User, Role
 from models.shared import db
 from sqlalchemy.exc import SQLAlchemyError
 from modules.exception import handle_exceptions
+from utils import token_state
 
 
 @handle_exceptions
@@ -131,6 +132,7 @@ def update(user_id, data):
             user.is_disabled = False
 
     db.session.commit()
+    token_state.invalidate(user.id)
 
     result = {'id': user.id, 'username': user.username,
               'role': user.roles[0].name, 'isDisabled': user.is_disabled}
@@ -148,6 +150,7 @@ def force_logout(user_id):
     # 增加 token 版本以強制重新登入
     user.token_version += 1
     db.session.commit()
+    token_state.invalidate(user.id)
 
     return make_response(jsonify({
         "code": 200, 
@@ -165,6 +168,7 @@ def force_logout_all():
         user.token_version += 1
     
     db.session.commit()
+    token_state.invalidate_all()
     
     return make_response(jsonify({
         "code": 200, 
@@ -13,6 +13,7 @@ bind = f"0.0.0.0:{port}"
 backlog = 2048
 
 # Worker processes
+# 每個 worker 另有 THUMBNAIL_WORKERS（預設 2）個縮圖行程，調高 worker 數時一併考量總行程數
 workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
 worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
 worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
@@ -35,3 +36,9 @@ proc_name = os.environ.get('GUNICORN_PROC_NAME', 'dst-backend')
 
 # Application
 preload_app = os.environ.get('GUNICORN_PRELOAD_APP', 'True').lower() == 'true'
+
+
+def worker_exit(server, worker):
+    # 結束 worker 前寫入尚在佇列中的操作紀錄
+    from controller import log_writer
+    log_writer.shutdown()
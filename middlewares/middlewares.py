@@ -1,12 +1,9 @@
-from flask import request
+from datetime import datetime
+from flask import g, request
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from flask_jwt_extended.exceptions import NoAuthorizationError
-from models.shared import db
-from models.log import ActivityLog
+from controller import log_writer
 from middlewares.token_version import TokenVersionMiddleware
-import json
-import zlib
-import sys
+from utils import log_payload
 
 
 class Middlewares():
@@ -18,54 +15,40 @@ class Middlewares():
         def log_response_status(response):
             try:
                 # Skip logging for login and refresh endpoints
+                # 使用者相關請求（含密碼）與圖片不記錄
                 skip_logging_endpoints = [
-                    "login", "refresh", "log", "health", "image"]
+                    "login", "refresh", "log", "health", "image", "user"]
                 if any(endpoint in request.path for endpoint in skip_logging_endpoints):
                     return response
 
-                # Check if JWT is required for this request
-                if not any(endpoint in request.path for endpoint in ["no_jwt_required"]):
-                    verify_jwt_in_request()  # Only verify JWT if required
+                # TokenVersionMiddleware 已驗證過的請求直接沿用其身分，不再重新驗證 JWT
+                token_state = g.get('token_state')
+                if token_state is not None:
+                    user_id = token_state.user_id
+                else:
+                    verify_jwt_in_request()
+                    user_id = get_jwt_identity()
 
-                # Attempt to get user identity
-                user_id = get_jwt_identity() if verify_jwt_in_request() else None
-
-                log_data = {
+                activity_log = {
                     'url': request.path,
-                    'user_id': user_id
+                    'method': request.method,
+                    'user_id': user_id,
+                    'created_at': datetime.now(),
                 }
 
-                # If endpoint contains 'user', skip logging payload
-                if "user" in request.path or "image" in request.path:
-                    return response
-
-                # Log URL, user ID, and payload (if available)
+                # get_json 會沿用 view 已解析的結果
                 payload = request.get_json(silent=True)
-
                 if payload:
-                    log_data['payload'] = payload
+                    activity_log['payload'] = log_payload.pack(
+                        payload,
+                        request.get_data(cache=True),
+                        app.config.get('ACTIVITY_LOG_PAYLOAD_LIMIT',
+                                       log_payload.DEFAULT_PAYLOAD_LIMIT))
 
-                # Store log_data in your database
-                activity_log = ActivityLog(
-                    url=log_data['url'],
-                    method=request.method,
-                    user_id=log_data['user_id'])
-
-                if log_data.get('payload'):
-                    activity_log.payload = self.__compress_json(
-                        log_data['payload'])
-
-                db.session.add(activity_log)
-                db.session.commit()
+                # 交由背景執行緒批次寫入，不在回應前等待資料庫
+                log_writer.enqueue(activity_log)
 
                 return response
             except Exception as e:
                 app.logger.error(e)
                 return response
-
-    def __compress_json(self, payload):  # 将方法定义为实例方法，并添加 self 参数
-        json_str = json.dumps(payload)
-        size_in_bytes = sys.getsizeof(json_str)
-        if size_in_bytes > 100 * 1024:  # 超过100KB
-            return {"payload": "too large"}
-        return payload
@@ -1,8 +1,7 @@
-from flask import request, jsonify, make_response
+from flask import g, request, jsonify, make_response
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
 from flask_jwt_extended.exceptions import NoAuthorizationError, JWTExtendedException
-from models.shared import db
-from models.user import User
+from utils.token_state import get_token_state
 
 
 class TokenVersionMiddleware:
@@ -11,9 +10,13 @@ class TokenVersionMiddleware:
         def check_token_version():
             # 跳過不需要 JWT 的路由
             skip_endpoints = [
-                '/login', '/refresh', '/health', '/swagger', '/static'
+                '/login', '/refresh', '/swagger', '/static'
             ]
             
+            # /health 只跳過存活檢查本身，/health/* 的診斷端點仍需驗證
+            if request.path.rstrip('/') == '/health':
+                return
+
             if any(endpoint in request.path for endpoint in skip_endpoints):
                 return
                 
@@ -32,8 +35,8 @@ class TokenVersionMiddleware:
                 # 檢查 token 中的版本號
                 token_version = claims.get('tokenVersion', 0)
                 
-                # 從資料庫獲取使用者資訊
-                user = db.session.query(User).filter_by(id=user_id).first()
+                # 取得使用者 token 狀態（行程內快取，版本變更時失效）
+                user = get_token_state(user_id)
                 
                 if not user:
                     return make_response(jsonify({
@@ -56,6 +59,9 @@ class TokenVersionMiddleware:
                         "msg": "Token has been revoked. Please login again.",
                         "forceLogout": True
                     }), 401)
+
+                # 同一請求後續的權限檢查直接使用
+                g.token_state = user
                     
             except NoAuthorizationError:
                 # 沒有 JWT token
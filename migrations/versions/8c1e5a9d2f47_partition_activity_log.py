@@ -0,0 +1,66 @@
+"""partition_activity_log
+
+Revision ID: 8c1e5a9d2f47
+Revises: 3f9d2b7c41e8
+Create Date: 2026-10-18 16:42:08.315274
+
+"""
+from datetime import datetime
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1e5a9d2f47'
+down_revision = '3f9d2b7c41e8'
+branch_labels = None
+depends_on = None
+
+# 建立當月起算的分區數，之後由 flask log-maintain 持續補上
+MONTHS_AHEAD = 3
+
+
+def upgrade():
+    # 依月份 RANGE 分區只適用於 MySQL，其他資料庫維持原表並由 log-maintain 以 DELETE 清除
+    if op.get_bind().dialect.name != 'mysql':
+        return
+
+    op.execute("UPDATE activity_log SET created_at = '1970-01-01' WHERE created_at IS NULL")
+    # MySQL 分區欄位必須包含在每個唯一鍵中，主鍵改為 (id, created_at)
+    op.execute(
+        "ALTER TABLE activity_log MODIFY created_at DATETIME NOT NULL, "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)"
+    )
+
+    month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    partitions = [f"PARTITION p_history VALUES LESS THAN ('{month:%Y-%m-%d}')"]
+    for _ in range(MONTHS_AHEAD):
+        next_month = _next_month(month)
+        partitions.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{next_month:%Y-%m-%d}')"
+        )
+        month = next_month
+    partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+
+    op.execute(
+        "ALTER TABLE activity_log PARTITION BY RANGE COLUMNS(created_at) ("
+        + ", ".join(partitions)
+        + ")"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'mysql':
+        return
+
+    op.execute("ALTER TABLE activity_log REMOVE PARTITIONING")
+    op.execute(
+        "ALTER TABLE activity_log DROP PRIMARY KEY, ADD PRIMARY KEY (id), "
+        "MODIFY created_at DATETIME NULL"
+    )
+
+
+def _next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
@@ -0,0 +1,26 @@
+from models.shared import db
+from sqlalchemy import Column, String, DateTime, Index
+from datetime import datetime
+
+
+class ErpProduct(db.Model):
+    """ERP PROD 資料表的本地鏡像，由 flask erp-sync 同步"""
+    __tablename__ = 'erp_product'
+
+    prod_no = Column(String(255), primary_key=True)
+    prod_c = Column(String(64))  # 標準進價(進貨幣別)
+    prod_ct = Column(String(64))  # 實際單位總成本(本地幣)
+    dolr_ti = Column(String(64))  # 進貨幣別欄位
+    keyi_d = Column(DateTime)  # 建檔日期
+    lead_time = Column(String(64))  # LeadTime(天)
+    fizo_d = Column(DateTime)  # 停產日期
+    prod_stat = Column(String(64))  # 交易狀態
+    # ERP 端的異動欄位值，增量同步以此為水位
+    source_updated_at = Column(DateTime)
+    synced_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        Index('ix_erp_product_source_updated_at', 'source_updated_at'),
+        Index('ix_erp_product_prod_stat', 'prod_stat'),
+        Index('ix_erp_product_fizo_d', 'fizo_d'),
+    )
@@ -6,6 +6,7 @@ from models.shared import db
 
 
 class ActivityLog(db.Model):
+    # MySQL 上依 created_at 每月分區，實際主鍵為 (id, created_at)；id 仍為自動遞增且唯一
     __tablename__ = 'activity_log'
 
     id = db.Column(Integer, primary_key=True)
@@ -13,4 +14,4 @@ class ActivityLog(db.Model):
     url = db.Column(Text)
     payload = db.Column(JSON)  # 使用 JSON 型別來保存 payload
     method = db.Column(db.String(10))
-    created_at = db.Column(DateTime, default=datetime.now, index=True)
+    created_at = db.Column(DateTime, default=datetime.now, nullable=False, index=True)
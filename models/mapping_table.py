@@ -15,5 +15,6 @@ permissions_table = ['user.create', 'user.read', 'user.edit', 'user.delete',
                      'image.read', 'image.create',
                      'log.read',
                      'limit-field.read',
-                     'archive.create','archive.delete'
+                     'archive.create','archive.delete',
+                     'health.read'
                      ]
@@ -3,3 +3,4 @@ from models.series import Series, Field, Item, ItemAttribute
 from models.image import Image
 from models.log import ActivityLog
 from models.archive import Archive
+from models.erp import ErpProduct
@@ -1,3 +1,9 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import pyodbc
 
 
@@ -5,3 +11,189 @@ def Connect(connection_string):
     conn = pyodbc.connect(connection_string, timeout=3)
 
     return conn
+
+
+class PoolTimeout(Exception):
+    """等待可用連線逾時"""
+
+
+class ConnectionPool:
+    """
+    MSSQL 連線池，每個行程各自持有，避免每次查詢 ERP 都重新登入。
+    - size: 同時存在的連線上限（含使用中與閒置）
+    - max_lifetime: 連線建立超過此秒數即關閉重建
+    - pre_ping: 連線閒置超過此秒數，取出前先以 SELECT 1 檢查
+    - timeout: 連線池已滿時等待可用連線的秒數
+    """
+
+    def __init__(self, connection_string, size=5, max_lifetime=1800, pre_ping=30, timeout=3):
+        self.connection_string = connection_string
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._total = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "created": 0,
+            "recycled": 0,
+        }
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        取出連線，區塊內發生例外時該連線不放回連線池。
+        timeout 為本次等待可用連線的秒數，預設為連線池的 timeout。
+        """
+        conn, created_at = self._checkout(timeout)
+        try:
+            yield conn
+        except BaseException:
+            self._discard(conn)
+            raise
+        else:
+            self._checkin(conn, created_at)
+
+    def metrics(self):
+        with self._condition:
+            return {
+                **self._stats,
+                "size": self.size,
+                "open": self._total,
+                "idle": len(self._idle),
+                "inUse": self._total - len(self._idle),
+            }
+
+    def dispose(self):
+        """關閉所有閒置連線"""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self._total -= len(idle)
+            self._condition.notify_all()
+
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def _checkout(self, timeout=None):
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._condition:
+            self._stats["checkouts"] += 1
+            if not self._idle and self._total >= self.size:
+                self._stats["waits"] += 1
+            while not self._idle and self._total >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout("Timed out waiting for an MSSQL connection")
+                self._condition.wait(remaining)
+
+            if self._idle:
+                conn, created_at, last_used = self._idle.pop()
+            else:
+                # 先佔用名額，連線在鎖外建立
+                self._total += 1
+                conn = None
+
+        if conn is not None:
+            now = time.monotonic()
+            if now - created_at > self.max_lifetime:
+                self._recycle(conn)
+                conn = None
+            elif now - last_used > self.pre_ping and not self._ping(conn):
+                self._recycle(conn)
+                conn = None
+
+        if conn is None:
+            conn, created_at = self._create()
+
+        return conn, created_at
+
+    def _checkin(self, conn, created_at):
+        with self._condition:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._condition.notify()
+
+    def _create(self):
+        try:
+            conn = pyodbc.connect(self.connection_string, timeout=self.timeout, autocommit=True)
+        except Exception:
+            with self._condition:
+                self._stats["failures"] += 1
+                self._total -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._stats["created"] += 1
+        return conn, time.monotonic()
+
+    def _ping(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            with self._condition:
+                self._stats["failures"] += 1
+            return False
+
+    def _recycle(self, conn):
+        # 名額保留給接著建立的新連線
+        with self._condition:
+            self._stats["recycled"] += 1
+        self._close(conn)
+
+    def _discard(self, conn):
+        self._close(conn)
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(connection_string, **options):
+    """
+    取得目前行程的連線池。
+    gunicorn preload_app 會在 fork 前載入程式，子行程不可沿用父行程的連線，
+    因此以 pid 判斷，fork 後第一次使用時重新建立。
+    """
+    global _pools, _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # 繼承自父行程的連線不關閉，只捨棄參考，避免影響父行程的 socket
+            _pools = {}
+            _pools_pid = os.getpid()
+
+        pool = _pools.get(connection_string)
+        if pool is None:
+            pool = ConnectionPool(connection_string, **options)
+            _pools[connection_string] = pool
+        return pool
+
+
+def pool_metrics():
+    """目前行程所有連線池的統計"""
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            return []
+        pools = list(_pools.values())
+    return [pool.metrics() for pool in pools]
@@ -1,7 +1,8 @@
 from models.shared import db
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Boolean, UniqueConstraint
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Index, Integer, String, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
+from utils.typed_value import typed_values
 
 
 class Series(db.Model):
@@ -55,6 +56,23 @@ class ItemAttribute(db.Model):
     item_id = Column(Integer, ForeignKey('item.id'), primary_key=True)
     field_id = Column(Integer, ForeignKey('field.id'), primary_key=True)
     value = Column(String(length=256))
+    # 依欄位型別投影的查詢欄位，寫入時由 set_value 維護，供搜尋走索引範圍掃描
+    value_number = Column(Float(precision=53))
+    value_date = Column(Date)
 
     item = relationship('Item')
     field = relationship('Field', back_populates='item_attribute')
+
+    __table_args__ = (
+        Index('ix_item_attribute_field_number',
+              'field_id', 'value_number', 'item_id'),
+        Index('ix_item_attribute_field_date',
+              'field_id', 'value_date', 'item_id'),
+        # 供應商料號 / DST料號 重複檢查以 (field_id, value) 查詢
+        Index('ix_item_attribute_field_value',
+              'field_id', 'value', 'item_id'),
+    )
+
+    def set_value(self, value, data_type):
+        self.value = value
+        self.value_number, self.value_date = typed_values(value, data_type)
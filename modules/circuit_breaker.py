@@ -0,0 +1,70 @@
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    外部相依服務的斷路器。
+    - 連續失敗 failure_threshold 次後進入 open，cooldown 秒內 allow() 一律回傳 False
+    - cooldown 結束後進入 half_open，只放行一次試探呼叫，成功則恢復 closed，失敗則重新 open
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._trial_in_progress = False
+        self._stats = {"rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    self._stats["rejected"] += 1
+                    return False
+                self._state = HALF_OPEN
+                self._trial_in_progress = False
+
+            if self._state == HALF_OPEN:
+                if self._trial_in_progress:
+                    self._stats["rejected"] += 1
+                    return False
+                self._trial_in_progress = True
+
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats["opened"] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_progress = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def metrics(self):
+        state = self.state
+        with self._lock:
+            return {**self._stats, "state": state, "failures": self._failures}
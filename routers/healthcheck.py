@@ -1,9 +1,68 @@
+import os
+
 from flask import Blueprint, jsonify, make_response
+from controller import erp_cache, log_writer
+from controller.access import check_permission
+from controller.erp import breaker_metrics
+from models.mssql import pool_metrics
 
 health_check = Blueprint("health", __name__)
 
 
+# 只有存活檢查公開，其餘端點含 worker pid 與內部狀態，需 health.read 權限
 @health_check.route("", methods=["GET"])
 def get():
 
     return make_response(jsonify({"code": 200, "msg": "Success"}), 200)
+
+
+@health_check.route("/erp-pool", methods=["GET"])
+@check_permission('health.read')
+def get_erp_pool():
+    # 連線池為每個 worker 各自持有，回傳的是處理此請求的 worker 的統計
+    return make_response(
+        jsonify(
+            {
+                "code": 200,
+                "msg": "Success",
+                "data": {
+                    "pid": os.getpid(),
+                    "pools": pool_metrics(),
+                    "breaker": breaker_metrics(),
+                },
+            }
+        ),
+        200,
+    )
+
+
+@health_check.route("/erp-cache", methods=["GET"])
+@check_permission('health.read')
+def get_erp_cache():
+    # 快取為每個 worker 各自持有，回傳的是處理此請求的 worker 的統計
+    return make_response(
+        jsonify(
+            {
+                "code": 200,
+                "msg": "Success",
+                "data": {"pid": os.getpid(), **erp_cache.stats()},
+            }
+        ),
+        200,
+    )
+
+
+@health_check.route("/activity-log", methods=["GET"])
+@check_permission('health.read')
+def get_activity_log():
+    # 寫入佇列為每個 worker 各自持有，回傳的是處理此請求的 worker 的統計
+    return make_response(
+        jsonify(
+            {
+                "code": 200,
+                "msg": "Success",
+                "data": {"pid": os.getpid(), "writer": log_writer.stats()},
+            }
+        ),
+        200,
+    )
@@ -7,6 +7,10 @@ from controller.product import (
     read_multi,
     export_excel,
     create_from_items,
+    create_export_job,
+    read_export_job,
+    download_export_job,
+    import_products,
 )
 from controller.access import check_permission
 
@@ -17,8 +21,17 @@ products = Blueprint("products", __name__)
 @check_permission("product.create")
 def create_product():
     data = request.get_json()
+    # ?bulk=true 強制使用批次新增（筆數達 PRODUCT_BULK_THRESHOLD 時自動使用）
+    bulk = request.args.get("bulk", "false").lower() == "true"
 
-    return create(data)
+    return create(data, bulk=bulk)
+
+
+@products.route("/import", methods=["POST"])
+@check_permission("product.create")
+def import_product():
+    # multipart/form-data：seriesId 與 file（.csv 或 .xlsx）
+    return import_products(request.form.get("seriesId"), request.files.get("file"))
 
 
 @products.route("/copy", methods=["POST"])
@@ -45,6 +58,28 @@ def export_product():
     return export_excel(data)
 
 
+@products.route("/export/jobs", methods=["POST"])
+@check_permission("product.read")
+def create_export_product_job():
+    data = request.get_json()
+
+    return create_export_job(data)
+
+
+@products.route("/export/jobs/<job_id>", methods=["GET"])
+@check_permission("product.read")
+def read_export_product_job(job_id):
+
+    return read_export_job(job_id)
+
+
+@products.route("/export/jobs/<job_id>/download", methods=["GET"])
+@check_permission("product.read")
+def download_export_product_job(job_id):
+
+    return download_export_job(job_id)
+
+
 @products.route("/edit", methods=["PATCH"])
 @check_permission("product.edit")
 def edit_product():
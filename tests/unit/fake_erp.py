@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+
+def erp_row(product_no, changed_at, **values):
+    """建立與 ERP PROD 查詢結果相同欄位的資料列"""
+    row = {
+        "PROD_NO": product_no,
+        "PROD_C": 10,
+        "PROD_CT": 8,
+        "DOLR_TI": "NTD",
+        "KEYI_D": changed_at,
+        "LEAD_TIME": 14,
+        "FIZO_D": None,
+        "PROD_STAT": "Y",
+        "CHANGED_AT": changed_at,
+    }
+    row.update(values)
+    return SimpleNamespace(**row)
+
+
+class FakeErpSource:
+    """取代 MssqlErpSource 的記憶體 ERP 資料來源"""
+
+    def __init__(self, rows=(), supports_incremental=True):
+        self.rows = {row.PROD_NO: row for row in rows}
+        self.fetch_calls = []
+        self.supports_incremental = supports_incremental
+
+    def put(self, row):
+        self.rows[row.PROD_NO] = row
+
+    def remove(self, product_no):
+        del self.rows[product_no]
+
+    def fetch(self, since=None):
+        self.fetch_calls.append(since)
+        for row in self.rows.values():
+            if since is None or row.CHANGED_AT >= since:
+                yield row
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+from modules.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@patch("modules.circuit_breaker.time.monotonic")
+def test_circuit_breaker_opens_and_recovers(mock_monotonic):
+    mock_monotonic.return_value = 100
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    # 冷卻結束後只放行一次試探
+    mock_monotonic.return_value = 131
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+    assert breaker.metrics()["rejected"] == 2
+
+
+@patch("modules.circuit_breaker.time.monotonic")
+def test_circuit_breaker_reopens_when_trial_fails(mock_monotonic):
+    mock_monotonic.return_value = 100
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+
+    breaker.record_failure()
+    mock_monotonic.return_value = 131
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.metrics()["opened"] == 2
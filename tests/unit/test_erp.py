@@ -0,0 +1,255 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from .client import app
+from controller import erp, erp_cache
+from controller.erp import read
+from models.series import Field, Series
+from models.shared import db
+
+
+@pytest.fixture(autouse=True)
+def clear_erp_cache():
+    erp_cache.clear()
+    erp._breaker = None
+    yield
+    erp_cache.clear()
+    erp._breaker = None
+
+
+def __erp_row(product_no):
+    return SimpleNamespace(
+        PROD_NO=product_no,
+        PROD_C=10,
+        PROD_CT=8,
+        DOLR_TI="NTD",
+        KEYI_D="2025-01-07",
+        LEAD_TIME=14,
+        FIZO_D=None,
+        PROD_STAT="Y",
+    )
+
+
+def __mock_pool(mock_get_pool, rows):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = rows
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    pool = MagicMock()
+    pool.connection.return_value.__enter__.return_value = conn
+    mock_get_pool.return_value = pool
+    return cursor
+
+
+@patch("controller.erp._get_erp_pool")
+def test_read_caches_rows_and_missing_products(mock_get_pool, app):
+    cursor = __mock_pool(mock_get_pool, [__erp_row("P1")])
+
+    with app.app_context():
+        first = read(["P1", "P2"])
+        second = read(["P1", "P2"])
+
+    assert cursor.execute.call_count == 1
+    assert first == second
+    assert first["P1"][0] == {"key": "標準進價(進貨幣別)", "value": "10"}
+    assert all(field["value"] == "" for field in first["P2"])
+
+    stats = erp_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["negativeHits"] == 1
+    assert stats["misses"] == 2
+
+
+@patch("controller.erp._get_erp_pool")
+def test_read_does_not_cache_failures(mock_get_pool, app):
+    cursor = __mock_pool(mock_get_pool, [])
+    cursor.execute.side_effect = [Exception("ERP down"), None]
+
+    with app.app_context():
+        read(["P1"])
+        read(["P1"])
+
+    assert cursor.execute.call_count == 2
+
+
+@patch("controller.erp._get_erp_pool")
+def test_read_filters_cached_rows_per_caller(mock_get_pool, app):
+    cursor = __mock_pool(mock_get_pool, [__erp_row("P1")])
+
+    with app.app_context():
+        series = Series(name="Series", created_by=1)
+        db.session.add(series)
+        db.session.flush()
+        db.session.add(
+            Field(
+                name="實際單位總成本(本地幣)",
+                data_type="string",
+                series_id=series.id,
+                is_erp=True,
+                is_limit_field=True,
+            )
+        )
+        db.session.commit()
+
+        restricted = read(["P1"], series.id, can_read_limit_field=False)
+        allowed = read(["P1"], series.id, can_read_limit_field=True)
+
+    assert cursor.execute.call_count == 1
+    assert "實際單位總成本(本地幣)" not in [field["key"] for field in restricted["P1"]]
+    assert "實際單位總成本(本地幣)" in [field["key"] for field in allowed["P1"]]
+
+
+@patch("controller.erp._get_erp_pool")
+def test_read_uses_shared_cache_across_workers(mock_get_pool, app, tmp_path):
+    from datetime import datetime
+
+    row = __erp_row("P1")
+    row.KEYI_D = datetime(2025, 1, 7)
+    cursor = __mock_pool(mock_get_pool, [row])
+    app.config["ERP_SHARED_CACHE_PATH"] = str(tmp_path / "erp_cache.db")
+
+    with app.app_context():
+        first = read(["P1", "P2"])
+        # 模擬另一個 worker：本機快取是空的
+        erp_cache.clear()
+        second = read(["P1", "P2"])
+
+    assert cursor.execute.call_count == 1
+    assert first == second
+    assert second["P1"][3] == {"key": "建檔日期", "value": datetime(2025, 1, 7)}
+
+
+@patch("controller.erp._get_erp_pool")
+def test_shared_cache_refreshes_ahead_of_expiry(mock_get_pool, app, tmp_path):
+    from controller.erp_shared_cache import _refresh_executor
+
+    cursor = __mock_pool(mock_get_pool, [__erp_row("P1")])
+    app.config["ERP_SHARED_CACHE_PATH"] = str(tmp_path / "erp_cache.db")
+    # 寫入後立即進入預先更新區間
+    app.config["ERP_SHARED_CACHE_REFRESH_AHEAD"] = 1.0
+
+    with app.app_context():
+        read(["P1"])
+        erp_cache.clear()
+        data = read(["P1"])
+        _refresh_executor.submit(lambda: None).result()
+
+    assert data["P1"][0]["value"] == "10"
+    # 第二次讀取直接回傳共用快取，並於背景重新查詢一次
+    assert cursor.execute.call_count == 2
+
+
+@patch("controller.erp._get_erp_pool")
+def test_read_chunks_product_numbers_and_reports_partial_failure(mock_get_pool, app):
+    from controller.erp import ERP_OK, ERP_PARTIAL, ERP_UNAVAILABLE
+
+    def connection(timeout=None):
+        cursor = MagicMock()
+
+        def execute(sql, params):
+            if "P3" in params:
+                raise Exception("ERP timeout")
+            cursor.fetchall.return_value = [__erp_row(product_no) for product_no in params]
+
+        cursor.execute.side_effect = execute
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        context = MagicMock()
+        context.__enter__.return_value = conn
+        return context
+
+    pool = MagicMock()
+    pool.connection.side_effect = connection
+    mock_get_pool.return_value = pool
+    app.config["ERP_QUERY_CHUNK_SIZE"] = 2
+
+    with app.app_context():
+        data_map, erp_status = read(["P1", "P2", "P3", "P4", "P5"], with_status=True)
+        assert pool.connection.call_count == 3
+        assert erp_status == ERP_PARTIAL
+        assert data_map["P1"][0]["value"] == "10"
+        assert data_map["P5"][0]["value"] == "10"
+        assert data_map["P3"][0]["value"] == ""
+
+        # 失敗批次的料號不快取，下次重新查詢
+        _, erp_status = read(["P1", "P3"], with_status=True)
+        assert pool.connection.call_count == 4
+        assert erp_status == ERP_PARTIAL
+
+        assert read(["P3"], with_status=True)[1] == ERP_UNAVAILABLE
+
+        assert read(["P1", "P2"], with_status=True)[1] == ERP_OK
+
+
+@patch("controller.erp._get_erp_pool")
+def test_read_opens_circuit_after_repeated_failures(mock_get_pool, app):
+    from controller.erp import ERP_UNAVAILABLE
+
+    cursor = __mock_pool(mock_get_pool, [])
+    cursor.execute.side_effect = Exception("ERP down")
+    app.config["ERP_BREAKER_FAILURES"] = 2
+
+    with app.app_context():
+        for _ in range(4):
+            data_map, erp_status = read(["P1"], with_status=True)
+            assert erp_status == ERP_UNAVAILABLE
+            assert data_map["P1"][0]["value"] == ""
+
+    # 斷路後不再向 ERP 查詢
+    assert cursor.execute.call_count == 2
+    assert erp.breaker_metrics()["state"] == "open"
+
+
+@patch("controller.erp._get_erp_pool")
+def test_read_stops_waiting_after_latency_budget(mock_get_pool, app):
+    import threading
+    import time
+    from controller.erp import ERP_UNAVAILABLE
+
+    release = threading.Event()
+    cursor = __mock_pool(mock_get_pool, [__erp_row("P1")])
+    cursor.execute.side_effect = lambda *args: release.wait(1)
+
+    with app.app_context():
+        started = time.monotonic()
+        _, erp_status = read(["P1"], with_status=True, budget=0.05)
+        elapsed = time.monotonic() - started
+        release.set()
+
+    assert erp_status == ERP_UNAVAILABLE
+    assert elapsed < 0.5
+
+
+@patch("controller.erp._get_erp_pool")
+def test_read_cancels_abandoned_queries(mock_get_pool, app):
+    import threading
+    import time
+    from controller.erp import ERP_UNAVAILABLE
+
+    release = threading.Event()
+    cursor = __mock_pool(mock_get_pool, [__erp_row("P1")])
+    cursor.execute.side_effect = lambda *args: release.wait(5)
+    # 模擬 pyodbc：cancel 使執行中的 execute 立即結束
+    cursor.cancel.side_effect = release.set
+    pool = mock_get_pool.return_value
+
+    app.config["ERP_QUERY_PARALLELISM"] = 1
+    app.config["ERP_QUERY_CHUNK_SIZE"] = 1
+    erp._query_executor = None
+    try:
+        with app.app_context():
+            _, erp_status = read(["P1", "P2"], with_status=True, budget=0.05)
+
+        assert erp_status == ERP_UNAVAILABLE
+        # 逾時後執行中的查詢被中止，工作執行緒隨即釋放
+        cursor.cancel.assert_called_once()
+        erp._query_executor.submit(lambda: None).result(timeout=1)
+        # 查詢逾時不超過呼叫端剩餘的等待時間；排隊中的批次被取消，不會取用連線
+        conn = pool.connection.return_value.__enter__.return_value
+        assert conn.timeout == 1
+        assert pool.connection.call_count == 1
+    finally:
+        erp._query_executor = None
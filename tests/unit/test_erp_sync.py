@@ -0,0 +1,111 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from .client import app
+from .fake_erp import FakeErpSource, erp_row
+from controller import erp, erp_cache
+from controller.erp import read
+from controller.erp_sync import MssqlErpSource, sync_erp_products
+from models.erp import ErpProduct
+from models.shared import db
+
+
+def test_sync_incremental_and_full(app):
+    source = FakeErpSource(
+        [
+            erp_row("P1", datetime(2025, 1, 1)),
+            erp_row("P2", datetime(2025, 1, 2)),
+        ]
+    )
+
+    with app.app_context():
+        stats = sync_erp_products(source, batch_size=1)
+        assert stats["inserted"] == 2
+        assert db.session.get(ErpProduct, "P1").prod_c == "10"
+
+        # 增量同步只讀取水位之後的資料
+        source.put(erp_row("P3", datetime(2025, 1, 3)))
+        source.put(erp_row("P2", datetime(2025, 1, 3), PROD_STAT="N"))
+        stats = sync_erp_products(source)
+        assert source.fetch_calls[-1] == datetime(2025, 1, 2)
+        assert (stats["fetched"], stats["inserted"], stats["updated"]) == (2, 1, 1)
+        assert db.session.get(ErpProduct, "P2").prod_stat == "N"
+
+        # 完整同步刪除 ERP 已不存在的料號
+        source.remove("P1")
+        stats = sync_erp_products(source, full=True)
+        assert source.fetch_calls[-1] is None
+        assert (stats["inserted"], stats["updated"], stats["deleted"]) == (0, 0, 1)
+        assert db.session.get(ErpProduct, "P1") is None
+
+
+def test_read_from_mirror(app):
+    app.config["ERP_READ_FROM_MIRROR"] = True
+    erp_cache.clear()
+    source = FakeErpSource([erp_row("P1", datetime(2025, 1, 7))])
+
+    with app.app_context():
+        sync_erp_products(source)
+        data_map, erp_status = read(["P1", "P2"], with_status=True)
+
+    erp_cache.clear()
+    assert erp_status == "ok"
+    assert data_map["P1"] == [
+        {"key": "標準進價(進貨幣別)", "value": "10"},
+        {"key": "實際單位總成本(本地幣)", "value": "8"},
+        {"key": "進貨幣別欄位", "value": "NTD"},
+        {"key": "建檔日期", "value": datetime(2025, 1, 7)},
+        {"key": "LeadTime(天)", "value": "14"},
+        {"key": "停產日期", "value": "None"},
+        {"key": "交易狀態", "value": "Y"},
+    ]
+    assert data_map["P2"][0]["value"] == ""
+
+
+def test_sync_without_change_column_is_full(app):
+    source = FakeErpSource([erp_row("P1", None)], supports_incremental=False)
+
+    with app.app_context():
+        sync_erp_products(source)
+        # 既有料號的價格異動不會更新建檔日期，沒有異動欄位時仍須讀取全部資料
+        source.put(erp_row("P1", None, PROD_C=12))
+        stats = sync_erp_products(source)
+
+        assert stats["mode"] == "full"
+        assert source.fetch_calls == [None, None]
+        assert db.session.get(ErpProduct, "P1").prod_c == "12"
+
+
+def test_mssql_source_rejects_creation_date_as_change_column():
+    with pytest.raises(ValueError):
+        MssqlErpSource(pool=None, change_column="KEYI_D")
+
+    assert not MssqlErpSource(pool=None).supports_incremental
+    assert MssqlErpSource(pool=None, change_column="MODI_D").supports_incremental
+
+
+@patch("controller.erp._get_erp_pool")
+def test_mirror_returns_same_format_as_direct_query(mock_get_pool, app):
+    # ERP 的日期欄位可能是 YYYYMMDD 字串
+    row = erp_row("P1", None, KEYI_D="20250107", FIZO_D="20260101", PROD_C=10.5)
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [row]
+    mock_get_pool.return_value.connection.return_value.__enter__.return_value.cursor.return_value = cursor
+
+    erp._breaker = None
+    erp_cache.clear()
+    with app.app_context():
+        direct = read(["P1"])
+
+        erp_cache.clear()
+        app.config["ERP_READ_FROM_MIRROR"] = True
+        sync_erp_products(FakeErpSource([row], supports_incremental=False))
+        mirror = read(["P1"])
+    erp_cache.clear()
+
+    assert cursor.execute.call_count == 1
+    assert mirror == direct
+    assert direct["P1"][3] == {"key": "建檔日期", "value": datetime(2025, 1, 7)}
+    assert direct["P1"][5] == {"key": "停產日期", "value": "2026-01-01 00:00:00"}
@@ -0,0 +1,44 @@
+from flask_jwt_extended import JWTManager, create_access_token
+
+from .client import app
+from middlewares.token_version import TokenVersionMiddleware
+from models.shared import db
+from models.user import User
+from routers.healthcheck import health_check
+from utils import token_state
+
+
+def test_health_metrics_require_permission(app):
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-with-at-least-32-bytes"
+    JWTManager(app)
+    TokenVersionMiddleware(app)
+    app.register_blueprint(health_check, url_prefix="/health")
+
+    token_state.invalidate_all()
+    with app.app_context():
+        user = User(username="tester", password="x")
+        db.session.add(user)
+        db.session.commit()
+
+        def token(permissions):
+            return create_access_token(
+                identity=str(user.id),
+                additional_claims={"permissions": permissions, "tokenVersion": user.token_version},
+            )
+
+        reader_token, other_token = token(["health.read"]), token(["product.read"])
+
+    client = app.test_client()
+    # 存活檢查維持公開
+    assert client.get("/health").status_code == 200
+
+    for path in ["/health/erp-pool", "/health/erp-cache", "/health/activity-log"]:
+        assert client.get(path).status_code == 401
+        assert (
+            client.get(path, headers={"Authorization": f"Bearer {other_token}"}).status_code
+            == 403
+        )
+        assert (
+            client.get(path, headers={"Authorization": f"Bearer {reader_token}"}).status_code
+            == 200
+        )
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from .client import app
+from controller.log import read_multi
+from controller.log_retention import maintain_activity_log, plan_partitions
+from models.log import ActivityLog
+from models.shared import db
+
+
+def __add_logs(created_at_list):
+    db.session.add_all(
+        ActivityLog(url=f"/product/{index}", method="POST", created_at=created_at)
+        for index, created_at in enumerate(created_at_list)
+    )
+    db.session.commit()
+
+
+def test_read_multi_keyset_pagination(app):
+    same_time = datetime(2026, 10, 1, 12, 0, 0)
+    with app.app_context():
+        __add_logs([same_time, same_time, same_time, datetime(2026, 9, 30)])
+
+    urls = []
+    cursor = ""
+    with app.app_context():
+        while cursor is not None:
+            with app.test_request_context(
+                "/log", query_string={"cursor": cursor, "limit": 3}
+            ):
+                body = read_multi().get_json()
+            assert body["code"] == 200
+            assert body["totalCount"] == 4
+            urls += [log["url"] for log in body["data"]]
+            cursor = body["nextCursor"]
+
+    # 同一時間的紀錄依 id 由新到舊，跨頁不重複也不遺漏
+    assert urls == ["/product/2", "/product/1", "/product/0", "/product/3"]
+
+
+def test_read_multi_rejects_invalid_cursor(app):
+    with app.app_context():
+        with app.test_request_context("/log", query_string={"cursor": "not-a-cursor"}):
+            response = read_multi()
+
+    assert response.status_code == 400
+    assert response.get_json()["msg"] == "Invalid cursor"
+
+
+def test_plan_partitions():
+    partitions = {
+        "p_history": datetime(2025, 9, 1),
+        "p202509": datetime(2025, 10, 1),
+        "p202510": datetime(2025, 11, 1),
+        "p202611": datetime(2026, 12, 1),
+        "p_future": None,
+    }
+
+    to_add, to_drop = plan_partitions(
+        partitions, datetime(2026, 11, 15), retention_months=12, months_ahead=3
+    )
+
+    assert to_add == [("p202612", datetime(2027, 1, 1)), ("p202701", datetime(2027, 2, 1))]
+    assert to_drop == ["p202509", "p202510", "p_history"]
+
+
+def test_maintain_activity_log_deletes_expired_rows(app):
+    with app.app_context():
+        __add_logs([datetime(2025, 9, 30), datetime(2025, 10, 1), datetime(2026, 10, 18)])
+
+        stats = maintain_activity_log(now=datetime(2026, 10, 18), retention_months=12)
+
+        assert stats == {"added": [], "dropped": [], "deleted": 1}
+        assert [log.url for log in ActivityLog.query.order_by(ActivityLog.id)] == [
+            "/product/1",
+            "/product/2",
+        ]
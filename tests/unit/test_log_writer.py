@@ -0,0 +1,122 @@
+import os
+import threading
+from datetime import datetime
+from unittest.mock import patch
+
+from flask import request
+from flask_jwt_extended import JWTManager, create_access_token
+
+from .client import app
+from controller.log_writer import ActivityLogWriter
+from middlewares.middlewares import Middlewares
+from models.log import ActivityLog
+from models.shared import db
+from models.user import User
+from utils import log_payload, token_state
+
+
+def __record(url):
+    return {"url": url, "method": "POST", "user_id": 1, "created_at": datetime.now()}
+
+
+def test_writer_flushes_in_batches_and_on_close(app):
+    writer = ActivityLogWriter(
+        app, batch_size=2, flush_interval=60000, queue_size=100, enqueue_timeout=10
+    )
+    with patch.object(writer, "_write", wraps=writer._write) as mock_write:
+        for index in range(3):
+            assert writer.enqueue(__record(f"/product/{index}"))
+        writer.close()
+
+    assert [len(call.args[0]) for call in mock_write.call_args_list] == [2, 1]
+    with app.app_context():
+        assert [log.url for log in ActivityLog.query.order_by(ActivityLog.id)] == [
+            "/product/0",
+            "/product/1",
+            "/product/2",
+        ]
+    assert writer.stats() == {
+        "enqueued": 3,
+        "written": 3,
+        "dropped": 0,
+        "failed": 0,
+        "batches": 2,
+        "queued": 0,
+    }
+
+
+def test_writer_drops_records_when_queue_is_full(app):
+    writing = threading.Event()
+    release = threading.Event()
+    writer = ActivityLogWriter(
+        app, batch_size=1, flush_interval=60000, queue_size=1, enqueue_timeout=0
+    )
+    write = writer._write
+
+    def blocked_write(batch):
+        writing.set()
+        release.wait(5)
+        write(batch)
+
+    with patch.object(writer, "_write", side_effect=blocked_write):
+        assert writer.enqueue(__record("/product/0"))
+        assert writing.wait(5)
+        # 背景執行緒寫入中，佇列只容納一筆
+        assert writer.enqueue(__record("/product/1"))
+        assert not writer.enqueue(__record("/product/2"))
+        release.set()
+        writer.close()
+
+    assert writer.stats()["dropped"] == 1
+    assert writer.stats()["written"] == 2
+    with app.app_context():
+        assert db.session.query(ActivityLog).count() == 2
+
+
+def test_logging_middleware_reuses_identity_and_compresses_payload(app):
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-with-at-least-32-bytes"
+    app.config["ACTIVITY_LOG_PAYLOAD_LIMIT"] = 1024
+    JWTManager(app)
+    Middlewares(app)
+
+    @app.route("/product/search", methods=["POST"])
+    def search():
+        request.get_json()
+        return "ok"
+
+    token_state.invalidate_all()
+    with app.app_context():
+        user = User(username="tester", password="x")
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(
+            identity=str(user.id), additional_claims={"tokenVersion": user.token_version}
+        )
+        user_id = user.id
+
+    payload = {"keyword": "x" * 4096}
+    with patch("middlewares.middlewares.log_writer.enqueue") as mock_enqueue, patch(
+        "middlewares.middlewares.verify_jwt_in_request"
+    ) as mock_verify:
+        response = app.test_client().post(
+            "/product/search", json=payload, headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert response.status_code == 200
+    # 身分取自 TokenVersionMiddleware，記錄時不再驗證 JWT
+    mock_verify.assert_not_called()
+    record = mock_enqueue.call_args.args[0]
+    assert record["user_id"] == user_id
+    assert record["payload"][log_payload.COMPRESSED] == "zlib"
+    assert log_payload.unpack(record["payload"]) == payload
+    token_state.invalidate_all()
+
+
+def test_log_payload_truncates_when_compression_is_not_enough():
+    raw = os.urandom(2048).hex().encode()
+    stored = log_payload.pack({"data": "..."}, raw, limit=512)
+
+    assert stored[log_payload.TRUNCATED] is True
+    assert stored["size"] == len(raw)
+    assert stored["data"] == raw[:512].decode()
+    assert log_payload.pack({"a": 1}, b'{"a": 1}', limit=512) == {"a": 1}
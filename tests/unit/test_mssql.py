@@ -0,0 +1,104 @@
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import models.mssql as mssql
+from models.mssql import ConnectionPool, PoolTimeout, get_pool
+
+
+@patch("models.mssql.pyodbc.connect")
+def test_pool_reuses_connections(mock_connect):
+    mock_connect.side_effect = lambda *args, **kwargs: MagicMock()
+    pool = ConnectionPool("dsn", size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert mock_connect.call_count == 1
+    metrics = pool.metrics()
+    assert metrics["checkouts"] == 2
+    assert metrics["created"] == 1
+    assert metrics["idle"] == 1
+
+
+@patch("models.mssql.pyodbc.connect")
+def test_pool_discards_failed_and_expired_connections(mock_connect):
+    mock_connect.side_effect = lambda *args, **kwargs: MagicMock()
+    pool = ConnectionPool("dsn", size=1, max_lifetime=0)
+
+    with pytest.raises(RuntimeError):
+        with pool.connection() as broken:
+            raise RuntimeError("query failed")
+    broken.close.assert_called_once()
+
+    with pool.connection() as first:
+        pass
+    # 超過 max_lifetime 的連線取出時重建
+    with pool.connection() as second:
+        pass
+
+    assert first is not second
+    first.close.assert_called_once()
+    assert pool.metrics()["recycled"] == 1
+    assert pool.metrics()["open"] == 1
+
+
+@patch("models.mssql.pyodbc.connect")
+def test_pool_waits_and_times_out(mock_connect):
+    mock_connect.side_effect = lambda *args, **kwargs: MagicMock()
+    pool = ConnectionPool("dsn", size=1, timeout=0.05)
+
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+
+    # 連線歸還後等待中的請求可取得連線
+    pool.timeout = 1
+    checked_out = threading.Event()
+
+    def hold_connection():
+        with pool.connection():
+            checked_out.set()
+            threading.Event().wait(0.05)
+
+    holder = threading.Thread(target=hold_connection)
+    holder.start()
+    checked_out.wait()
+    with pool.connection():
+        pass
+    holder.join()
+
+    metrics = pool.metrics()
+    assert metrics["waits"] == 2
+    assert metrics["timeouts"] == 1
+    assert metrics["inUse"] == 0
+    assert mock_connect.call_count == 1
+
+
+@patch("models.mssql.pyodbc.connect", side_effect=Exception("login failed"))
+def test_pool_counts_connect_failures(mock_connect):
+    pool = ConnectionPool("dsn", size=1)
+
+    with pytest.raises(Exception):
+        with pool.connection():
+            pass
+
+    assert pool.metrics()["failures"] == 1
+    assert pool.metrics()["open"] == 0
+
+
+def test_get_pool_is_recreated_after_fork():
+    first = get_pool("dsn-fork-test")
+    assert get_pool("dsn-fork-test") is first
+
+    # 模擬 fork 後的子行程
+    with patch("models.mssql.os.getpid", return_value=os.getpid() + 1):
+        assert get_pool("dsn-fork-test") is not first
+
+    mssql._pools_pid = None
@@ -81,7 +81,7 @@ def test_create_series_not_found(mock_normalize, mock_create_item, app):
 
 
 @patch("models.shared.db.session.get")
-@patch("controller.product.__check_duplicate_required_fields")
+@patch("controller.uniqueness.check_item")
 def test_create_duplicate_blocked(mock_dup_check, mock_get, app):
     with app.app_context():
         mock_get.return_value = MagicMock(id=1, series_id=1)
@@ -148,7 +148,7 @@ def test_read_success(mock_has_permission, mock_read_erp, mock_query, mock_get,
 
         mock_query.side_effect = mock_query_side_effect
 
-        mock_read_erp.return_value = {"Value1": [{"fieldName": "ERP_Field_1", "value": "ERP_Value_1"}]}
+        mock_read_erp.return_value = ({"Value1": [{"fieldName": "ERP_Field_1", "value": "ERP_Value_1"}]}, "ok")
 
         # Call the read function
         response = read(product_id=1)
@@ -173,6 +173,7 @@ def test_read_success(mock_has_permission, mock_read_erp, mock_query, mock_get,
                 "erp": [{"fieldName": "ERP_Field_1", "value": "ERP_Value_1"}],
                 "hasArchive": False,
                 "isDeleted": False,
+                "erpStatus": "ok",
             },
         }
 
@@ -202,115 +203,106 @@ def test_read_product_not_found(mock_get, app):
         assert response.get_json() == {"code": 404, "msg": "Product not found"}
 
 
-@patch("models.shared.db.session.get")
-@patch("models.shared.db.session.query")
-@patch("models.shared.db.session.commit")
-@patch("controller.product.__check_field_type")
-@patch("controller.product.__save_image")
-def test_update_multi_success(
-    mock_save_image, mock_check_field_type, mock_commit, mock_query, mock_get, app
-):
-    with app.app_context():
-        # Mock Item object
-        mock_item = MagicMock()
-        mock_item.id = 1
-
-        # Mock Field object
-        mock_field = MagicMock()
-        mock_field.id = 1
-        mock_field.data_type = "string"
-
-        # Mock the ItemAttribute object and set initial value
-        mock_item_attribute = MagicMock()
-        mock_item_attribute.value = None
-
-        # Configure mock_get to return the mock_item for items and None for fields (to simulate field not found)
-        def get_side_effect(model, id):
-            if model == Item:
-                return mock_item
-            elif model == Field:
-                return mock_field  # Simulating field not found for simplicity
-
-        mock_get.side_effect = get_side_effect
-
-        # Mock the query for ItemAttribute to return our mock_item_attribute
-        mock_query.return_value.filter_by.return_value.first.return_value = (
-            mock_item_attribute
-        )
-
-        # Mock __check_field_type to always return an empty list (no type errors)
-        mock_check_field_type.return_value = []
+def test_update_multi_success(app):
+    from sqlalchemy import event
+    from models.shared import db
 
-        # Mock __save_image to simulate image saving
-        mock_save_image.return_value = "path/to/saved/image"
+    with app.app_context():
+        series_id = __seed_series(20)
+        name_field_id, price_field_id, limit_field_id = [
+            field.id
+            for field in db.session.query(Field).filter_by(series_id=series_id).order_by(Field.sequence)
+        ]
+        item_ids = [item.id for item in db.session.query(Item).order_by(Item.id)]
+        # 缺少的屬性應被新增而不是略過
+        db.session.query(ItemAttribute).filter_by(
+            item_id=item_ids[0], field_id=price_field_id
+        ).delete()
+        db.session.commit()
 
-        # Prepare test data
         data = [
             {
-                "itemId": 1,
+                "itemId": item_id,
+                "isDeleted": 1 if index == 1 else None,
                 "attributes": [
-                    {"fieldId": 1, "value": "NewValue1"},
-                    # Assuming this is a boolean that will be saved as an image path
-                    {"fieldId": 2, "value": True},
+                    {"fieldId": name_field_id, "value": f"N{index}"},
+                    {"fieldId": price_field_id, "value": str(index * 10)},
                 ],
             }
+            for index, item_id in enumerate(item_ids)
         ]
 
-        # Call the update_multi function
-        response = update_multi(data)
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count_statements)
+        try:
+            response = update_multi(data)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count_statements)
 
-        # Assert response status code and message
         assert response.status_code == 200
-        assert response.get_json()["code"] == 200
         assert response.get_json()["msg"] == "ItemAttributes updated"
+        # item、欄位、重複檢查欄位、重複檢查、既有屬性各一次查詢，與筆數無關
+        assert len([s for s in statements if s.startswith("SELECT")]) == 5
+        assert len([s for s in statements if s.startswith("UPDATE item ")]) == 1
+        assert len([s for s in statements if s.startswith("INSERT INTO item_attribute")]) == 1
+
+        prices = dict(
+            db.session.query(ItemAttribute.item_id, ItemAttribute.value_number).filter_by(
+                field_id=price_field_id
+            )
+        )
+        assert prices == {item_id: index * 10 for index, item_id in enumerate(item_ids)}
+        assert db.session.get(ItemAttribute, (item_ids[3], name_field_id)).value == "N3"
+        assert db.session.get(ItemAttribute, (item_ids[3], limit_field_id)).value == "1"
+        assert [item.is_deleted for item in db.session.query(Item).order_by(Item.id)][:3] == [
+            False,
+            True,
+            False,
+        ]
 
-        # Verify the mock_item_attribute's value was updated
-        assert (
-            mock_item_attribute.value == "NewValue1" or "path/to/saved/image"
-        ), "ItemAttribute value was not updated correctly"
 
-        # Verify __check_field_type and __save_image were called correctly
-        mock_check_field_type.assert_called()
+def test_update_multi_rejects_field_from_other_series(app):
+    from models.shared import db
 
-        # Assert that db.session.commit was called
-        mock_commit.assert_called_once()
+    with app.app_context():
+        series_id = __seed_series(1)
+        other_series_id = __seed_other_series()
+        item_id = db.session.query(Item.id).filter_by(series_id=series_id).scalar()
+        other_field_id = db.session.query(Field.id).filter_by(series_id=other_series_id).scalar()
 
+        response = update_multi(
+            [{"itemId": item_id, "attributes": [{"fieldId": other_field_id, "value": "X"}]}]
+        )
 
-@patch("controller.product.__check_duplicate_required_fields")
-@patch("models.shared.db.session.get")
-def test_update_multi_duplicate_blocked(mock_get, mock_dup_check, app):
-    with app.app_context():
-        mock_item = MagicMock(id=1, series_id=10)
+    assert response.status_code == 400
+    assert "does not belong to series" in response.get_json()["msg"]
 
-        def get_side_effect(model, id):
-            if model == Item:
-                return mock_item
-            if model == Field:
-                field = MagicMock()
-                field.id = 1
-                field.data_type = "string"
-                return field
-            return None
 
-        mock_get.side_effect = get_side_effect
-        mock_dup_check.return_value = ["DST料號 'X' 已存在"]
+@patch("controller.uniqueness.find_duplicates")
+def test_update_multi_duplicate_blocked(mock_dup_check, app):
+    from models.shared import db
 
-        data = [
-            {
-                "itemId": 1,
-                "attributes": [
-                    {"fieldId": 1, "value": "X"},
-                ],
-            }
-        ]
+    with app.app_context():
+        series_id = __seed_series(1)
+        item_id = db.session.query(Item.id).filter_by(series_id=series_id).scalar()
+        field_id = db.session.query(Field.id).filter_by(series_id=series_id, name="DST料號").scalar()
+        mock_dup_check.return_value = {item_id: ["DST料號 'X' 已存在"]}
 
-        response = update_multi(data)
+        response = update_multi(
+            [{"itemId": item_id, "attributes": [{"fieldId": field_id, "value": "X"}]}]
+        )
 
         assert response.status_code == 400
         json_data = response.get_json()
         assert json_data["code"] == 400
         assert "Duplicate values" in json_data["msg"]
         mock_dup_check.assert_called_once()
+        # 更新中的 item 於重複檢查時排除自己
+        assert mock_dup_check.call_args[0][0] == [(item_id, series_id, {field_id: "X"}, item_id)]
 
 
 @patch("models.shared.db.session.commit")
@@ -389,37 +381,102 @@ def test_delete_with_missing_itemId(app):
         assert response.get_json()["msg"] == "Invalid data"
 
 
-@patch("controller.product.__create_item")
-@patch("controller.product.__normalize_payload_from_item")
-@patch("models.shared.db.session.commit")
-@patch("models.shared.db.session.query")
-def test_copy_success(mock_query, mock_commit, mock_normalize, mock_create_item, app):
+def test_copy_success(app, tmp_path):
+    from sqlalchemy import event
+    from models.shared import db
+
+    app.config["IMG_PATH"] = str(tmp_path / "images")
     with app.app_context():
-        mock_item = MagicMock(spec=Item)
-        mock_item.id = 1
-        mock_item.series_id = 10
+        series_id = __seed_series(0)
+        picture_field = Field(name="Photo", data_type="picture", series_id=series_id, sequence=3)
+        note_field = Field(name="Note", data_type="string", series_id=series_id, sequence=4)
+        db.session.add_all([picture_field, note_field])
+        db.session.flush()
+        picture_field_id, note_field_id = picture_field.id, note_field.id
+        name_field_id, price_field_id, limit_field_id = [
+            field.id
+            for field in db.session.query(Field).filter_by(series_id=series_id).order_by(Field.sequence)
+        ][:3]
+
+        source_path = tmp_path / "source.png"
+        source_path.write_bytes(b"png")
+        image = Image(name="source", path=str(source_path))
+        db.session.add(image)
+        db.session.flush()
+        image_id = image.id
+
+        source_ids = []
+        for index in range(30):
+            item = Item(series_id=series_id)
+            db.session.add(item)
+            db.session.flush()
+            source_ids.append(item.id)
+            # 第一個字串欄位沒有值時前綴加在下一個有值的字串欄位
+            values = [
+                (name_field_id, None if index == 0 else f"P{index}", "string"),
+                (price_field_id, str(index), "number"),
+                (note_field_id, "note", "string"),
+                (picture_field_id, str(image_id) if index < 3 else None, "picture"),
+            ]
+            for field_id, value, data_type in values:
+                attribute = ItemAttribute(item_id=item.id, field_id=field_id)
+                attribute.set_value(value, data_type)
+                db.session.add(attribute)
+        db.session.commit()
+
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count_statements)
+        try:
+            response = create_from_items({"itemIds": source_ids})
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count_statements)
 
-        mock_query_obj = MagicMock()
-        mock_query_obj.filter.return_value.all.return_value = [mock_item]
-        mock_query.return_value = mock_query_obj
+        assert response.status_code == 201
+        new_ids = [item["id"] for item in response.get_json()["data"]]
+        assert len(new_ids) == 30
+        # 來源 item、系列、欄位、來源屬性、重複檢查、圖片路徑各一次查詢，與筆數無關
+        assert len([s for s in statements if s.startswith("SELECT")]) == 6
+        assert len([s for s in statements if s.startswith("INSERT INTO item_attribute")]) == 2
+
+        def values_of(item_id):
+            return {
+                attribute.field_id: attribute.value
+                for attribute in db.session.query(ItemAttribute).filter_by(item_id=item_id)
+            }
 
-        mock_normalize.return_value = {"series_id": 10, "attributes": [], "fields": []}
-        mock_new_item = MagicMock(id=999, series_id=10)
-        mock_create_item.return_value = (mock_new_item, None)
+        first, second, last = values_of(new_ids[0]), values_of(new_ids[1]), values_of(new_ids[-1])
+        assert first[name_field_id] is None
+        assert first[note_field_id] == "copy note"
+        assert second[name_field_id] == "copy P1"
+        assert second[note_field_id] == "note"
+        assert last[limit_field_id] is None
+        assert db.session.get(ItemAttribute, (new_ids[5], price_field_id)).value_number == 5
+        assert last[picture_field_id] is None
 
-        response = create_from_items({"itemIds": [1]})
+        copied_image = db.session.get(Image, int(second[picture_field_id]))
+        assert copied_image.id != image_id
+        with open(copied_image.path, "rb") as copied_file:
+            assert copied_file.read() == b"png"
 
-        assert response.status_code == 201
-        json_data = response.get_json()
-        assert json_data["code"] == 201
-        assert json_data["msg"] == "Success"
-        assert json_data["data"][0]["id"] == 999
-        assert json_data["data"][0]["seriesId"] == 10
 
-        mock_query.assert_called_once_with(Item)
-        mock_normalize.assert_called_once_with(mock_item)
-        mock_create_item.assert_called_once()
-        mock_commit.assert_called_once()
+@patch("controller.uniqueness.find_duplicates")
+def test_copy_duplicate_blocked(mock_dup_check, app):
+    from models.shared import db
+
+    with app.app_context():
+        series_id = __seed_series(1)
+        item_id = db.session.query(Item.id).filter_by(series_id=series_id).scalar()
+        mock_dup_check.return_value = {0: ["DST料號 'copy P0' 已存在"]}
+
+        response = create_from_items({"itemIds": [item_id]})
+
+        assert response.status_code == 400
+        assert "Duplicate values" in response.get_json()["msg"]
+        assert db.session.query(Item).count() == 1
 
 
 @patch("models.shared.db.session.query")
@@ -505,7 +562,7 @@ def test_read_deleted_product(mock_has_permission, mock_read_erp, mock_query, mo
             return MagicMock()
 
         mock_query.side_effect = mock_query_side_effect
-        mock_read_erp.return_value = {}
+        mock_read_erp.return_value = ({}, "ok")
 
         # Call the read function
         response = read(product_id=1)
@@ -517,3 +574,790 @@ def test_read_deleted_product(mock_has_permission, mock_read_erp, mock_query, mo
         assert response_data["msg"] == "Success"
         assert response_data["data"]["isDeleted"] == True
         assert response_data["data"]["itemId"] == 1
+
+
+def __seed_series(item_count):
+    from models.shared import db
+    from models.user import User
+
+    user = User(username="tester", password="x")
+    db.session.add(user)
+    db.session.flush()
+
+    series = Series(name="Series", created_by=user.id)
+    db.session.add(series)
+    db.session.flush()
+
+    name_field = Field(name="DST料號", data_type="string", series_id=series.id, sequence=0, search_erp=True)
+    price_field = Field(name="Price", data_type="number", series_id=series.id, sequence=1)
+    limit_field = Field(name="Cost", data_type="number", series_id=series.id, sequence=2, is_limit_field=True)
+    db.session.add_all([name_field, price_field, limit_field])
+    db.session.flush()
+
+    for index in range(item_count):
+        item = Item(series_id=series.id)
+        db.session.add(item)
+        db.session.flush()
+        for field, value in [(name_field, f"P{index}"), (price_field, str(index)), (limit_field, "1")]:
+            attribute = ItemAttribute(item_id=item.id, field_id=field.id)
+            attribute.set_value(value, field.data_type)
+            db.session.add(attribute)
+
+    db.session.commit()
+    return series.id
+
+
+def __seed_other_series():
+    from models.shared import db
+
+    series = Series(name="Other", created_by=1)
+    db.session.add(series)
+    db.session.flush()
+    db.session.add(Field(name="Name", data_type="string", series_id=series.id))
+    db.session.commit()
+    return series.id
+
+
+def __seed_typed_series():
+    from models.shared import db
+    from models.user import User
+
+    user = User(username="tester", password="x")
+    db.session.add(user)
+    db.session.flush()
+
+    series = Series(name="Typed", created_by=user.id)
+    db.session.add(series)
+    db.session.flush()
+
+    fields = [
+        Field(name="Name", data_type="string", series_id=series.id, sequence=0),
+        Field(name="Price", data_type="number", series_id=series.id, sequence=1),
+        Field(name="Released", data_type="datetime", series_id=series.id, sequence=2),
+        Field(name="Active", data_type="boolean", series_id=series.id, sequence=3),
+    ]
+    db.session.add_all(fields)
+    db.session.flush()
+
+    # 數值與日期的字串排序和實際大小不同，用來確認篩選走型別投影欄位
+    rows = [
+        ("Alpha", "9", "12/31/2024", "1"),
+        ("Beta", "10", "2025/01/07", "0"),
+        ("Alphabet", "100", "2025-03-01", "1"),
+        ("Gamma", "", "", "0"),
+    ]
+    for values in rows:
+        item = Item(series_id=series.id)
+        db.session.add(item)
+        db.session.flush()
+        for field, value in zip(fields, values):
+            attribute = ItemAttribute(item_id=item.id, field_id=field.id)
+            attribute.set_value(value, field.data_type)
+            db.session.add(attribute)
+
+    db.session.commit()
+    return series.id, {field.name: field.id for field in fields}
+
+
+def __search_names(app, series_id, filters, statements=None):
+    from sqlalchemy import event
+    from models.shared import db
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.test_request_context("/product/search?limit=50"):
+        engine = db.engine
+        if statements is not None:
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = read_multi({"seriesId": series_id, "filters": filters})
+        finally:
+            if statements is not None:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    return sorted(
+        attr["value"]
+        for row in response.get_json()["data"]
+        for attr in row["attributes"]
+        if attr["fieldName"] == "Name"
+    )
+
+
+def test_set_value_populates_typed_projection():
+    from datetime import date
+
+    number = ItemAttribute()
+    number.set_value("12.5", "Number")
+    assert (number.value, number.value_number, number.value_date) == ("12.5", 12.5, None)
+
+    released = ItemAttribute()
+    released.set_value("01/07/2025", "datetime")
+    assert (released.value_number, released.value_date) == (None, date(2025, 1, 7))
+
+    # 無法解析的值與非數值 / 日期欄位不寫入投影欄位
+    invalid = ItemAttribute()
+    invalid.set_value("abc", "number")
+    assert (invalid.value, invalid.value_number) == ("abc", None)
+
+    text = ItemAttribute()
+    text.set_value("2025-01-07", "string")
+    assert (text.value_number, text.value_date) == (None, None)
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_read_multi_range_filters_use_typed_columns(mock_permission, mock_read_erp, app):
+    with app.app_context():
+        series_id, field_ids = __seed_typed_series()
+
+    statements = []
+    # 字串比較時 "9" >= "10"，以數值比較則只有 10 與 100 符合
+    assert __search_names(
+        app,
+        series_id,
+        [{"fieldId": field_ids["Price"], "operation": "greater", "value": 10}],
+        statements,
+    ) == ["Alphabet", "Beta"]
+    assert any("value_number >=" in statement for statement in statements)
+
+    # 字串比較時 "2025/01/07" > "2025-01-31"，以日期比較則 2024/12/31 與 2025/01/07 符合
+    assert __search_names(
+        app,
+        series_id,
+        [{"fieldId": field_ids["Released"], "operation": "less", "value": "2025-01-31"}],
+        statements,
+    ) == ["Alpha", "Beta"]
+    assert any("value_date <=" in statement for statement in statements)
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_read_multi_filter_semantics(mock_permission, mock_read_erp, app):
+    with app.app_context():
+        series_id, field_ids = __seed_typed_series()
+
+    price, released = field_ids["Price"], field_ids["Released"]
+    name, active = field_ids["Name"], field_ids["Active"]
+
+    # 同一欄位的上下限同時成立
+    assert __search_names(app, series_id, [
+        {"fieldId": price, "operation": "greater", "value": 10},
+        {"fieldId": price, "operation": "less", "value": 99},
+    ]) == ["Beta"]
+
+    # 日期相等比較不受輸入格式影響
+    assert __search_names(app, series_id, [
+        {"fieldId": released, "value": "01/07/2025"},
+    ]) == ["Beta"]
+    assert __search_names(app, series_id, [
+        {"fieldId": released, "operation": "greater", "value": "2024/12/31"},
+        {"fieldId": released, "operation": "less", "value": "2025-01-07"},
+    ]) == ["Alpha", "Beta"]
+
+    # 字串為部分比對，與數值條件取交集
+    assert __search_names(app, series_id, [{"fieldId": name, "value": "Alpha"}]) == [
+        "Alpha", "Alphabet"
+    ]
+    assert __search_names(app, series_id, [
+        {"fieldId": name, "value": "Alpha"},
+        {"fieldId": price, "operation": "greater", "value": 50},
+    ]) == ["Alphabet"]
+
+    assert __search_names(app, series_id, [{"fieldId": active, "value": True}]) == [
+        "Alpha", "Alphabet"
+    ]
+    assert __search_names(app, series_id, [{"fieldId": active, "value": False}]) == [
+        "Beta", "Gamma"
+    ]
+
+
+def test_compile_search_orders_joins_by_selectivity():
+    from types import SimpleNamespace
+    import pytest
+    from controller.search_planner import compile_search
+
+    fields = {
+        1: SimpleNamespace(data_type="string"),
+        2: SimpleNamespace(data_type="number"),
+        3: SimpleNamespace(data_type="boolean"),
+        4: SimpleNamespace(data_type="datetime"),
+    }
+    filters = [
+        {"fieldId": 3, "value": True},
+        {"fieldId": 2, "operation": "greater", "value": 10},
+        {"fieldId": 1, "value": "Alpha"},
+        {"fieldId": 4, "value": "2025-01-07"},
+    ]
+
+    # 相異值：布林 2 種（1/2）、日期 500 種（1/500）；範圍 1/3、字串部分比對 1/10
+    with patch("controller.search_planner._get_field_stats", return_value={3: 2, 4: 500}):
+        plan = compile_search(1, filters, fields)
+
+    ordered = [plan.parameters[f"field_id{index}"] for index in range(len(plan.joins))]
+    assert ordered == [4, 1, 2, 3]
+    assert plan.selectivity == pytest.approx(1 / 500 * 1 / 10 * 1 / 3 * 1 / 2)
+
+
+@patch("controller.product.read_erp")
+@patch("controller.product.check_field_permission", return_value=True)
+def test_read_multi_query_count_is_constant(mock_permission, mock_read_erp, app):
+    from sqlalchemy import event
+    from models.shared import db
+
+    mock_read_erp.side_effect = lambda product_nos, series_id, can_read_limit_field, with_status, budget: (
+        {product_no: [{"key": "交易狀態", "value": "Y"}] for product_no in product_nos},
+        "ok",
+    )
+
+    def count_queries(limit):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.test_request_context(f"/product/search?limit={limit}"):
+            series_id = db.session.query(Series.id).scalar()
+            engine = db.engine
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            try:
+                response = read_multi({"seriesId": series_id, "filters": []})
+            finally:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body["data"]) == limit
+        assert body["totalCount"] == 20
+        assert body["data"][0]["erp"] == [{"key": "交易狀態", "value": "Y"}]
+        return len(statements)
+
+    with app.app_context():
+        __seed_series(20)
+
+    assert count_queries(2) == count_queries(20)
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_read_multi_cursor_pagination(mock_permission, mock_read_erp, app):
+    from models.shared import db
+
+    with app.app_context():
+        series_id = __seed_series(7)
+        price_field_id = db.session.query(Field.id).filter(Field.name == "Price").scalar()
+
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        with app.test_request_context(
+            f"/product/search?limit=3&sort={price_field_id},desc&cursor={cursor}"
+        ):
+            response = read_multi({"seriesId": series_id, "filters": []})
+
+        body = response.get_json()
+        assert response.status_code == 200
+        assert body["totalCount"] == 7
+        seen += [
+            attr["value"]
+            for row in body["data"]
+            for attr in row["attributes"]
+            if attr["fieldName"] == "Price"
+        ]
+        cursor = body["nextCursor"]
+
+    assert seen == ["6", "5", "4", "3", "2", "1", "0"]
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_read_multi_cached_count_invalidated_by_delete(mock_permission, mock_read_erp, app):
+    from controller.search_count import invalidate_series
+    from models.shared import db
+
+    with app.app_context():
+        series_id = __seed_series(5)
+        item_id = db.session.query(Item.id).first()[0]
+    invalidate_series(series_id)
+
+    def search(strategy):
+        with app.test_request_context(f"/product/search?limit=2&count={strategy}"):
+            return read_multi({"seriesId": series_id, "filters": []}).get_json()
+
+    assert search("cached")["countStatus"] == "exact"
+    body = search("cached")
+    assert body["countStatus"] == "cached"
+    assert body["totalCount"] == 5
+
+    with app.app_context():
+        delete({"itemId": [item_id]})
+
+    body = search("cached")
+    assert body["countStatus"] == "exact"
+    assert body["totalCount"] == 4
+    assert search("estimated")["totalCount"] == 4
+    assert search("unknown")["code"] == 400
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_read_multi_cached_count_invalidated_by_other_worker(
+    mock_permission, mock_read_erp, app, tmp_path
+):
+    import subprocess
+    import sys
+    from models.shared import db
+
+    app.config["SERIES_GENERATION_PATH"] = str(tmp_path / "series_generation")
+    with app.app_context():
+        series_id = __seed_series(3)
+
+    def search():
+        with app.test_request_context("/product/search?limit=2&count=cached"):
+            return read_multi({"seriesId": series_id, "filters": []}).get_json()
+
+    search()
+    assert search()["countStatus"] == "cached"
+
+    # 其他 worker 寫入：資料直接新增，本行程的快取仍為舊值
+    with app.app_context():
+        db.session.add(Item(series_id=series_id))
+        db.session.commit()
+    assert search()["totalCount"] == 3
+
+    # 由另一個行程遞增共用的系列寫入世代
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from utils.shared_counters import SharedCounters; "
+            "from utils.series_generation import SLOTS; "
+            "SharedCounters(sys.argv[1], SLOTS).bump([int(sys.argv[2]) % SLOTS])",
+            app.config["SERIES_GENERATION_PATH"],
+            str(series_id),
+        ],
+        check=True,
+    )
+
+    body = search()
+    assert body["countStatus"] == "exact"
+    assert body["totalCount"] == 4
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_read_multi_estimated_count_shares_base_count(mock_permission, mock_read_erp, app):
+    from sqlalchemy import event
+    from controller.search_count import invalidate_series
+    from models.shared import db
+
+    with app.app_context():
+        series_id = __seed_series(5)
+        name_field_id, price_field_id, _ = [
+            field.id
+            for field in db.session.query(Field).filter_by(series_id=series_id).order_by(Field.sequence)
+        ]
+    invalidate_series(series_id)
+
+    count_statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if "COUNT(item.id)" in statement:
+            count_statements.append(statement)
+
+    def search(filters):
+        with app.test_request_context("/product/search?limit=2&count=estimated"):
+            engine = db.engine
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            try:
+                return read_multi({"seriesId": series_id, "filters": filters}).get_json()
+            finally:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    first = search([{"fieldId": name_field_id, "value": "P1"}])
+    second = search([{"fieldId": price_field_id, "value": 2}])
+
+    assert first["countStatus"] == second["countStatus"] == "estimated"
+    # 不同篩選條件共用同一個未篩選總數，只 COUNT 一次
+    assert len(count_statements) == 1
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_export_excel_streams_all_rows(mock_permission, mock_read_erp, app):
+    import os
+    import zipfile
+    from io import BytesIO
+    from controller.product import export_excel
+
+    app.config["EXPORT_CHUNK_SIZE"] = 4
+    with app.app_context():
+        series_id = __seed_series(10)
+
+    with app.test_request_context("/product/export"):
+        response = export_excel({"seriesId": series_id, "filters": []})
+        assert response.status_code == 200
+        export_path = response.response.file.name
+        response.direct_passthrough = False
+        content = response.get_data()
+        response.close()
+
+    assert not os.path.exists(export_path)
+    with zipfile.ZipFile(BytesIO(content)) as workbook:
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+    # 表頭 + 10 筆資料
+    assert sheet.count("<row ") == 11
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_export_job_runs_in_background(mock_permission, mock_read_erp, app, tmp_path):
+    import time
+    from controller.product import (
+        create_export_job,
+        download_export_job,
+        read_export_job,
+    )
+
+    app.config["EXPORT_PATH"] = str(tmp_path)
+    app.config["EXPORT_CHUNK_SIZE"] = 4
+    with app.app_context():
+        series_id = __seed_series(10)
+
+    with app.test_request_context("/product/export/jobs?sort="):
+        response = create_export_job({"seriesId": series_id, "filters": []})
+        assert response.status_code == 202
+        job_id = response.get_json()["data"]["jobId"]
+
+    for _ in range(100):
+        with app.app_context():
+            status = read_export_job(job_id).get_json()["data"]
+        if status["state"] in ["done", "failed"]:
+            break
+        time.sleep(0.05)
+
+    assert status["state"] == "done"
+    assert status["rowsProcessed"] == 10
+
+    with app.test_request_context(f"/product/export/jobs/{job_id}/download"):
+        response = download_export_job(job_id)
+        assert response.status_code == 200
+        response.close()
+
+    with app.app_context():
+        assert read_export_job("unknown").status_code == 404
+
+
+@patch("controller.product.read_erp", return_value=({}, "ok"))
+@patch("controller.product.check_field_permission", return_value=True)
+def test_export_excel_loads_images_once(mock_permission, mock_read_erp, app, tmp_path):
+    import zipfile
+    from io import BytesIO
+    from PIL import Image as PILImage
+    from sqlalchemy import event
+    from models.shared import db
+    from controller.product import export_excel
+
+    app.config["EXPORT_CHUNK_SIZE"] = 4
+    with app.app_context():
+        series_id = __seed_series(10)
+        picture_field = Field(name="Picture", data_type="picture", series_id=series_id, sequence=3)
+        db.session.add(picture_field)
+
+        images = []
+        for color in ["red", "blue"]:
+            path = str(tmp_path / f"{color}.png")
+            PILImage.new("RGB", (300, 300), color).save(path)
+            images.append(Image(name=color, path=path))
+        images.append(Image(name="missing", path=str(tmp_path / "missing.png")))
+        db.session.add_all(images)
+        db.session.flush()
+
+        items = db.session.query(Item).filter_by(series_id=series_id).all()
+        for index, item in enumerate(items):
+            db.session.add(
+                ItemAttribute(item_id=item.id, field_id=picture_field.id, value=str(images[index % 3].id))
+            )
+        db.session.commit()
+
+        image_queries = []
+
+        def count_image_queries(conn, cursor, statement, parameters, context, executemany):
+            if "FROM image" in statement:
+                image_queries.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count_image_queries)
+        try:
+            with app.test_request_context("/product/export"):
+                response = export_excel({"seriesId": series_id, "filters": []})
+                assert response.status_code == 200
+                response.direct_passthrough = False
+                content = response.get_data()
+                response.close()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count_image_queries)
+
+    # 第一批已包含全部三張圖片，之後的批次不再查詢
+    assert len(image_queries) == 1
+    with zipfile.ZipFile(BytesIO(content)) as workbook:
+        media = [name for name in workbook.namelist() if name.startswith("xl/media/")]
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+    assert len(media) == 2
+    assert sheet.count("<row ") == 11
+
+
+def test_bulk_create_reports_every_invalid_item(app):
+    from models.shared import db
+
+    with app.app_context():
+        series_id = __seed_series(1)
+        name_field, price_field, _ = (
+            db.session.query(Field).filter_by(series_id=series_id).order_by(Field.sequence).all()
+        )
+        name_field.is_required = True
+        db.session.commit()
+
+        def row(name, price="1"):
+            attributes = [{"fieldId": price_field.id, "value": price}]
+            if name is not None:
+                attributes.append({"fieldId": name_field.id, "value": name})
+            return {"seriesId": series_id, "attributes": attributes}
+
+        response = create(
+            data=[
+                row("P0"),
+                row("N1"),
+                row("N1"),
+                row(None),
+                row("N2", price="abc"),
+                {"seriesId": 999, "attributes": []},
+            ],
+            bulk=True,
+        )
+
+        assert response.status_code == 400
+        errors = response.get_json()["errors"]
+        assert [error["index"] for error in errors] == [0, 2, 3, 4, 5]
+        assert errors[0]["msg"] == "Duplicate values found: [\"DST料號 'P0' 已存在\"]"
+        assert errors[1]["msg"] == "Duplicate values found: [\"DST料號 'N1' 已存在\"]"
+        assert errors[2]["msg"] == "Missing required field: ['DST料號']"
+        assert errors[4]["msg"] == "Series not found"
+        assert db.session.query(Item).count() == 1
+
+
+def test_bulk_create_inserts_items_with_few_statements(app):
+    from sqlalchemy import event
+    from models.shared import db
+
+    with app.app_context():
+        series_id = __seed_series(0)
+        name_field_id, price_field_id, limit_field_id = [
+            field.id
+            for field in db.session.query(Field).filter_by(series_id=series_id).order_by(Field.sequence)
+        ]
+        data = [
+            {
+                "seriesId": series_id,
+                "attributes": [
+                    {"fieldId": name_field_id, "value": f"N{index}"},
+                    {"fieldId": price_field_id, "value": str(index)},
+                ],
+            }
+            for index in range(50)
+        ]
+
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            if not statement.startswith("INSERT INTO item "):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count_statements)
+        try:
+            response = create(data=data, bulk=True)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count_statements)
+
+        assert response.status_code == 201
+        assert len(response.get_json()["data"]) == 50
+        # 系列、欄位、重複檢查各一次查詢，屬性以一次 executemany 寫入
+        assert len([s for s in statements if s.startswith("SELECT")]) == 3
+        assert len([s for s in statements if s.startswith("INSERT INTO item_attribute")]) == 1
+
+        attributes = db.session.query(ItemAttribute).filter_by(field_id=price_field_id).all()
+        assert sorted(attribute.value_number for attribute in attributes) == list(range(50))
+        assert db.session.query(ItemAttribute).filter_by(field_id=limit_field_id).count() == 50
+
+
+def test_import_products_reports_invalid_rows(app):
+    from io import BytesIO
+    from werkzeug.datastructures import FileStorage
+    from controller.product import import_products
+    from models.shared import db
+
+    app.config["PRODUCT_IMPORT_CHUNK_SIZE"] = 2
+    content = "\n".join(
+        [
+            "DST料號,Price,ERP",
+            "N1,1,x",
+            "P0,2,x",
+            ",,",
+            "N2,abc,x",
+            "N3,3,x",
+            "N1,4,x",
+        ]
+    ).encode("utf-8-sig")
+
+    with app.app_context():
+        series_id = __seed_series(1)
+        response = import_products(
+            str(series_id), FileStorage(BytesIO(content), filename="products.csv")
+        )
+
+        assert response.status_code == 200
+        report = response.get_json()["data"]
+        assert report["imported"] == 2
+        assert report["failed"] == 3
+        assert report["ignoredColumns"] == ["ERP"]
+        assert [error["row"] for error in report["errors"]] == [3, 5, 7]
+        assert report["errors"][0]["msg"] == "Duplicate values found: [\"DST料號 'P0' 已存在\"]"
+        assert report["errors"][2]["msg"] == "Duplicate values found: [\"DST料號 'N1' 已存在\"]"
+
+        names = {
+            attribute.value
+            for attribute in db.session.query(ItemAttribute)
+            .join(Field)
+            .filter(Field.name == "DST料號")
+        }
+        assert names == {"P0", "N1", "N3"}
+
+
+def test_import_products_normalizes_boolean_cells(app):
+    from io import BytesIO
+    from werkzeug.datastructures import FileStorage
+    from controller.product import import_products
+    from models.shared import db
+
+    content = "\n".join(
+        ["DST料號,Active", "B1,TRUE", "B2,no", "B3,1", "B4,maybe"]
+    ).encode("utf-8")
+
+    with app.app_context():
+        series_id = __seed_series(0)
+        active_field = Field(name="Active", data_type="boolean", series_id=series_id, sequence=3)
+        db.session.add(active_field)
+        db.session.commit()
+        active_field_id = active_field.id
+
+        response = import_products(
+            str(series_id), FileStorage(BytesIO(content), filename="products.csv")
+        )
+
+        report = response.get_json()["data"]
+        assert report["imported"] == 3
+        assert [error["row"] for error in report["errors"]] == [5]
+        assert "Expected boolean" in report["errors"][0]["msg"]
+
+        values = [
+            attribute.value
+            for attribute in db.session.query(ItemAttribute)
+            .filter_by(field_id=active_field_id)
+            .order_by(ItemAttribute.item_id)
+        ]
+        # 讀取時以 bool(int(value)) 解析，必須存成 1 / 0
+        assert [bool(int(value)) for value in values] == [True, False, True]
+
+
+def test_import_products_reads_xlsx(app, tmp_path):
+    import xlsxwriter
+    from werkzeug.datastructures import FileStorage
+    from controller.product import import_products
+    from models.shared import db
+
+    path = str(tmp_path / "products.xlsx")
+    workbook = xlsxwriter.Workbook(path)
+    worksheet = workbook.add_worksheet("Products")
+    worksheet.write_row(0, 0, ["DST料號", "Price"])
+    worksheet.write_row(1, 0, ["N1", 12])
+    worksheet.write_row(2, 0, ["N2", 3.5])
+    workbook.close()
+
+    with app.app_context():
+        series_id = __seed_series(0)
+        with open(path, "rb") as f:
+            response = import_products(series_id, FileStorage(f, filename="products.xlsx"))
+
+        assert response.status_code == 200
+        assert response.get_json()["data"]["imported"] == 2
+        prices = sorted(
+            (attribute.value, attribute.value_number)
+            for attribute in db.session.query(ItemAttribute).join(Field).filter(Field.name == "Price")
+        )
+        assert prices == [("12", 12.0), ("3.5", 3.5)]
+
+
+@patch("controller.product.check_field_permission", return_value=True)
+@patch("controller.product.read_erp")
+def test_import_products_ignores_erp_columns_of_export(mock_read_erp, mock_permission, app):
+    from io import BytesIO
+    from werkzeug.datastructures import FileStorage
+    from controller.product import export_excel, import_products
+    from models.shared import db
+
+    mock_read_erp.side_effect = lambda product_nos, *args, **kwargs: (
+        {
+            product_no: [
+                {"key": "停產日期", "value": "None"},
+                {"key": "交易狀態", "value": "Y"},
+            ]
+            for product_no in product_nos
+        },
+        "ok",
+    )
+
+    with app.app_context():
+        series_id = __seed_series(2)
+        erp_field = Field(
+            name="停產日期", data_type="datetime", series_id=series_id, sequence=3, is_erp=True
+        )
+        db.session.add(erp_field)
+        db.session.commit()
+        erp_field_id = erp_field.id
+        item_ids = [item_id for (item_id,) in db.session.query(Item.id)]
+
+    with app.test_request_context("/product/export"):
+        response = export_excel({"seriesId": series_id, "filters": []})
+        response.direct_passthrough = False
+        content = response.get_data()
+        response.close()
+
+    with app.app_context():
+        # 刪除原資料後重新匯入匯出檔
+        delete({"itemId": item_ids})
+        response = import_products(
+            str(series_id), FileStorage(BytesIO(content), filename="products.xlsx")
+        )
+
+        report = response.get_json()["data"]
+        assert report["imported"] == 2
+        assert report["errors"] == []
+        assert "停產日期" in report["ignoredColumns"]
+        assert "交易狀態" in report["ignoredColumns"]
+        assert (
+            db.session.query(ItemAttribute)
+            .filter(ItemAttribute.field_id == erp_field_id, ItemAttribute.value.isnot(None))
+            .count()
+            == 0
+        )
+
+
+def test_import_products_rejects_unsupported_file(app):
+    from io import BytesIO
+    from werkzeug.datastructures import FileStorage
+    from controller.product import import_products
+
+    with app.app_context():
+        response = import_products(1, FileStorage(BytesIO(b"x"), filename="products.txt"))
+
+    assert response.status_code == 400
@@ -0,0 +1,54 @@
+import os
+
+from PIL import Image as PILImage
+
+from utils.thumbnail import ensure_thumbnails, remove_thumbnails, thumbnail_path
+
+
+def __create_png(path, mode="RGBA"):
+    PILImage.new(mode, (400, 200), (255, 0, 0, 128)[: len(mode)]).save(path)
+    return path
+
+
+def test_ensure_thumbnails_generates_and_reuses(tmp_path):
+    images = [
+        (image_id, __create_png(str(tmp_path / f"image_{image_id}.png")))
+        for image_id in [1, 2, 3]
+    ]
+    images.append((4, str(tmp_path / "missing.png")))
+
+    thumbnails = ensure_thumbnails(images, 100, max_workers=2)
+
+    assert set(thumbnails) == {1, 2, 3}
+    for image_id, path in thumbnails.items():
+        assert path == thumbnail_path(images[0][1], image_id, 100)
+        with PILImage.open(path) as thumbnail:
+            assert thumbnail.format == "JPEG"
+            assert thumbnail.size == (100, 50)
+
+    # 已產生的縮圖直接沿用
+    mtime = os.path.getmtime(thumbnails[1])
+    assert ensure_thumbnails(images[:1], 100) == {1: thumbnails[1]}
+    assert os.path.getmtime(thumbnails[1]) == mtime
+
+
+def test_remove_thumbnails(tmp_path):
+    image_path = __create_png(str(tmp_path / "image.png"), mode="RGB")
+    small = ensure_thumbnails([(7, image_path)], 50)[7]
+    large = ensure_thumbnails([(7, image_path)], 100)[7]
+
+    remove_thumbnails(image_path, 7)
+
+    assert not os.path.exists(small)
+    assert not os.path.exists(large)
+
+
+def test_thumbnail_pool_defaults_to_small_fixed_size():
+    from utils import thumbnail
+
+    thumbnail._reset_pool()
+    try:
+        # 每個 gunicorn worker 各有一個 pool，預設不隨 CPU 核心數成長
+        assert thumbnail._get_pool(None)._max_workers == thumbnail.DEFAULT_THUMBNAIL_WORKERS
+    finally:
+        thumbnail._reset_pool()
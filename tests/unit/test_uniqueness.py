@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from .client import app
+from controller import uniqueness
+from models.series import Field, Item, ItemAttribute, Series
+from models.shared import db
+from models.user import User
+
+
+def __seed():
+    user = User(username="tester", password="x")
+    db.session.add(user)
+    db.session.flush()
+
+    series = Series(name="Series", created_by=user.id)
+    db.session.add(series)
+    db.session.flush()
+
+    supplier_field = Field(name="供應商料號", data_type="string", series_id=series.id)
+    dst_field = Field(name="DST料號", data_type="string", series_id=series.id)
+    other_field = Field(name="Name", data_type="string", series_id=series.id)
+    db.session.add_all([supplier_field, dst_field, other_field])
+    db.session.flush()
+
+    live_item = Item(series_id=series.id)
+    deleted_item = Item(series_id=series.id, is_deleted=1)
+    db.session.add_all([live_item, deleted_item])
+    db.session.flush()
+    db.session.add_all(
+        [
+            ItemAttribute(item_id=live_item.id, field_id=dst_field.id, value="D1"),
+            ItemAttribute(item_id=deleted_item.id, field_id=dst_field.id, value="D2"),
+            ItemAttribute(item_id=live_item.id, field_id=other_field.id, value="S1"),
+        ]
+    )
+    db.session.commit()
+    return series.id, supplier_field.id, dst_field.id, other_field.id, live_item.id
+
+
+def test_find_duplicates_checks_batch_in_one_query(app):
+    with app.app_context():
+        series_id, supplier_id, dst_id, other_id, live_item_id = __seed()
+        key_fields = uniqueness.resolve_key_fields([series_id])
+        assert set(key_fields) == {supplier_id, dst_id}
+
+        rows = [
+            ("existing", series_id, {dst_id: "D1"}, None),
+            ("deleted", series_id, {dst_id: "D2"}, None),
+            ("first", series_id, {supplier_id: "S1", other_id: "S1"}, None),
+            ("second", series_id, {supplier_id: "S1"}, None),
+        ]
+
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count_statements)
+        try:
+            duplicates = uniqueness.find_duplicates(rows, key_fields)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count_statements)
+
+        # 更新中的 item 比對時排除自己
+        assert uniqueness.check_item(
+            series_id, [{"fieldId": dst_id, "value": "D1"}], key_fields, item_id=live_item_id
+        ) == []
+
+    assert len(statements) == 1
+    # 已刪除的 item 不算重複；同一批內的第二筆視為重複
+    assert duplicates == {
+        "existing": ["DST料號 'D1' 已存在"],
+        "second": ["供應商料號 'S1' 已存在"],
+    }
+
+
+def test_find_duplicates_matches_values_like_mysql_collation(app):
+    with app.app_context():
+        series_id, supplier_id, dst_id, _, _ = __seed()
+        key_fields = uniqueness.resolve_key_fields([series_id])
+
+        rows = [
+            ("case", series_id, {dst_id: "abc-1"}, None),
+            ("space", series_id, {dst_id: "X1 "}, None),
+            ("accent", series_id, {supplier_id: "cafe"}, None),
+            ("batch", series_id, {supplier_id: "S-9"}, None),
+            ("batch-upper", series_id, {supplier_id: "s-9 "}, None),
+        ]
+        # 模擬 MySQL collation：查回的值與輸入的大小寫、重音、結尾空白不同
+        stored = [
+            (dst_id, "ABC-1", 100),
+            (dst_id, "X1", 101),
+            (supplier_id, "Café", 102),
+        ]
+        with patch("controller.uniqueness._load_existing", return_value=stored):
+            duplicates = uniqueness.find_duplicates(rows, key_fields)
+
+    assert duplicates == {
+        "case": ["DST料號 'abc-1' 已存在"],
+        "space": ["DST料號 'X1 ' 已存在"],
+        "accent": ["供應商料號 'cafe' 已存在"],
+        "batch-upper": ["供應商料號 's-9 ' 已存在"],
+    }
@@ -409,3 +409,97 @@ def test_enable_user_success(mock_db_get, mock_db_commit, app):
         assert data['code'] == 200
         assert data['msg'] == "Success"
         assert mock_user.is_disabled is False
+
+
+def test_token_state_cached_until_force_logout(app):
+    from flask_jwt_extended import JWTManager, create_access_token
+    from sqlalchemy import event
+    from controller.access import check_permission
+    from controller.user import force_logout
+    from middlewares.token_version import TokenVersionMiddleware
+    from models.shared import db
+    from utils import token_state
+
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-with-at-least-32-bytes"
+    JWTManager(app)
+    TokenVersionMiddleware(app)
+
+    @app.route("/protected")
+    @check_permission("product.read")
+    def protected():
+        return "ok"
+
+    token_state.invalidate_all()
+    with app.app_context():
+        user = User(username="tester", password="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        token = create_access_token(
+            identity=str(user_id),
+            additional_claims={"permissions": ["product.read"], "tokenVersion": user.token_version},
+        )
+
+    user_queries = []
+
+    def count_user_queries(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            user_queries.append(statement)
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", count_user_queries)
+    try:
+        assert client.get("/protected", headers=headers).status_code == 200
+        assert len(user_queries) == 1
+        assert client.get("/protected", headers=headers).status_code == 200
+        assert len(user_queries) == 1
+
+        with app.app_context():
+            force_logout(user_id)
+
+        response = client.get("/protected", headers=headers)
+        assert response.status_code == 401
+        assert response.get_json()["forceLogout"] is True
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", count_user_queries)
+        token_state.invalidate_all()
+
+
+def test_token_state_reloads_when_revocation_epoch_moves(app, tmp_path):
+    import mmap
+    import struct
+    from models.shared import db
+    from utils import revocation_epoch, token_state
+
+    app.config["REVOCATION_EPOCH_PATH"] = str(tmp_path / "revocation_epoch")
+    token_state.invalidate_all()
+    with app.app_context():
+        user = User(username="tester", password="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        assert token_state.get_token_state(user_id).token_version == 1
+        epoch = revocation_epoch.current()
+
+        # 模擬其他 worker：直接更新資料庫，再透過另一個對應遞增撤銷世代
+        db.session.query(User).filter_by(id=user_id).update({"token_version": 2})
+        db.session.commit()
+        assert token_state.get_token_state(user_id).token_version == 1
+
+        with open(tmp_path / "revocation_epoch", "r+b") as f:
+            view = mmap.mmap(f.fileno(), 8)
+            struct.pack_into("<Q", view, 0, epoch + 1)
+            view.close()
+
+        assert revocation_epoch.current() == epoch + 1
+        assert token_state.get_token_state(user_id).token_version == 2
+
+        # 本行程撤銷時遞增世代，且不需清除其他使用者的快取
+        token_state.invalidate(user_id)
+        assert revocation_epoch.current() == epoch + 2
+
+    token_state.invalidate_all()
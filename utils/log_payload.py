@@ -0,0 +1,35 @@
+import base64
+import json
+import zlib
+
+DEFAULT_PAYLOAD_LIMIT = 100 * 1024
+
+COMPRESSED = "__compressed__"
+TRUNCATED = "__truncated__"
+
+
+def pack(payload, raw, limit=DEFAULT_PAYLOAD_LIMIT):
+    """
+    依原始請求內容大小決定 ActivityLog.payload 的儲存格式。
+    - 不超過 limit 位元組：原樣保存
+    - 超過時以 zlib 壓縮（base64）保存；壓縮後仍超過則只保存前 limit 位元組
+    """
+    if len(raw) <= limit:
+        return payload
+
+    data = base64.b64encode(zlib.compress(raw)).decode("ascii")
+    if len(data) <= limit:
+        return {COMPRESSED: "zlib", "size": len(raw), "data": data}
+
+    return {
+        TRUNCATED: True,
+        "size": len(raw),
+        "data": raw[:limit].decode("utf-8", errors="ignore"),
+    }
+
+
+def unpack(stored):
+    """還原 pack 壓縮的 payload；截斷的內容無法還原，原樣回傳"""
+    if isinstance(stored, dict) and stored.get(COMPRESSED) == "zlib":
+        return json.loads(zlib.decompress(base64.b64decode(stored["data"])))
+    return stored
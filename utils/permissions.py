@@ -1,6 +1,5 @@
 from flask_jwt_extended import get_jwt_identity, get_jwt
-from models.user import User
-from models.shared import db
+from utils.token_state import get_token_state
 
 
 def has_permission(required_permission):
@@ -14,8 +13,8 @@ def has_permission(required_permission):
 def check_field_permission(permission):
     """檢查用戶對特定欄位的權限"""
     user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)
-    
-    if user and has_permission(permission):
+    token_state = get_token_state(user_id)
+
+    if token_state and has_permission(permission):
         return True
     return False
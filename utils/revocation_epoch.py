@@ -0,0 +1,29 @@
+from flask import current_app
+
+from utils.shared_counters import get_counters
+
+
+def is_enabled():
+    """設定 REVOCATION_EPOCH_PATH 才啟用跨 worker 的撤銷通知"""
+    return bool(current_app.config.get("REVOCATION_EPOCH_PATH"))
+
+
+def current():
+    """
+    讀取目前的撤銷世代，未啟用時回傳 None。
+    直接讀取共用記憶體，不需系統呼叫或資料庫查詢。
+    """
+    if not is_enabled():
+        return None
+    return _get_counters().get()
+
+
+def bump():
+    """撤銷世代加一，通知所有 worker 清除驗證狀態快取；回傳新的世代"""
+    if not is_enabled():
+        return None
+    return _get_counters().bump()[0]
+
+
+def _get_counters():
+    return get_counters(current_app.config["REVOCATION_EPOCH_PATH"], 1)
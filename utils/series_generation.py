@@ -0,0 +1,29 @@
+from flask import current_app
+
+from utils.shared_counters import get_counters
+
+# 共用計數器數量，系列 id 依餘數對應；不同系列共用同一計數器時只會多失效，不會讀到過期資料
+SLOTS = 4096
+
+
+def is_enabled():
+    """設定 SERIES_GENERATION_PATH 才啟用跨 worker 的系列寫入世代"""
+    return bool(current_app.config.get("SERIES_GENERATION_PATH"))
+
+
+def current(series_id):
+    """讀取系列目前的寫入世代，未啟用時回傳 None"""
+    if not is_enabled():
+        return None
+    return _get_counters().get(series_id % SLOTS)
+
+
+def bump(*series_ids):
+    """系列寫入世代加一，所有 worker 中該系列的快取隨之失效"""
+    if not is_enabled():
+        return
+    _get_counters().bump(sorted({series_id % SLOTS for series_id in series_ids}))
+
+
+def _get_counters():
+    return get_counters(current_app.config["SERIES_GENERATION_PATH"], SLOTS)
@@ -0,0 +1,69 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+
+_COUNTER = struct.Struct("<Q")
+
+_counters = {}  # (pid, path) -> SharedCounters
+_lock = threading.Lock()
+
+
+class SharedCounters:
+    """
+    以 mmap 共用的 8-byte 計數器陣列，同一主機的行程（gunicorn worker）開啟同一個檔案即可共用。
+    讀取直接存取共用記憶體，遞增時以檔案鎖確保多個行程同時遞增不會遺失。
+    """
+
+    def __init__(self, path, slots):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.slots = slots
+        size = _COUNTER.size * slots
+        self.fileno = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self.fileno, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fileno).st_size < size:
+                os.ftruncate(self.fileno, size)
+        finally:
+            fcntl.flock(self.fileno, fcntl.LOCK_UN)
+        self.view = mmap.mmap(self.fileno, size)
+
+    def get(self, slot=0):
+        return _COUNTER.unpack_from(self.view, slot * _COUNTER.size)[0]
+
+    def bump(self, slots=(0,)):
+        """指定的計數器各加一，回傳遞增後的值 list"""
+        fcntl.flock(self.fileno, fcntl.LOCK_EX)
+        try:
+            values = []
+            for slot in slots:
+                value = self.get(slot) + 1
+                _COUNTER.pack_into(self.view, slot * _COUNTER.size, value)
+                values.append(value)
+            return values
+        finally:
+            fcntl.flock(self.fileno, fcntl.LOCK_UN)
+
+    def close(self):
+        self.view.close()
+        os.close(self.fileno)
+
+
+def get_counters(path, slots):
+    """每個行程各自開啟對應，fork 後的子行程重新開啟"""
+    key = (os.getpid(), path)
+    counters = _counters.get(key)
+    if counters is not None:
+        return counters
+
+    with _lock:
+        if key not in _counters:
+            # 繼承自父行程的對應不再使用
+            for stale_key in [k for k in _counters if k[0] != key[0]]:
+                del _counters[stale_key]
+            _counters[key] = SharedCounters(path, slots)
+        return _counters[key]
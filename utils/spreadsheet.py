@@ -0,0 +1,63 @@
+import csv
+import io
+import os
+from datetime import date, datetime
+
+from openpyxl import load_workbook
+
+CSV = "csv"
+XLSX = "xlsx"
+FORMATS = [CSV, XLSX]
+
+
+def detect_format(filename):
+    """依副檔名判斷檔案格式，不支援時回傳 None"""
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    return extension if extension in FORMATS else None
+
+
+def iter_rows(stream, file_format):
+    """
+    逐列讀取上傳的 CSV / XLSX，yield 每列的儲存格值 list（第一列為表頭）。
+    不會一次載入整個檔案；空白儲存格為 None，日期儲存格轉為 YYYY-MM-DD 字串。
+    """
+    if file_format == CSV:
+        return _iter_csv_rows(stream)
+    if file_format == XLSX:
+        return _iter_xlsx_rows(stream)
+    raise ValueError(f"Unsupported file format: {file_format}")
+
+
+def _iter_csv_rows(stream):
+    # utf-8-sig 可讀取 Excel 另存的含 BOM CSV
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        for row in csv.reader(text):
+            yield [value if value != "" else None for value in row]
+    finally:
+        # 避免關閉 wrapper 時一併關閉上傳檔案
+        text.detach()
+
+
+def _iter_xlsx_rows(stream):
+    # read_only 模式逐列解析 XML，不會建立整份工作表
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        for row in worksheet.iter_rows(values_only=True):
+            yield [_cell_value(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def _cell_value(value):
+    # Excel 的數值皆為浮點數，整數值還原為 int，避免寫入成 "12.0"
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str) and value == "":
+        return None
+    return value
@@ -0,0 +1,144 @@
+import atexit
+import glob
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image as PILImage
+
+# 縮圖存放在原圖目錄下的子目錄
+THUMBNAIL_DIR = "thumbnails"
+JPEG_QUALITY = 85
+
+# 缺少的縮圖數量達到此值才交給 process pool，少量時直接在目前行程產生
+POOL_THRESHOLD = 2
+# 每個 gunicorn worker 各自持有一個 pool，總行程數為 worker 數 × 此值，預設取小值避免 CPU 超額使用
+DEFAULT_THUMBNAIL_WORKERS = 2
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def thumbnail_path(image_path, image_id, size):
+    """縮圖路徑：以圖片 id 與尺寸為 key，存放在原圖旁"""
+    return os.path.join(
+        os.path.dirname(image_path), THUMBNAIL_DIR, f"thumb_{image_id}_{size}.jpg"
+    )
+
+
+def ensure_thumbnails(images, size, max_workers=None):
+    """
+    取得多張圖片的縮圖，回傳 {image_id: thumbnail_path}，無法產生的圖片不在結果中。
+    - images: [(image_id, image_path)]，原圖需存在
+    - size: 縮圖長邊的像素上限
+    - max_workers: process pool 的行程數，預設為 DEFAULT_THUMBNAIL_WORKERS
+    已存在且比原圖新的縮圖直接沿用，其餘在 process pool 中產生。
+    """
+    result = {}
+    missing = []
+    for image_id, image_path in images:
+        path = thumbnail_path(image_path, image_id, size)
+        if _is_fresh(path, image_path):
+            result[image_id] = path
+        else:
+            missing.append((image_id, image_path, path))
+
+    if len(missing) >= POOL_THRESHOLD:
+        try:
+            pool = _get_pool(max_workers)
+            generated = list(
+                pool.map(
+                    _make_thumbnail,
+                    [(image_path, path, size) for _, image_path, path in missing],
+                )
+            )
+        except BrokenProcessPool:
+            _reset_pool()
+            generated = [
+                _make_thumbnail((image_path, path, size))
+                for _, image_path, path in missing
+            ]
+    else:
+        generated = [
+            _make_thumbnail((image_path, path, size)) for _, image_path, path in missing
+        ]
+
+    for (image_id, _, _), path in zip(missing, generated):
+        if path:
+            result[image_id] = path
+
+    return result
+
+
+def remove_thumbnails(image_path, image_id):
+    """原圖更新或刪除時移除該圖片所有尺寸的縮圖"""
+    pattern = os.path.join(
+        os.path.dirname(image_path), THUMBNAIL_DIR, f"thumb_{image_id}_*.jpg"
+    )
+    for path in glob.glob(pattern):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_fresh(path, image_path):
+    try:
+        return os.path.getmtime(path) >= os.path.getmtime(image_path)
+    except OSError:
+        return False
+
+
+def _make_thumbnail(task):
+    """於 worker process 執行：縮小並重新編碼為 JPEG，失敗時回傳 None"""
+    image_path, path, size = task
+    try:
+        with PILImage.open(image_path) as image:
+            image.thumbnail((size, size))
+            if image.mode in ("RGBA", "LA", "P"):
+                # JPEG 不支援透明，以白底合成
+                image = image.convert("RGBA")
+                background = PILImage.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先寫暫存檔再 rename，並行產生同一張縮圖時不會讀到寫一半的檔案
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            image.save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True)
+            os.replace(tmp_path, path)
+        return path
+    except Exception:
+        return None
+
+
+def _get_pool(max_workers):
+    global _pool, _pool_pid
+    with _pool_lock:
+        # fork 後的子行程不可沿用父行程的 pool
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers or DEFAULT_THUMBNAIL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(wait=True)
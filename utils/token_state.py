@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, g, has_app_context
+
+from models.shared import db
+from models.user import User
+from utils import revocation_epoch
+
+DEFAULT_TOKEN_STATE_TTL = 60
+
+# 驗證 token 所需的使用者狀態
+TokenState = namedtuple("TokenState", ["user_id", "username", "token_version", "is_disabled"])
+
+_cache = {}  # user_id -> (expires_at, TokenState)
+_seen_epoch = None  # 本行程快取對應的撤銷世代
+_lock = threading.Lock()
+
+
+def get_token_state(user_id):
+    """
+    取得使用者的 token 狀態，使用者不存在時回傳 None。
+    結果快取於行程內，由變更 token_version / is_disabled 的流程呼叫 invalidate 失效；
+    其他 worker 的變更透過撤銷世代通知，未啟用時 TOKEN_STATE_TTL 為最長延遲。
+    """
+    if user_id is None:
+        return None
+
+    user_id = int(user_id)
+    # TokenVersionMiddleware 已於本次請求取得的狀態直接沿用
+    request_state = g.get("token_state") if has_app_context() else None
+    if request_state is not None and request_state.user_id == user_id:
+        return request_state
+
+    _sync_epoch()
+
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+
+    state = TokenState(user.id, user.username, user.token_version, user.is_disabled)
+    ttl = current_app.config.get("TOKEN_STATE_TTL", DEFAULT_TOKEN_STATE_TTL)
+    with _lock:
+        _cache[user_id] = (now + ttl, state)
+    return state
+
+
+def invalidate(*user_ids):
+    """清除指定使用者的快取，並通知其他 worker"""
+    if not user_ids:
+        return
+
+    with _lock:
+        for user_id in user_ids:
+            _cache.pop(int(user_id), None)
+    _broadcast()
+
+
+def invalidate_all():
+    with _lock:
+        _cache.clear()
+    _broadcast()
+
+
+def _sync_epoch():
+    """撤銷世代變動時清除本行程的快取，之後的請求再各自重新讀取使用者"""
+    global _seen_epoch
+
+    epoch = revocation_epoch.current() if has_app_context() else None
+    if epoch is None or epoch == _seen_epoch:
+        return
+
+    with _lock:
+        if epoch != _seen_epoch:
+            _cache.clear()
+            _seen_epoch = epoch
+
+
+def _broadcast():
+    global _seen_epoch
+
+    epoch = revocation_epoch.bump() if has_app_context() else None
+    if epoch is None:
+        return
+
+    with _lock:
+        # 期間沒有其他 worker 撤銷時，本行程已自行清除，不需再清空整個快取
+        if _seen_epoch == epoch - 1:
+            _seen_epoch = epoch
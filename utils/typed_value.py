@@ -0,0 +1,67 @@
+import math
+from datetime import datetime
+
+# 產品日期欄位可接受的輸入格式
+DATE_FORMATS = [
+    "%Y/%m/%d",  # 2025/01/07
+    "%m/%d/%y",  # 01/07/25
+    "%m/%d/%Y",  # 01/07/2025
+    "%Y-%m-%d",  # 2025-01-07
+    "%d/%m/%Y",  # 07/01/2025
+    "%d-%m-%Y",  # 07-01-2025
+]
+
+# 匯入檔案中可接受的布林值文字（小寫）
+BOOLEAN_STRINGS = {
+    "1": 1, "true": 1, "yes": 1, "y": 1, "是": 1,
+    "0": 0, "false": 0, "no": 0, "n": 0, "否": 0,
+}
+
+
+def parse_date(value):
+    """將日期字串解析為 date，無法解析時回傳 None"""
+    if not value or not isinstance(value, str):
+        return None
+
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+
+    return None
+
+
+def parse_number(value):
+    """將數值或數值字串轉為 float，無法轉換時回傳 None"""
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    return number if math.isfinite(number) else None
+
+
+def parse_boolean(value):
+    """將布林值、0/1 或 true/false、yes/no 等字串轉為 1 / 0，無法轉換時回傳 None"""
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return int(value)
+    if isinstance(value, str):
+        return BOOLEAN_STRINGS.get(value.strip().lower())
+    return None
+
+
+def typed_values(value, data_type):
+    """依欄位型別回傳 (value_number, value_date) 投影值"""
+    data_type = (data_type or "").lower()
+
+    if data_type == "number":
+        return parse_number(value), None
+    if data_type == "datetime":
+        return None, parse_date(value)
+    return None, None